@@ -0,0 +1,230 @@
+# chainage.py
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from all_table_validations.link_index import LinkIndex, link_keys
+
+
+# Link_Length_Official is kept in km to two decimals, so a segment may end
+# up to 10 m past it before it counts as running past the link
+LENGTH_TOLERANCE_M = 10.0
+
+COVERAGE_COLUMNS = [
+    "Segments", "Link_Length_Official_m", "Covered_m", "Coverage_Pct",
+    "Gaps", "Gap_m", "Overlaps", "Overlap_m", "Reversed", "Past_Link_Length",
+]
+
+
+def _group_names(grouped) -> Dict[int, tuple]:
+    """Group number (ngroup) -> group name, as iterating the groupby shows it."""
+    group_no = grouped.ngroup().to_numpy()
+    names = {}
+    for name, positions in grouped.indices.items():
+        names[int(group_no[positions[0]])] = name if isinstance(name, tuple) else (name,)
+    return names
+
+
+def continuity_errors(df: pd.DataFrame, group_keys: Sequence[str]) -> List[Tuple[Any, str]]:
+    """
+    Chainage continuity of segment tables (RoadCondition, RoadInventory).
+
+    Rows are grouped by group_keys and sorted by Link_No, then ChainageFrom.
+    The first row of each group must start at 0, and within a link each
+    ChainageFrom must equal the previous segment's ChainageTo (rows without
+    both chainages are skipped). Returns (index label, message) pairs in
+    group order, then sorted row order.
+    """
+    group_keys = list(group_keys)
+    grouped = df.groupby(group_keys, dropna=False, sort=False)
+    names = _group_names(grouped)
+    group_no = grouped.ngroup().to_numpy()
+
+    chainage_from = pd.to_numeric(df["ChainageFrom"], errors="coerce")
+    chainage_to = pd.to_numeric(df["ChainageTo"], errors="coerce")
+    # One stable sort for every group: group first, then the per-group order
+    work = pd.DataFrame({
+        "_group": group_no,
+        "_link": df["Link_No"].reset_index(drop=True),
+        "_from": chainage_from.reset_index(drop=True),
+    })
+    order = work.sort_values(["_group", "_link", "_from"]).index.to_numpy()
+
+    from_f = chainage_from.to_numpy(dtype="float64", na_value=np.nan)
+    to_f = chainage_to.to_numpy(dtype="float64", na_value=np.nan)
+    sorted_group = group_no[order]
+    # Values as the row loop printed them (Python scalars of the parsed column)
+    from_shown = chainage_from.tolist()
+    to_shown = chainage_to.tolist()
+    labels = df.index
+
+    found: List[Tuple[int, int, Any, str]] = []
+
+    # The first segment of each group must start at 0
+    first = np.flatnonzero(np.r_[True, sorted_group[1:] != sorted_group[:-1]]) if len(order) else []
+    for rank in first:
+        pos = order[rank]
+        if np.isnan(from_f[pos]) or from_f[pos] != 0:
+            message = f"ChainageFrom must start at 0 for the group {names[sorted_group[rank]]}"
+            found.append((rank, 0, labels[pos], message))
+
+    # Within a link, ChainageFrom must equal the previous segment's ChainageTo
+    ranks = np.flatnonzero(~np.isnan(from_f[order]) & ~np.isnan(to_f[order]))
+    if len(ranks) > 1:
+        valid = order[ranks]
+        links = link_keys(df["Link_No"]).to_numpy()[valid]
+        cur, prev = valid[1:], valid[:-1]
+        broken = (
+            (group_no[cur] == group_no[prev])
+            & (links[1:] == links[:-1])
+            & (from_f[cur] != to_f[prev])
+        )
+        for i in np.flatnonzero(broken):
+            message = (
+                f"ChainageFrom ({from_shown[cur[i]]}) must equal previous ChainageTo ({to_shown[prev[i]]}) "
+                f"for continuous chainage within the same link"
+            )
+            found.append((ranks[i + 1], 1, labels[cur[i]], message))
+
+    found.sort(key=lambda item: (item[0], item[1]))
+    return [(label, message) for _, _, label, message in found]
+
+
+def _official_length_m(df: pd.DataFrame, df_link: pd.DataFrame) -> np.ndarray:
+    """Link_Length_Official of each row's link in meters (NaN when unknown)."""
+    if df_link is None or "Link_Length_Official" not in df_link.columns or "Link_No" not in df_link.columns:
+        return np.full(len(df), np.nan)
+    lengths = LinkIndex.for_frame(df_link).lookup(df["Link_No"], "Link_Length_Official")
+    return pd.to_numeric(lengths, errors="coerce").to_numpy(dtype="float64", na_value=np.nan) * 1000
+
+
+def interval_sweep(
+    df: pd.DataFrame,
+    key_columns: Sequence[str] = (),
+    df_link: pd.DataFrame = None,
+) -> Tuple[List[Tuple[Any, str]], pd.DataFrame]:
+    """
+    Sort-and-sweep over the (ChainageFrom, ChainageTo) intervals of each link.
+
+    Rows are keyed by Link_No plus key_columns (e.g. Year) and sorted once by
+    key, ChainageFrom and ChainageTo; a running maximum of ChainageTo per key
+    then shows which segments overlap or duplicate an earlier one and where
+    the gaps are. Chainages are in meters, Link_Length_Official in km.
+
+    Returns the row findings as (index label, message) pairs in row order -
+    reversed intervals, duplicate and overlapping segments, and segments
+    running past Link_Length_Official - plus a per-key coverage summary
+    (one row per Link_No and key, COVERAGE_COLUMNS). Gaps are only counted
+    in the summary; the continuity check already reports them per row.
+    """
+    key_columns = [c for c in key_columns if c in df.columns]
+    summary_columns = ["Link_No"] + key_columns + COVERAGE_COLUMNS
+    links = link_keys(df["Link_No"]).to_numpy()
+    keyed = np.flatnonzero(links != "")
+    if not len(keyed):
+        return [], pd.DataFrame(columns=summary_columns)
+
+    work = pd.DataFrame({"Link_No": links[keyed]})
+    for col in key_columns:
+        work[col] = df[col].to_numpy()[keyed]
+    grouped = work.groupby(["Link_No"] + key_columns, dropna=False, sort=True)
+    groups = grouped.ngroup().to_numpy()
+    n_groups = grouped.ngroups
+
+    lo = pd.to_numeric(df["ChainageFrom"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)[keyed]
+    hi = pd.to_numeric(df["ChainageTo"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)[keyed]
+    length = _official_length_m(df, df_link)[keyed]
+    shown_from = df["ChainageFrom"].to_numpy()[keyed]
+    shown_to = df["ChainageTo"].to_numpy()[keyed]
+    shown_link = df["Link_No"].to_numpy()[keyed]
+    labels = df.index[keyed]
+
+    valid = ~np.isnan(lo) & ~np.isnan(hi)
+    reversed_ = valid & (lo > hi)
+    past = valid & ~reversed_ & ~np.isnan(length) & (hi > length + LENGTH_TOLERANCE_M)
+
+    # The sweep: one sort, then comparisons against the running end per key
+    sweep = np.flatnonzero(valid & ~reversed_)
+    order = sweep[np.lexsort((hi[sweep], lo[sweep], groups[sweep]))]
+    g, s_lo, s_hi = groups[order], lo[order], hi[order]
+    first = np.r_[True, g[1:] != g[:-1]] if len(order) else np.zeros(0, dtype=bool)
+    running_end = pd.Series(s_hi).groupby(g).cummax().to_numpy()
+    prev_end = np.where(first, np.nan, np.r_[np.nan, running_end[:-1]])
+    prev_lo = np.r_[np.nan, s_lo[:-1]]
+    prev_hi = np.r_[np.nan, s_hi[:-1]]
+
+    duplicate = ~first & (s_lo == prev_lo) & (s_hi == prev_hi)
+    overlap = ~first & ~duplicate & (s_lo < prev_end)
+    gap = ~first & (s_lo > prev_end)
+    overlap_m = np.where(overlap, np.minimum(s_hi, prev_end) - s_lo, 0.0)
+    gap_m = np.where(gap, s_lo - prev_end, 0.0)
+
+    # Covered length within [0, Link_Length_Official]: clipping keeps the order
+    s_len = length[order]
+    upper = np.where(np.isnan(s_len), np.inf, s_len)
+    c_lo = np.clip(s_lo, 0, upper)
+    c_hi = np.clip(s_hi, 0, upper)
+    c_prev = np.where(first, -np.inf, np.r_[-np.inf, pd.Series(c_hi).groupby(g).cummax().to_numpy()[:-1]])
+    covered = np.maximum(c_hi - np.maximum(c_lo, c_prev), 0.0)
+
+    def per_group(values, at=g):
+        return np.bincount(at, weights=values, minlength=n_groups)
+
+    # Gaps before the first segment and after the last one count as well
+    group_start = np.full(n_groups, np.nan)
+    group_start[g[first]] = s_lo[first]
+    group_end = np.full(n_groups, np.nan)
+    if len(order):
+        group_end[g[first]] = pd.Series(s_hi).groupby(g).max().to_numpy()
+    group_length = pd.Series(length).groupby(groups).first().to_numpy()
+    lead = group_start > 0
+    tail = group_end < group_length
+
+    summary = grouped.size().reset_index(name="Segments")
+    summary["Link_Length_Official_m"] = group_length
+    summary["Covered_m"] = per_group(covered)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(group_length > 0, summary["Covered_m"].to_numpy() / group_length * 100, np.nan)
+    summary["Coverage_Pct"] = np.round(pct, 2)
+    summary["Gaps"] = per_group(gap.astype(float)).astype(int) + lead + tail
+    summary["Gap_m"] = (
+        per_group(gap_m)
+        + np.where(lead, group_start, 0.0)
+        + np.where(tail, group_length - group_end, 0.0)
+    )
+    summary["Overlaps"] = per_group((overlap | duplicate).astype(float)).astype(int)
+    summary["Overlap_m"] = per_group(overlap_m + np.where(duplicate, s_hi - s_lo, 0.0))
+    summary["Reversed"] = per_group(reversed_.astype(float), groups).astype(int)
+    summary["Past_Link_Length"] = per_group(past.astype(float), groups).astype(int)
+    summary = summary[summary_columns]
+
+    found: List[Tuple[int, int, str]] = []
+    for pos in np.flatnonzero(reversed_):
+        found.append((pos, 0, f"ChainageFrom ({shown_from[pos]}) is greater than ChainageTo ({shown_to[pos]})"))
+    for i in np.flatnonzero(duplicate):
+        pos = order[i]
+        found.append((pos, 1, f"Duplicate segment {shown_from[pos]}-{shown_to[pos]} for Link_No '{shown_link[pos]}'"))
+    for i in np.flatnonzero(overlap):
+        pos = order[i]
+        found.append((
+            pos, 1,
+            f"Segment {shown_from[pos]}-{shown_to[pos]} overlaps the previous segment "
+            f"ending at {prev_end[i]} for Link_No '{shown_link[pos]}'",
+        ))
+    for pos in np.flatnonzero(past):
+        found.append((
+            pos, 2,
+            f"ChainageTo ({shown_to[pos]} m) runs past Link_Length_Official "
+            f"({length[pos] / 1000:g} km = {length[pos]:.0f} m) for Link_No '{shown_link[pos]}'",
+        ))
+    found.sort(key=lambda item: (item[0], item[1]))
+    return [(labels[pos], message) for pos, _, message in found], summary
+
+
+__all__ = [
+    "COVERAGE_COLUMNS",
+    "LENGTH_TOLERANCE_M",
+    "continuity_errors",
+    "interval_sweep",
+]
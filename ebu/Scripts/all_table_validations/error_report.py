@@ -0,0 +1,294 @@
+# error_report.py
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+
+# Rule ids; a rule's integer code is its position here
+RULES = (
+    "columns",      # required columns missing from the table
+    "required",     # empty required value
+    "field",        # data type, range, length or allowed values of a field
+    "link",         # Link_No not in the Link table
+    "unique_key",   # duplicated uniqueness key
+    "reference",    # no parent record (foreign key)
+    "continuity",   # chainage sequence across the links of a group
+    "interval",     # reversed, duplicate, overlapping or over-long segments
+    "gps",          # invalid or all-zero GPS coordinates
+    "gps_point",    # GPS point outside Indonesia or its kabupaten, or jumping along the link
+    "link_length",  # last Chainage_RB against Link_Length_Official
+    "row",          # a row of a validator that reports rows only
+)
+RULE_CODES: Dict[str, int] = {rule: code for code, rule in enumerate(RULES)}
+
+# Columns of ErrorReport.failures(): one row per failure rather than per report row
+FAILURE_COLUMNS = ["Record_No", "Link_No", "Rule", "Validation_Message"]
+
+
+class _Chunk:
+    """The failures of one add call: row positions, a rule code and the message template."""
+    __slots__ = ("section", "separate", "positions", "code", "template", "params")
+
+    def __init__(self, section: int, separate: bool, positions: np.ndarray, code: int,
+                 template: Union[str, np.ndarray], params: Optional[Dict[str, np.ndarray]]):
+        self.section = section
+        self.separate = separate
+        self.positions = positions
+        self.code = code
+        self.template = template
+        self.params = params
+
+    def messages(self) -> np.ndarray:
+        """The rendered message of every position."""
+        if not isinstance(self.template, str):
+            return self.template
+        if not self.params:
+            return np.full(len(self.positions), self.template, dtype=object)
+        names = list(self.params)
+        return np.array([
+            self.template.format(**dict(zip(names, values))) for values in zip(*self.params.values())
+        ], dtype=object)
+
+
+class ErrorReport:
+    """
+    Errors of one validated table, held as integer rule codes, row positions
+    and message templates with their per-row parameters. Messages are
+    rendered only by frame(), when the report is written; counts() is exact
+    without rendering anything. A report pickles without its table (only the
+    arrays travel back from a worker process); frame() then takes the table.
+
+    Consecutive add* calls form one section in which every table row gets a
+    single report row, its messages in the order they were added, rows in
+    table order. add_separate entries (chainage sequence, duplicate records)
+    each become a report row of their own, in the order they were added.
+    Sections keep the order of the calls.
+
+    With a budget, at most that many failures are kept: the chunk that
+    reaches it is cut, later ones are dropped and the report is marked
+    truncated. Validators check full to skip their remaining checks, so a
+    report that used up its budget counts as truncated.
+    """
+
+    def __init__(self, df: pd.DataFrame, budget: Optional[int] = None):
+        self.df = df
+        self.columns = list(df.columns)
+        self.budget = budget
+        self.truncated = False
+        # Carried over to the frame's attrs (e.g. the coverage summary)
+        self.attrs: Dict[str, Any] = {}
+        self._chunks: List[_Chunk] = []
+        self._failures = 0
+        self._section = -1
+        self._merging = False
+
+    @property
+    def full(self) -> bool:
+        """True once the budget is used up; further failures are not kept."""
+        return self.budget is not None and self._failures >= self.budget
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["df"] = None
+        return state
+
+    def _chunk(self, positions, rule: str, message, params, separate: bool) -> None:
+        positions = np.asarray(positions, dtype=np.intp).reshape(-1)
+        if not len(positions):
+            return
+        if self.full:
+            self.truncated = True
+            return
+        if not isinstance(message, str):
+            message = np.asarray(list(message), dtype=object)
+        if params:
+            params = {name: np.asarray(list(values), dtype=object) for name, values in params.items()}
+        if self.budget is not None and self._failures + len(positions) > self.budget:
+            keep = self.budget - self._failures
+            positions = positions[:keep]
+            if not isinstance(message, str):
+                message = message[:keep]
+            if params:
+                params = {name: values[:keep] for name, values in params.items()}
+        self._failures += len(positions)
+        if self.full:
+            self.truncated = True
+        if separate or not self._merging:
+            self._section += 1
+        self._merging = not separate
+        self._chunks.append(_Chunk(self._section, separate, positions, RULE_CODES[rule], message, params or None))
+
+    def add(self, positions: Iterable[int], rule: str, message: Union[str, Sequence[str]],
+            params: Optional[Dict[str, Sequence[Any]]] = None) -> None:
+        """
+        Row check failures by row position. message is one text for all, a
+        str.format template filled per position from params (values aligned
+        with positions), or one rendered message per position.
+        """
+        self._chunk(list(positions), rule, message, params, separate=False)
+
+    def add_mask(self, mask: np.ndarray, rule: str, message: str) -> None:
+        """The rows where mask is True failed rule."""
+        self._chunk(np.flatnonzero(mask), rule, message, None, separate=False)
+
+    def add_labels(self, by_label: Dict[Any, List[str]], rule: str) -> None:
+        """Row check failures as {index label: [messages]} (e.g. the unique key messages)."""
+        if not by_label:
+            return
+        labels = [label for label, messages in by_label.items() for _ in messages]
+        messages = [message for row_messages in by_label.values() for message in row_messages]
+        self._chunk(self.df.index.get_indexer(labels), rule, messages, None, separate=False)
+
+    def add_checks(self, plan, check_required: bool = True) -> None:
+        """The required-column and data type failures of a CheckerPlan, per column."""
+        for positions, rule, template, params in plan.failures(self.df, check_required):
+            self._chunk(positions, rule, template, params, separate=False)
+
+    def add_separate(self, labels: Sequence[Any], rule: str, message: Union[str, Sequence[str]],
+                     params: Optional[Dict[str, Sequence[Any]]] = None) -> None:
+        """Failures reported on a report row each, by index label."""
+        self._chunk(self.df.index.get_indexer(list(labels)), rule, message, params, separate=True)
+
+    def limit(self, budget: int) -> None:
+        """Apply a (smaller) budget to the failures already kept."""
+        if self.budget is None or budget < self.budget:
+            self.budget = budget
+        if self._failures < budget:
+            return
+        if self._failures > budget:
+            chunks, self._chunks, self._failures = self._chunks, [], 0
+            for chunk in chunks:
+                keep = min(len(chunk.positions), budget - self._failures)
+                if keep <= 0:
+                    break
+                if keep < len(chunk.positions):
+                    chunk.positions = chunk.positions[:keep]
+                    if not isinstance(chunk.template, str):
+                        chunk.template = chunk.template[:keep]
+                    if chunk.params:
+                        chunk.params = {name: values[:keep] for name, values in chunk.params.items()}
+                self._chunks.append(chunk)
+                self._failures += keep
+        self.truncated = True
+
+    def counts(self) -> Dict[str, int]:
+        """Failures per rule id, in RULES order."""
+        totals = np.zeros(len(RULES), dtype=np.int64)
+        for chunk in self._chunks:
+            totals[chunk.code] += len(chunk.positions)
+        return {RULES[code]: int(totals[code]) for code in np.flatnonzero(totals)}
+
+    def __len__(self) -> int:
+        """Number of report rows."""
+        rows = 0
+        sections: Dict[int, List[np.ndarray]] = {}
+        for chunk in self._chunks:
+            if chunk.separate:
+                rows += len(chunk.positions)
+            else:
+                sections.setdefault(chunk.section, []).append(chunk.positions)
+        return rows + sum(len(np.unique(np.concatenate(parts))) for parts in sections.values())
+
+    def _report_rows(self):
+        """Row positions and joined messages of the report rows, in report order."""
+        positions: List[np.ndarray] = []
+        messages: List[np.ndarray] = []
+        sections: Dict[int, List[_Chunk]] = {}
+        for chunk in self._chunks:
+            sections.setdefault(chunk.section, []).append(chunk)
+        for chunks in sections.values():
+            pos = np.concatenate([chunk.positions for chunk in chunks])
+            msg = np.concatenate([chunk.messages() for chunk in chunks])
+            if chunks[0].separate:
+                positions.append(pos)
+                messages.append(msg)
+                continue
+            # Stable sort keeps each row's messages in the order they were added
+            order = np.argsort(pos, kind="stable")
+            pos, msg = pos[order], msg[order]
+            starts = np.flatnonzero(np.r_[True, pos[1:] != pos[:-1]])
+            counts = np.diff(np.r_[starts, len(pos)])
+            joined = msg[starts].copy()
+            # One element-wise concatenation per extra message, over the rows that have it
+            for k in range(1, int(counts.max())):
+                rows = np.flatnonzero(counts > k)
+                joined[rows] = joined[rows] + "; " + msg[starts[rows] + k]
+            positions.append(pos[starts])
+            messages.append(joined)
+        if not positions:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=object)
+        return np.concatenate(positions), np.concatenate(messages)
+
+    def report_columns(self) -> List[str]:
+        return ["Record_No"] + self.columns + ["Validation_Message"]
+
+    def frame(self, df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Record_No (1-based row label), the row's columns and Validation_Message
+        per report row. df is the validated table, needed once the report has
+        been pickled.
+        """
+        df = self.df if df is None else df
+        positions, messages = self._report_rows()
+        if not len(positions):
+            out = pd.DataFrame(columns=self.report_columns())
+        else:
+            out = df.iloc[positions]
+            labels = out.index
+            out = out.reset_index(drop=True)
+            out.insert(0, "Record_No", labels + 1)
+            out["Validation_Message"] = messages
+            out.index = labels
+        out.attrs.update(self.attrs)
+        if self.truncated:
+            out.attrs["truncated"] = True
+        return out
+
+    def failures(self, df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        FAILURE_COLUMNS per kept failure, in table row order (a row's failures
+        in the order they were added): Record_No, the row's Link_No (None when
+        the table has none), the rule id and the failure's own message.
+        """
+        df = self.df if df is None else df
+        if not self._chunks:
+            return pd.DataFrame(columns=FAILURE_COLUMNS)
+        positions = np.concatenate([chunk.positions for chunk in self._chunks])
+        codes = np.concatenate([np.full(len(chunk.positions), chunk.code) for chunk in self._chunks])
+        messages = np.concatenate([chunk.messages() for chunk in self._chunks])
+        order = np.argsort(positions, kind="stable")
+        positions, codes, messages = positions[order], codes[order], messages[order]
+        link_nos = df["Link_No"].to_numpy()[positions] if "Link_No" in df.columns else None
+        return pd.DataFrame({
+            "Record_No": df.index[positions] + 1,
+            "Link_No": link_nos,
+            "Rule": np.asarray(RULES, dtype=object)[codes],
+            "Validation_Message": messages,
+        }, columns=FAILURE_COLUMNS)
+
+
+def rule_counts(result: Union[ErrorReport, pd.DataFrame]) -> Dict[str, int]:
+    """
+    Failures per rule of a validator result. A frame counts one failure per
+    row ("columns" for the required-columns row), unless its attrs carry
+    "rule_counts".
+    """
+    if isinstance(result, ErrorReport):
+        return result.counts()
+    if "rule_counts" in result.attrs:
+        return dict(result.attrs["rule_counts"])
+    if result.empty:
+        return {}
+    if "Record_No" in result.columns and (result["Record_No"] == "N/A").all():
+        return {"columns": len(result)}
+    return {"row": len(result)}
+
+
+__all__ = [
+    "RULES",
+    "RULE_CODES",
+    "FAILURE_COLUMNS",
+    "ErrorReport",
+    "rule_counts",
+]
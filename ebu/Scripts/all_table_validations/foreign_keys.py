@@ -0,0 +1,76 @@
+# foreign_keys.py
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from all_table_validations.link_index import link_keys
+
+
+class ForeignKey(NamedTuple):
+    """Every row's columns must match parent_columns of some row of the parent table."""
+    columns: Tuple[str, ...]
+    parent: str
+    parent_columns: Tuple[str, ...]
+
+
+def _key_frame(df: pd.DataFrame, columns: Sequence[str], names: Sequence[str]) -> pd.DataFrame:
+    """The key columns as trimmed text ("" when empty), positionally indexed."""
+    return pd.DataFrame({name: link_keys(df[col]).to_numpy() for col, name in zip(columns, names)})
+
+
+def orphan_rows(df: pd.DataFrame, parent_df: Optional[pd.DataFrame], reference: ForeignKey) -> Optional[Set[int]]:
+    """
+    Positions of the rows whose key (all parts non-empty) has no match in
+    the parent table, found with one hash join. Keys are compared as trimmed
+    text, like Link_No. None when either side lacks a key column.
+    """
+    names = list(reference.columns)
+    if any(col not in df.columns for col in reference.columns):
+        return None
+    if parent_df is None or any(col not in parent_df.columns for col in reference.parent_columns):
+        return None
+
+    child = _key_frame(df, reference.columns, names)
+    complete = (child != "").all(axis=1).to_numpy()
+    parent = _key_frame(parent_df, reference.parent_columns, names)
+    parent = parent[(parent != "").all(axis=1)].drop_duplicates()
+
+    # Left join on the distinct parent keys: one output row per child row, in order
+    joined = child[complete].merge(parent, how="left", on=names, indicator=True)
+    unmatched = (joined["_merge"] == "left_only").to_numpy()
+    return set(np.flatnonzero(complete)[unmatched].tolist())
+
+
+def find_orphans(tables: Dict[str, pd.DataFrame], table_name: str,
+                 references: Sequence[ForeignKey]) -> Dict[str, Optional[Set[int]]]:
+    """orphan_rows of table_name for each of its references, keyed by parent table."""
+    df = tables[table_name]
+    return {reference.parent: orphan_rows(df, tables.get(reference.parent), reference) for reference in references}
+
+
+def orphan_messages(df: pd.DataFrame, references: Sequence[ForeignKey],
+                    orphans: Optional[Dict[str, Optional[Set[int]]]]) -> Dict[Any, List[str]]:
+    """
+    {index label: [messages]} for the orphan rows. orphans maps each parent
+    table to the positions found by orphan_rows or the SQL rule engine; the
+    validators only see their own table, so without it nothing is reported.
+    """
+    messages: Dict[Any, List[str]] = {}
+    for reference in references:
+        positions = (orphans or {}).get(reference.parent)
+        if not positions:
+            continue
+        columns = [df[col].to_numpy() for col in reference.columns]
+        for pos in sorted(positions):
+            pairs = " and ".join(f"{col} '{values[pos]}'" for col, values in zip(reference.columns, columns))
+            messages.setdefault(df.index[pos], []).append(f"No {reference.parent} record for {pairs}")
+    return messages
+
+
+__all__ = [
+    "ForeignKey",
+    "orphan_rows",
+    "find_orphans",
+    "orphan_messages",
+]
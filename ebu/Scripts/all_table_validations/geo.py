@@ -0,0 +1,210 @@
+# geo.py
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from all_table_validations.link_index import link_keys
+from all_table_validations.type_checks import float_values
+
+
+EARTH_RADIUS_M = 6371008.8
+
+# (lat_min, lat_max, lon_min, lon_max) of Indonesia, with a small margin
+INDONESIA_EXTENT = (-11.5, 6.5, 94.5, 141.5)
+
+# Without a registered extent, a point further than this from the median
+# point of its kabupaten is taken to be outside the kabupaten
+KABUPATEN_RADIUS_KM = 250.0
+
+# Consecutive points of a link may be at most JUMP_FACTOR times their
+# chainage difference plus JUMP_SLACK_M apart (GPS and chainage error)
+JUMP_FACTOR = 2.0
+JUMP_SLACK_M = 500.0
+
+Extent = Tuple[float, float, float, float]
+
+
+def _per_unique(series: pd.Series, normalize) -> Tuple[np.ndarray, np.ndarray]:
+    """factorize(series) with normalize() applied to the distinct values only."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    return codes, normalize(pd.Series(uniques, dtype=object)).to_numpy()
+
+
+def _code_text(values: pd.Series) -> pd.Series:
+    return values.astype("string").str.strip().str.replace(r"\.0$", "", regex=True).fillna("")
+
+
+def region_codes(df: pd.DataFrame) -> pd.Series:
+    """"<Province_Code>-<Kabupaten_Code>" of each row, as in the admCode ("18-11")."""
+    province, province_text = _per_unique(df["Province_Code"], _code_text)
+    kabupaten, kabupaten_text = _per_unique(df["Kabupaten_Code"], _code_text)
+    pairs, first = np.unique(province * len(kabupaten_text) + kabupaten, return_inverse=True)
+    text = [
+        f"{province_text[pair // len(kabupaten_text)]}-{kabupaten_text[pair % len(kabupaten_text)]}"
+        for pair in pairs
+    ]
+    return pd.Series(np.asarray(text, dtype=object)[first], index=df.index, dtype=object)
+
+
+def load_kabupaten_extents(path: str) -> Dict[str, Extent]:
+    """
+    Kabupaten extents from a CSV with province_id, kCode (as in kab.csv) and
+    lat_min, lat_max, lon_min, lon_max columns, keyed like region_codes().
+    """
+    df = pd.read_csv(path, dtype={"province_id": str, "kCode": str})
+    codes = region_codes(df.rename(columns={"province_id": "Province_Code", "kCode": "Kabupaten_Code"}))
+    bounds = df[["lat_min", "lat_max", "lon_min", "lon_max"]].astype(float).to_numpy()
+    return {code: tuple(row) for code, row in zip(codes, bounds)}
+
+
+def dms_to_decimal(degrees: np.ndarray, minutes: np.ndarray, seconds: np.ndarray,
+                   south: Optional[np.ndarray] = None) -> np.ndarray:
+    """Decimal degrees; negative degrees or the southern hemisphere give a negative value."""
+    value = np.abs(degrees) + np.abs(minutes) / 60 + np.abs(seconds) / 3600
+    negative = degrees < 0
+    if south is not None:
+        negative = negative | south
+    return np.where(negative, -value, value)
+
+
+def haversine_m(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Great-circle distance in meters between points given in decimal degrees."""
+    lat1, lon1, lat2, lon2 = (np.radians(a) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _axis(df: pd.DataFrame, axis: str) -> np.ndarray:
+    """One coordinate of every row in decimal degrees, NaN where it cannot be used."""
+    parts = []
+    for unit in ("Deg", "Min", "Sec"):
+        values, failed = float_values(df[f"GPSPoint_{axis}_{unit}"])
+        values[failed] = np.nan
+        parts.append(values)
+    degrees, minutes, seconds = parts
+    unusable = (
+        np.isnan(degrees)
+        | (np.isnan(minutes) & df[f"GPSPoint_{axis}_Min"].notna().to_numpy())
+        | (np.isnan(seconds) & df[f"GPSPoint_{axis}_Sec"].notna().to_numpy())
+    )
+    minutes, seconds = np.nan_to_num(minutes), np.nan_to_num(seconds)
+    unusable |= (degrees == 0) & (minutes == 0) & (seconds == 0)
+    south = None
+    if axis == "North" and "Hemis_NS" in df.columns:
+        hemisphere, south_values = _per_unique(
+            df["Hemis_NS"], lambda v: (v.astype("string").str.strip().str.upper().str[:1] == "S").fillna(False)
+        )
+        south = south_values.astype(bool)[hemisphere]
+    decimal = dms_to_decimal(degrees, minutes, seconds, south)
+    decimal[unusable] = np.nan
+    return decimal
+
+
+def decimal_coordinates(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Latitude and longitude of every Alignment point from its DMS columns,
+    converted for the whole table at once. Points with an unparseable,
+    missing or all-zero coordinate are NaN; the row checks report those.
+    """
+    return _axis(df, "North"), _axis(df, "East")
+
+
+def gps_point_errors(df: pd.DataFrame, kabupaten_extents: Optional[Dict[str, Extent]] = None) -> Dict[int, List[str]]:
+    """
+    Geospatial sanity pass over the Alignment points:
+
+    - every point must lie within Indonesia
+    - every point must lie within its kabupaten: the registered extent when
+      kabupaten_extents has one, else within KABUPATEN_RADIUS_KM of the
+      median point of the kabupaten
+    - consecutive points of a Link_No (by Chainage_RB) must not be further
+      apart than their chainage difference allows (JUMP_FACTOR, JUMP_SLACK_M)
+
+    Returns {row position: [messages]}.
+    """
+    columns = [f"GPSPoint_{axis}_{unit}" for axis in ("North", "East") for unit in ("Deg", "Min", "Sec")]
+    found: Dict[int, List[str]] = {}
+    if df.empty or not all(col in df.columns for col in columns):
+        return found
+
+    lat, lon = decimal_coordinates(df)
+    located = ~np.isnan(lat) & ~np.isnan(lon)
+
+    def report(mask, messages):
+        for pos, message in zip(np.flatnonzero(mask), messages):
+            found.setdefault(int(pos), []).append(message)
+
+    def point(pos):
+        return f"GPS point ({lat[pos]:.6f}, {lon[pos]:.6f})"
+
+    # Indonesia
+    lat_min, lat_max, lon_min, lon_max = INDONESIA_EXTENT
+    abroad = located & ((lat < lat_min) | (lat > lat_max) | (lon < lon_min) | (lon > lon_max))
+    report(abroad, (f"{point(pos)} is outside Indonesia" for pos in np.flatnonzero(abroad)))
+
+    # Kabupaten: registered extents, else distance from the median point
+    if "Province_Code" in df.columns and "Kabupaten_Code" in df.columns:
+        codes = region_codes(df)
+        inside = located & ~abroad
+        if kabupaten_extents:
+            bounds = np.array([kabupaten_extents.get(code, (np.nan,) * 4) for code in codes.unique()], dtype=float)
+            row_bounds = bounds[pd.Index(codes.unique()).get_indexer(codes)]
+            registered = inside & ~np.isnan(row_bounds[:, 0])
+        else:
+            row_bounds = np.full((len(df), 4), np.nan)
+            registered = np.zeros(len(df), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            outside = registered & (
+                (lat < row_bounds[:, 0]) | (lat > row_bounds[:, 1]) | (lon < row_bounds[:, 2]) | (lon > row_bounds[:, 3])
+            )
+        report(outside, (
+            f"{point(pos)} is outside the extent of kabupaten {codes.iat[pos]}" for pos in np.flatnonzero(outside)
+        ))
+
+        estimated = inside & ~registered
+        points = pd.DataFrame({"lat": lat, "lon": lon})[estimated]
+        centre = points.groupby(codes[estimated].to_numpy()).transform("median")
+        distance = np.full(len(df), np.nan)
+        distance[estimated] = haversine_m(points["lat"].to_numpy(), points["lon"].to_numpy(),
+                                          centre["lat"].to_numpy(), centre["lon"].to_numpy())
+        stray = estimated & (distance > KABUPATEN_RADIUS_KM * 1000)
+        report(stray, (
+            f"{point(pos)} is {distance[pos] / 1000:.0f} km from the other points of kabupaten {codes.iat[pos]}"
+            for pos in np.flatnonzero(stray)
+        ))
+
+    # Jumps between consecutive points of a link
+    if "Link_No" in df.columns and "Chainage_RB" in df.columns:
+        links = link_keys(df["Link_No"]).to_numpy()
+        chainage = pd.to_numeric(df["Chainage_RB"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        usable = np.flatnonzero(located & (links != "") & ~np.isnan(chainage))
+        order = usable[np.lexsort((chainage[usable], links[usable]))]
+        cur, prev = order[1:], order[:-1]
+        same_link = links[cur] == links[prev]
+        gap = haversine_m(lat[prev], lon[prev], lat[cur], lon[cur])
+        allowed = JUMP_FACTOR * np.abs(chainage[cur] - chainage[prev]) + JUMP_SLACK_M
+        jump = same_link & (gap > allowed)
+        for i in np.flatnonzero(jump):
+            found.setdefault(int(cur[i]), []).append(
+                f"GPS point is {gap[i]:.0f} m from the previous point of Link_No {links[cur[i]]} "
+                f"(Chainage_RB {chainage[prev[i]]:g}), more than the "
+                f"{abs(chainage[cur[i]] - chainage[prev[i]]):.0f} m chainage difference allows"
+            )
+
+    return found
+
+
+__all__ = [
+    "EARTH_RADIUS_M",
+    "INDONESIA_EXTENT",
+    "KABUPATEN_RADIUS_KM",
+    "JUMP_FACTOR",
+    "JUMP_SLACK_M",
+    "region_codes",
+    "load_kabupaten_extents",
+    "dms_to_decimal",
+    "haversine_m",
+    "decimal_coordinates",
+    "gps_point_errors",
+]
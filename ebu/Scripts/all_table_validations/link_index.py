@@ -0,0 +1,93 @@
+# link_index.py
+import weakref
+from typing import Any, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+
+def link_keys(link_nos: pd.Series) -> pd.Series:
+    """Link_No values as lookup keys: stripped text, "" for empty values."""
+    keys = link_nos.astype("string").str.strip()
+    return keys.fillna("").astype(object)
+
+
+class LinkIndex:
+    """
+    Hash index over the Link table: normalized Link_No -> row position of
+    its first occurrence. Membership is one vectorized lookup for a whole
+    column, and Link attributes (lengths, codes) are fetched by position
+    instead of scanning the Link frame per row.
+
+    Use LinkIndex.for_frame(df_link) so that every validator of a run (in
+    one process) shares the same index.
+    """
+
+    _cache: Optional[tuple] = None
+
+    def __init__(self, df_link: pd.DataFrame):
+        self.frame = df_link
+        if "Link_No" in df_link.columns:
+            keys = link_keys(df_link["Link_No"]).to_numpy()
+        else:
+            keys = np.array([], dtype=object)
+        positions = np.flatnonzero(keys != "")
+        keys = keys[positions]
+        first = ~pd.Index(keys).duplicated()
+        self._keys = pd.Index(keys[first])
+        self._positions = positions[first]
+
+    @classmethod
+    def for_frame(cls, df_link: pd.DataFrame) -> "LinkIndex":
+        """The index of df_link, built on first use and reused while df_link is alive."""
+        cached = cls._cache
+        if cached is not None and cached[0]() is df_link:
+            return cached[1]
+        index = cls(df_link)
+        cls._cache = (weakref.ref(df_link), index)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, link_no: Any) -> bool:
+        return self.position(link_no) is not None
+
+    def position(self, link_no: Any) -> Optional[int]:
+        """Row position of link_no in the Link frame, or None."""
+        key = link_keys(pd.Series([link_no], dtype=object)).iloc[0]
+        loc = self._keys.get_indexer([key])[0] if key else -1
+        return None if loc < 0 else int(self._positions[loc])
+
+    def positions(self, link_nos: pd.Series) -> np.ndarray:
+        """Row position in the Link frame for each value, -1 when absent or empty."""
+        found = self._keys.get_indexer(link_keys(link_nos))
+        positions = np.full(len(found), -1, dtype=np.intp)
+        hit = found >= 0
+        positions[hit] = self._positions[found[hit]]
+        return positions
+
+    def missing_rows(self, link_nos: pd.Series) -> Set[int]:
+        """Positions of the non-empty values that are not Link_Nos."""
+        keys = link_keys(link_nos)
+        absent = (keys != "").to_numpy() & (self._keys.get_indexer(keys) < 0)
+        return set(np.flatnonzero(absent).tolist())
+
+    def get(self, link_no: Any, column: str, default: Any = None) -> Any:
+        """Link attribute (e.g. Link_Length_Official) of one Link_No."""
+        pos = self.position(link_no)
+        if pos is None or column not in self.frame.columns:
+            return default
+        return self.frame[column].iloc[pos]
+
+    def lookup(self, link_nos: pd.Series, column: str) -> pd.Series:
+        """Link attribute for each value of link_nos (missing where there is no Link row)."""
+        values = self.frame[column].reset_index(drop=True).reindex(self.positions(link_nos))
+        values.index = link_nos.index
+        return values
+
+
+__all__ = [
+    "LinkIndex",
+    "link_keys",
+]
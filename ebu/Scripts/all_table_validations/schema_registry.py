@@ -0,0 +1,581 @@
+# schema_registry.py
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from all_table_validations.foreign_keys import ForeignKey
+from all_table_validations.type_checks import (
+    CheckResult,
+    empty_mask,
+    number_errors,
+    text_errors,
+    year_errors,
+    yes_no_errors,
+)
+
+
+# Field types a declaration may use:
+#   "Short Text" - optional "max_length" and "valid_values"
+#   "Number"     - optional "range": (min, max), either end None for open
+#   "Yes/No"     - booleans, 0/1, Yes/No, Y/N, True/False, On/Off
+#   "Year"       - a number from 1900 to the current year
+FIELD_TYPES = ("Short Text", "Number", "Yes/No", "Year")
+
+
+class TableSchema:
+    """
+    What a validated table declares: its required columns, the type rules
+    of its known fields (field name -> {"type": ..., options}), the
+    column tuples that must be unique and its references to parent tables
+    ((columns, parent table, parent columns)).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        required_columns: Sequence[str],
+        field_definitions: Optional[Dict[str, Dict[str, Any]]] = None,
+        keys: Sequence[Tuple[str, ...]] = (),
+        references: Sequence[Tuple[Tuple[str, ...], str, Tuple[str, ...]]] = (),
+    ):
+        self.name = name
+        self.required_columns: List[str] = list(required_columns)
+        self.field_definitions: Dict[str, Dict[str, Any]] = dict(field_definitions or {})
+        self.keys: List[Tuple[str, ...]] = [tuple(k) for k in keys]
+        self.references: List[ForeignKey] = [
+            ForeignKey(tuple(columns), parent, tuple(parent_columns)) for columns, parent, parent_columns in references
+        ]
+
+    def columns(self) -> List[str]:
+        """Every declared column, required ones first."""
+        declared = self.required_columns + list(self.field_definitions)
+        declared += [col for key in self.keys for col in key]
+        declared += [col for reference in self.references for col in reference.columns]
+        return list(dict.fromkeys(declared))
+
+    def __repr__(self) -> str:
+        return f"TableSchema({self.name!r})"
+
+
+# Table name -> declaration; filled by register_table below
+TABLE_SCHEMAS: Dict[str, TableSchema] = {}
+
+
+def register_table(name: str, required_columns: Sequence[str],
+                   field_definitions: Optional[Dict[str, Dict[str, Any]]] = None,
+                   keys: Sequence[Tuple[str, ...]] = (),
+                   references: Sequence[Tuple[Tuple[str, ...], str, Tuple[str, ...]]] = ()) -> TableSchema:
+    """Declare (or redeclare) a table; compiled plans are dropped."""
+    schema = TableSchema(name, required_columns, field_definitions, keys, references)
+    TABLE_SCHEMAS[name] = schema
+    checker_plan.cache_clear()
+    return schema
+
+
+def get_schema(name: str) -> TableSchema:
+    try:
+        return TABLE_SCHEMAS[name]
+    except KeyError:
+        raise KeyError(f"No schema registered for table {name}") from None
+
+
+# A compiled field check: (series, non-empty mask, current year) -> CheckResult
+FieldCheck = Callable[[pd.Series, np.ndarray, int], CheckResult]
+
+# A column's failures: (row positions, rule id, message template, template params per position)
+Failure = Tuple[np.ndarray, str, str, Optional[Dict[str, Sequence[Any]]]]
+
+
+def _compile_field(field_name: str, field_def: Dict[str, Any]) -> FieldCheck:
+    ftype = field_def.get("type")
+    if ftype == "Short Text":
+        max_length = field_def.get("max_length")
+        valid_values = field_def.get("valid_values")
+        return lambda series, check, year: text_errors(series, check, max_length, valid_values)
+    if ftype == "Number":
+        rng = field_def.get("range")
+        if rng is None:
+            min_v = max_v = None
+        elif isinstance(rng, tuple) and len(rng) == 2:
+            min_v, max_v = rng
+        else:
+            raise ValueError(f"{field_name}: range must be a (min, max) tuple")
+        return lambda series, check, year: number_errors(series, check, min_v, max_v)
+    if ftype == "Yes/No":
+        return lambda series, check, year: yes_no_errors(series, check)
+    if ftype == "Year":
+        return lambda series, check, year: year_errors(series, check, year)
+    raise ValueError(f"{field_name}: unknown field type {ftype!r}")
+
+
+class CheckerPlan:
+    """
+    A TableSchema compiled into one column-wise check per declared field.
+    Build it through checker_plan(), which keeps one plan per table per
+    process.
+    """
+
+    def __init__(self, schema: TableSchema):
+        self.schema = schema
+        self.required_columns = list(schema.required_columns)
+        self.field_checks: List[Tuple[str, str, FieldCheck]] = [
+            (field_name, f"{field_name}: ", _compile_field(field_name, field_def))
+            for field_name, field_def in schema.field_definitions.items()
+        ]
+
+    def missing_columns(self, df: pd.DataFrame) -> List[str]:
+        return [col for col in self.required_columns if col not in df.columns]
+
+    def failures(self, df: pd.DataFrame, check_required: bool = True) -> Iterator[Failure]:
+        """
+        The required-column and data type failures, one (positions, rule,
+        message template, params) per column: "required" with "<col> is
+        required" per required column, then "field" with "<field>: <message>"
+        per field. Messages are rendered from the template by ErrorReport.
+        """
+        empty: Dict[str, np.ndarray] = {}
+
+        def empty_of(col: str) -> np.ndarray:
+            if col not in empty:
+                empty[col] = empty_mask(df[col])
+            return empty[col]
+
+        if check_required:
+            for col in self.required_columns:
+                if col in df.columns:
+                    positions = np.flatnonzero(empty_of(col))
+                    if len(positions):
+                        yield positions, "required", f"{col} is required", None
+
+        # Read the clock once per run, not per value
+        current_year = datetime.now().year
+        for field_name, prefix, check in self.field_checks:
+            if field_name not in df.columns:
+                continue
+            not_empty = ~empty_of(field_name)
+            if not not_empty.any():
+                continue
+            positions, texts = check(df[field_name], not_empty, current_year)
+            if len(positions):
+                yield positions, "field", prefix + "{text}", {"text": texts}
+
+    def row_messages(self, df: pd.DataFrame, check_required: bool = True) -> Dict[Any, List[str]]:
+        """
+        The required-column and data type messages of every row with at least
+        one, keyed by index label in row order. Each row lists "<col> is
+        required" per required column, then "<field>: <message>" per field.
+        """
+        messages: Dict[int, List[str]] = {}
+        for positions, _, template, params in self.failures(df, check_required):
+            texts = [template.format(text=text) for text in params["text"]] if params else [template] * len(positions)
+            for pos, text in zip(positions, texts):
+                messages.setdefault(pos, []).append(text)
+
+        labels = df.index
+        return {labels[pos]: messages[pos] for pos in sorted(messages)}
+
+
+@lru_cache(maxsize=None)
+def checker_plan(table_name: str) -> CheckerPlan:
+    """The compiled plan for a registered table, built once per process."""
+    return CheckerPlan(get_schema(table_name))
+
+
+# ---------------------------------------------------------------------------
+# Table declarations
+# ---------------------------------------------------------------------------
+
+register_table(
+    "Link",
+    required_columns=[
+        "Province_Code",
+        "Kabupaten_Code",
+        "Link_No",
+        "Link_Code",
+        "Link_Name",
+        "Link_Length_Official",
+        "Link_Length_Actual",
+    ],
+    keys=[("Link_No",), ("Link_Code",)],
+)
+
+register_table(
+    "Alignment",
+    required_columns=[
+        "Link_No",  # main check
+    ],
+    field_definitions={
+        "Province_Code": {"type": "Short Text"},
+        "Kabupaten_Code": {"type": "Short Text"},
+        "Link_No": {"type": "Short Text"},
+        "Chainage": {"type": "Number", "numeric": True},
+        "Chainage_RB": {"type": "Number", "numeric": True},
+        "GPSPoint_North_Deg": {"type": "Number", "numeric": True},
+        "GPSPoint_North_Min": {"type": "Number", "numeric": True},
+        "GPSPoint_North_Sec": {"type": "Number", "numeric": True},
+        "GPSPoint_East_Deg": {"type": "Number", "numeric": True},
+        "GPSPoint_East_Min": {"type": "Number", "numeric": True},
+        "GPSPoint_East_Sec": {"type": "Number", "numeric": True},
+        # "Section_WKT_LineString": {"type": "Short Text"},
+        "East": {"type": "Number", "numeric": True},
+        "North": {"type": "Number", "numeric": True},
+        "Hemis_NS": {"type": "Short Text"},
+    },
+)
+
+register_table(
+    "RoadCondition",
+    required_columns=[
+        "Year",
+        "Province_Code",
+        "Kabupaten_Code",
+        "Link_No",
+        "ChainageFrom",
+        "ChainageTo",
+    ],
+    field_definitions={
+        "Year": {"type": "Number", "range": (0, float("inf"))},
+        "Province_Code": {"type": "Short Text"},
+        "Kabupaten_Code": {"type": "Short Text"},
+        "Link_No": {"type": "Short Text"},
+        "ChainageFrom": {"type": "Number"},
+        "ChainageTo": {"type": "Number"},
+        "DRP_From": {"type": "Number"},
+        "Offset_From": {"type": "Number"},
+        "DRP_To": {"type": "Number"},
+        "Offset_To": {"type": "Number"},
+        "Roughness": {"type": "Yes/No"},
+        "Bleeding_area": {"type": "Number"},
+        "Ravelling_area": {"type": "Number"},
+        "Desintegration_area": {"type": "Number"},
+        "CrackDep_area": {"type": "Number"},
+        "Patching_area": {"type": "Number"},
+        "OthCrack_area": {"type": "Number"},
+        "Pothole_area": {"type": "Number"},
+        "Rutting_area": {"type": "Number"},
+        "EdgeDamage_area": {"type": "Number"},
+        "Crossfall_area": {"type": "Number"},
+        "Depressions_area": {"type": "Number"},
+        "Erosion_area": {"type": "Number"},
+        "Waviness_area": {"type": "Number"},
+    },
+    keys=[("Link_No", "ChainageFrom", "Year")],
+)
+
+register_table(
+    "RoadInventory",
+    required_columns=[
+        "Province_Code",
+        "Kabupaten_Code",
+        "Link_No",
+        "ChainageFrom",
+        "ChainageTo",
+    ],
+    field_definitions={
+        "Province_Code": {"type": "Short Text"},
+        "Kabupaten_Code": {"type": "Short Text"},
+        "Link_No": {"type": "Short Text"},
+        "ChainageFrom": {"type": "Number"},
+        "ChainageTo": {"type": "Number"},
+        "DRP_From": {"type": "Number"},
+        "Offset_From": {"type": "Number"},
+        "DRP_To": {"type": "Number"},
+        "Offset_To": {"type": "Number"},
+        "Pave_Width": {"type": "Number"},
+        "RoW": {"type": "Number"},
+        "Pave_Type": {"type": "Short Text"},
+        "Should_Width_L": {"type": "Number"},
+        "Should_Width_R": {"type": "Number"},
+        "Should_Type_L": {"type": "Short Text"},
+        "Should_Type_R": {"type": "Short Text"},
+        "Drain_Type_L": {"type": "Short Text"},
+        "Drain_Type_R": {"type": "Short Text"},
+        "Terrain": {"type": "Short Text"},
+        "Land_Use_L": {"type": "Short Text"},
+        "Land_Use_R": {"type": "Short Text"},
+        "Impassable": {"type": "Yes/No"},
+        "ImpassableReason": {"type": "Short Text"},
+    },
+)
+
+register_table(
+    "BridgeInventory",
+    required_columns=[
+        "Year",
+        "Province_Code",
+        "Kabupaten_Code",
+        "Link_No",
+        "Bridge_Number",
+    ],
+)
+
+register_table(
+    "CulvertCondition",
+    required_columns=[
+        "Year",
+        "Province_Code",
+        "Kabupaten_Code",
+        "Link_No",
+        "Culvert_Number",
+    ],
+    field_definitions={
+        "Year": {"type": "Number", "range": (0, float("inf"))},
+        "Province_Code": {"type": "Short Text"},
+        "Kabupaten_Code": {"type": "Short Text"},
+        "Link_No": {"type": "Short Text"},
+        "Culvert_Number": {"type": "Short Text"},
+        "Cond_Barrel": {"type": "Number", "range": (0, float("inf"))},
+        "Cond_Inlet": {"type": "Number", "range": (0, float("inf"))},
+        "Cond_Outlet": {"type": "Number", "range": (0, float("inf"))},
+        "Silting": {"type": "Number", "range": (0, float("inf"))},
+        "Overtopping": {"type": "Yes/No"},
+        "AnalysisBaseYear": {"type": "Yes/No"},
+        "SurveyBy": {"type": "Short Text"},
+    },
+    references=[(("Link_No", "Culvert_Number"), "CulvertInventory", ("Link_No", "Culvert_Number"))],
+)
+
+register_table(
+    "CulvertInventory",
+    required_columns=[
+        "Province_Code",
+        "Kabupaten_Code",
+        "Link_No",
+        "Culvert_Number",
+    ],
+    field_definitions={
+        "Province_Code": {"type": "Short Text"},
+        "Kabupaten_Code": {"type": "Short Text"},
+        "Link_No": {"type": "Short Text"},
+        "Culvert_Number": {"type": "Short Text"},
+        "Chainage": {"type": "Number", "range": (0, float("inf"))},
+        "DRP_From": {"type": "Number", "range": (0, float("inf"))},
+        "Offset_From": {"type": "Number", "range": (0, float("inf"))},
+        "Culvert_Length": {"type": "Number", "range": (0, float("inf"))},
+        "Culvert_Type": {"type": "Short Text"},
+        "Number_Opening": {"type": "Number", "range": (0, float("inf"))},
+        "Culvert_Width": {"type": "Number", "range": (0, float("inf"))},
+        "Culvert_Heigth": {"type": "Number", "range": (0, float("inf"))},
+        "Inlet_Type": {"type": "Short Text"},
+        "Outlet_Type": {"type": "Short Text"},
+    },
+    keys=[("Link_No", "Culvert_Number")],
+)
+
+register_table(
+    "RetainingWallCondition",
+    required_columns=[
+        "Year",
+        "Province_Code",
+        "Kabupaten_Code",
+        "Link_No",
+        "Wall_Number",
+    ],
+    field_definitions={
+        "Year": {"type": "Number", "range": (1900, 2100)},
+        "Province_Code": {"type": "Short Text"},
+        "Kabupaten_Code": {"type": "Short Text"},
+        "Link_No": {"type": "Short Text"},
+        "Wall_Number": {"type": "Short Text"},
+        "Wall_Mortar_m2": {"type": "Number", "range": (0, float("inf"))},
+        "Wall_Repair_m3": {"type": "Number", "range": (0, float("inf"))},
+        "Wall_Rebuild_m": {"type": "Number", "range": (0, float("inf"))},
+        "AnalysisBaseYear": {"type": "Yes/No"},
+        "SurveyBy": {"type": "Short Text"},
+    },
+    references=[(("Link_No", "Wall_Number"), "RetainingWallInventory", ("Link_No", "Wall_Number"))],
+)
+
+register_table(
+    "RetainingWallInventory",
+    required_columns=[
+        "Province_Code",
+        "Kabupaten_Code",
+        "Link_No",
+        "Wall_Side",
+        "ChainageFrom",
+    ],
+    field_definitions={
+        "Province_Code": {"type": "Short Text"},
+        "Kabupaten_Code": {"type": "Short Text"},
+        "Link_No": {"type": "Short Text"},
+        "Wall_Number": {"type": "Short Text"},
+        "Wall_Side": {"type": "Short Text"},
+        "ChainageFrom": {"type": "Number", "range": (0, float("inf"))},
+        "DRP_From": {"type": "Number", "range": (0, float("inf"))},
+        "Offset_From": {"type": "Number", "range": (0, float("inf"))},
+        "Length": {"type": "Number", "range": (0, float("inf"))},
+        "Wall_Material": {"type": "Short Text"},
+        "Wall_Height": {"type": "Number", "range": (0, float("inf"))},
+        "Wall_Type": {"type": "Short Text"},
+    },
+)
+
+register_table(
+    "TrafficVolume",
+    required_columns=[
+        "Year",
+        "Province_Code",
+        "Kabupaten_Code",
+        "Link_No",
+    ],
+    field_definitions={
+        "Year": {"type": "Year"},
+        "Province_Code": {"type": "Short Text"},
+        "Kabupaten_Code": {"type": "Short Text"},
+        "Link_No": {"type": "Short Text"},
+        "MarketDay": {"type": "Yes/No"},
+        "TrafficCount": {"type": "Short Text"},
+        "JourneyTime": {"type": "Number", "range": (0, float("inf"))},
+        "AADT_MC": {"type": "Number", "range": (0, float("inf"))},
+        "AADT_Car": {"type": "Number", "range": (0, float("inf"))},
+        "AADT_Pickup": {"type": "Number", "range": (0, float("inf"))},
+        "AADT_MicroTruck": {"type": "Number", "range": (0, float("inf"))},
+        "AADT_Small_Bus": {"type": "Number", "range": (0, float("inf"))},
+        "AADT_Large_Bus": {"type": "Number", "range": (0, float("inf"))},
+        "AADT_Small_Truck": {"type": "Number", "range": (0, float("inf"))},
+        "AADT_Medium_Truck": {"type": "Number", "range": (0, float("inf"))},
+        "AADT_Large_Truck": {"type": "Number", "range": (0, float("inf"))},
+        "AADT_Truck_Trailer": {"type": "Number", "range": (0, float("inf"))},
+        "AADT_Semi_Trailer": {"type": "Number", "range": (0, float("inf"))},
+        "AnalysisBaseYear": {"type": "Yes/No"},
+        "SurveyBy": {"type": "Short Text"},
+    },
+    keys=[("Link_No", "Year")],
+)
+
+register_table(
+    "CODE_AN_UnitCostsPER",
+    required_columns=[
+        "Province_Code",
+        "Kabupaten_Code",
+        "Overlay_thick",
+    ],
+    field_definitions={
+        "Province_Code": {"type": "Short Text"},
+        "Kabupaten_Code": {"type": "Short Text"},
+        "Overlay_thick": {"type": "Number", "range": (0, float("inf"))},
+        "Per_unitcost": {"type": "Number", "range": (0, float("inf"))},
+    },
+    keys=[("Province_Code", "Kabupaten_Code", "Overlay_thick")],
+)
+
+register_table(
+    "CODE_AN_UnitCostsPERUnpaved",
+    required_columns=[
+        "Province_Code",
+        "Kabupaten_Code",
+    ],
+    field_definitions={
+        "Province_Code": {"type": "Short Text"},
+        "Kabupaten_Code": {"type": "Short Text"},
+        "Reg_UnitCost": {"type": "Number", "range": (0, float("inf"))},
+        "Res_UnitCost": {"type": "Number", "range": (0, float("inf"))},
+    },
+    keys=[("Province_Code", "Kabupaten_Code")],
+)
+
+register_table(
+    "CODE_AN_UnitCostsREH",
+    required_columns=[
+        "Province_Code",
+        "Kabupaten_Code",
+    ],
+    field_definitions={
+        "Province_Code": {"type": "Short Text"},
+        "Kabupaten_Code": {"type": "Short Text"},
+        "Reh_UnitCost": {"type": "Number", "range": (0, float("inf"))},
+    },
+    keys=[("Province_Code", "Kabupaten_Code")],
+)
+
+register_table(
+    "CODE_AN_UnitCostsRIGID",
+    required_columns=[
+        "Province_Code",
+        "Kabupaten_Code",
+        "CODE",
+    ],
+    field_definitions={
+        "Province_Code": {"type": "Short Text"},
+        "Kabupaten_Code": {"type": "Short Text"},
+        "CODE": {"type": "Short Text"},
+        "PerUnitCost": {"type": "Number", "range": (0, float("inf"))},
+        "RehUnitCost": {"type": "Number", "range": (0, float("inf"))},
+    },
+    keys=[("Province_Code", "Kabupaten_Code", "CODE")],
+)
+
+register_table(
+    "CODE_AN_UnitCostsRM",
+    required_columns=[
+        "Province_Code",
+        "Kabupaten_Code",
+        "RM_activity",
+        "Terrain",
+    ],
+    field_definitions={
+        "Province_Code": {"type": "Short Text"},
+        "Kabupaten_Code": {"type": "Short Text"},
+        "RM_activity": {"type": "Short Text"},
+        "Terrain": {"type": "Short Text"},
+        "Unit": {"type": "Short Text"},
+        "RM_NetworkElement": {"type": "Short Text"},
+        "RM_Category": {"type": "Short Text"},
+        "RM_Priority": {"type": "Number", "range": (0, float("inf"))},
+        "RM_Quantity": {"type": "Number", "range": (0, float("inf"))},
+        "RM_Unitcost": {"type": "Number", "range": (0, float("inf"))},
+        "RM_OnOff": {"type": "Short Text"},
+        "RM_ReportCategory": {"type": "Short Text"},
+    },
+    keys=[("Province_Code", "Kabupaten_Code", "RM_activity", "Terrain")],
+)
+
+register_table(
+    "CODE_AN_UnitCostsUPGUnpaved",
+    required_columns=[
+        "Province_Code",
+        "Kabupaten_Code",
+        "Pave_width1",
+    ],
+    field_definitions={
+        "Province_Code": {"type": "Short Text"},
+        "Kabupaten_Code": {"type": "Short Text"},
+        "Pave_width1": {"type": "Number", "range": (0, float("inf"))},
+        "Upg_UnitCost": {"type": "Number", "range": (0, float("inf"))},
+    },
+    keys=[("Province_Code", "Kabupaten_Code", "Pave_width1")],
+)
+
+register_table(
+    "CODE_AN_UnitCostsWidening",
+    required_columns=[
+        "Province_Code",
+        "Kabupaten_Code",
+        "CUMESA1",
+        "CUMESA2",
+    ],
+    field_definitions={
+        "Province_Code": {"type": "Short Text"},
+        "Kabupaten_Code": {"type": "Short Text"},
+        "CUMESA1": {"type": "Number", "range": (0, float("inf"))},
+        "CUMESA2": {"type": "Number", "range": (0, float("inf"))},
+        "WideningSealed_Unitcost": {"type": "Number", "range": (0, float("inf"))},
+        "WideningUnsealed_Unitcost": {"type": "Number", "range": (0, float("inf"))},
+    },
+    keys=[("Province_Code", "Kabupaten_Code", "CUMESA1", "CUMESA2")],
+)
+
+
+__all__ = [
+    "FIELD_TYPES",
+    "TableSchema",
+    "TABLE_SCHEMAS",
+    "register_table",
+    "get_schema",
+    "CheckerPlan",
+    "checker_plan",
+]
@@ -0,0 +1,191 @@
+# type_checks.py
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Text accepted by Yes/No fields, compared after strip().lower()
+YES_NO_STRINGS = ["yes", "no", "y", "n", "true", "false", "1", "0", "on", "off"]
+
+YEAR_MESSAGE = "Enter a valid year"
+
+# First year a "Year" field accepts; the last is the current year
+MIN_YEAR = 1900
+
+# Result of a column check: positions of the failing cells and their messages
+CheckResult = Tuple[np.ndarray, List[str]]
+
+
+def _kind(series: pd.Series) -> str:
+    """How iterrows would hand out the values: bool, number, string or anything else."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.BooleanDtype) or dtype.kind == "b":
+        return "bool"
+    if isinstance(dtype, pd.StringDtype):
+        return "string"
+    if dtype.kind in "iuf" or (isinstance(dtype, pd.api.extensions.ExtensionDtype)
+                               and pd.api.types.is_numeric_dtype(dtype)):
+        return "number"
+    if dtype == object and pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty"):
+        return "string"
+    return "object"
+
+
+def _result(messages: dict) -> CheckResult:
+    positions = np.array(sorted(messages), dtype=np.intp)
+    return positions, [messages[pos] for pos in positions]
+
+
+def is_empty(value: Any) -> bool:
+    """Scalar form of empty_mask."""
+    if value is None:
+        return True
+    if isinstance(value, str) and value.strip() == "":
+        return True
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def normalize_str(value: Any) -> str:
+    if is_empty(value):
+        return ""
+    return str(value).strip()
+
+
+def empty_mask(series: pd.Series) -> np.ndarray:
+    """Missing values and text that is only whitespace."""
+    empty = series.isna().to_numpy(dtype=bool)
+    kind = _kind(series)
+    if kind == "string":
+        return empty | (series.str.strip() == "").fillna(False).to_numpy(dtype=bool)
+    if kind == "object":
+        values = series.array
+        for pos in np.flatnonzero(~empty):
+            if isinstance(values[pos], str) and values[pos].strip() == "":
+                empty[pos] = True
+    return empty
+
+
+def _as_float(series: pd.Series, kind: str, check: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    float(value) for the cells in check: the parsed numbers and a mask of the
+    cells float() rejects. to_numeric does the bulk; the few cells it cannot
+    parse are retried with float(), which also accepts "nan", "1_000", etc.
+    """
+    if kind in ("bool", "number"):
+        return series.to_numpy(dtype="float64", na_value=np.nan), np.zeros(len(series), dtype=bool)
+    numbers = pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    failed = np.zeros(len(series), dtype=bool)
+    values = series.array
+    for pos in np.flatnonzero(check & np.isnan(numbers)):
+        try:
+            numbers[pos] = float(values[pos])
+        except (TypeError, ValueError):
+            failed[pos] = True
+    return numbers, failed
+
+
+def float_values(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """float(value) of every non-missing cell (NaN for missing ones) and a mask of the cells float() rejects."""
+    return _as_float(series, _kind(series), series.notna().to_numpy())
+
+
+def text_errors(series: pd.Series, check: np.ndarray, max_length: Optional[int] = None,
+                valid_values: Optional[Sequence[str]] = None) -> CheckResult:
+    """Short Text: str, int or float values; optional length limit and allowed values."""
+    values = series.array
+    messages = {}
+    if _kind(series) == "object":
+        for pos in np.flatnonzero(check):
+            if not isinstance(values[pos], (str, int, float)):
+                messages[pos] = f"Value must be text, got {type(values[pos]).__name__}"
+    if max_length is not None or valid_values is not None:
+        for pos in np.flatnonzero(check):
+            if pos in messages:
+                continue
+            text = str(values[pos]).strip()
+            if max_length is not None and len(text) > max_length:
+                messages[pos] = f"Text too long (max {max_length} characters)"
+            elif valid_values is not None and text not in valid_values:
+                messages[pos] = f"Invalid value. Must be one of: {valid_values}"
+    return _result(messages)
+
+
+def number_errors(series: pd.Series, check: np.ndarray, min_v: Optional[float] = None,
+                  max_v: Optional[float] = None) -> CheckResult:
+    """Number: anything float() accepts, optionally within [min_v, max_v]."""
+    numbers, failed = _as_float(series, _kind(series), check)
+    failed &= check
+    values = series.array
+    messages = {pos: f"Value must be numeric, got {type(values[pos]).__name__}" for pos in np.flatnonzero(failed)}
+    if min_v is not None or max_v is not None:
+        ok = check & ~failed
+        out_of_range = np.zeros(len(series), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            if min_v is not None:
+                out_of_range |= ok & (numbers < min_v)
+            if max_v is not None:
+                out_of_range |= ok & (numbers > max_v)
+        message = f"Value must be between {min_v} and {max_v}"
+        messages.update((pos, message) for pos in np.flatnonzero(out_of_range))
+    return _result(messages)
+
+
+def year_errors(series: pd.Series, check: np.ndarray, current_year: int) -> CheckResult:
+    """Year: a number from MIN_YEAR to current_year."""
+    numbers, failed = _as_float(series, _kind(series), check)
+    with np.errstate(invalid="ignore"):
+        bad = check & (failed | (numbers < MIN_YEAR) | (numbers > current_year))
+    positions = np.flatnonzero(bad)
+    return positions, [YEAR_MESSAGE] * len(positions)
+
+
+def _yes_no_ok(value: Any) -> bool:
+    if isinstance(value, (bool, np.bool_)):
+        return True
+    if isinstance(value, str):
+        return value.strip().lower() in YES_NO_STRINGS
+    try:
+        return value in (0, 1)
+    except (TypeError, ValueError):
+        return False
+
+
+def yes_no_errors(series: pd.Series, check: np.ndarray) -> CheckResult:
+    """Yes/No: booleans, 0/1 and the YES_NO_STRINGS spellings in any case."""
+    kind = _kind(series)
+    if kind == "bool":
+        bad = np.zeros(len(series), dtype=bool)
+    elif kind == "number":
+        numbers = series.to_numpy(dtype="float64", na_value=np.nan)
+        bad = check & ~((numbers == 0) | (numbers == 1))
+    elif kind == "string":
+        lowered = series.astype(object).where(check, "").str.strip().str.lower()
+        bad = check & ~lowered.isin(YES_NO_STRINGS).to_numpy(dtype=bool)
+    else:
+        values = series.array
+        bad = np.zeros(len(series), dtype=bool)
+        for pos in np.flatnonzero(check):
+            bad[pos] = not _yes_no_ok(values[pos])
+    positions = np.flatnonzero(bad)
+    # Python scalars, formatted as the row loops would show them
+    shown = series.iloc[positions].tolist()
+    return positions, [f"Value must be Yes/No, True/False, or 0/1, got {v}" for v in shown]
+
+
+__all__ = [
+    "YES_NO_STRINGS",
+    "YEAR_MESSAGE",
+    "MIN_YEAR",
+    "is_empty",
+    "normalize_str",
+    "empty_mask",
+    "float_values",
+    "text_errors",
+    "number_errors",
+    "year_errors",
+    "yes_no_errors",
+]
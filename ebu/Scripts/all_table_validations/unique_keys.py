@@ -0,0 +1,80 @@
+# unique_keys.py
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Key columns -> row positions per duplicated key value, as duplicate_key_groups returns them
+DuplicateGroups = Dict[Tuple[str, ...], List[List[int]]]
+
+
+def duplicate_key_groups(df: pd.DataFrame, key: Sequence[str]) -> Optional[List[List[int]]]:
+    """
+    Row positions that share their (non-null) key values with at least one
+    other row, one list per key value, in sorted key order and row order
+    within a key (like SqlRuleEngine.duplicate_key_rows). None when a key
+    column is missing.
+
+    Detection is one hash pass (duplicated(keep=False)); only the duplicated
+    rows are sorted into groups.
+    """
+    cols = list(key)
+    if any(col not in df.columns for col in cols):
+        return None
+    keyed = df[cols]
+    duplicated = keyed.duplicated(keep=False).to_numpy() & keyed.notna().all(axis=1).to_numpy()
+    positions = np.flatnonzero(duplicated)
+    if not len(positions):
+        return []
+
+    members = keyed.iloc[positions]
+    try:
+        group_no = members.groupby(cols, sort=True).ngroup().to_numpy()
+    except TypeError:
+        # Mixed value types in a key column cannot be sorted; keep first-seen order
+        group_no = members.groupby(cols, sort=False).ngroup().to_numpy()
+    order = np.argsort(group_no, kind="stable")
+    bounds = np.flatnonzero(np.diff(group_no[order])) + 1
+    return [group.tolist() for group in np.split(positions[order], bounds)]
+
+
+def describe_key(key: Sequence[str], values: Sequence[Any]) -> str:
+    """Message for one duplicated key value, e.g. "Duplicate Link_Code 'A1' - Link_Code must be unique"."""
+    if len(key) == 1:
+        return f"Duplicate {key[0]} '{values[0]}' - {key[0]} must be unique"
+    pairs = [f"{col} '{value}'" for col, value in zip(key, values)]
+    pairs = ", ".join(pairs[:-1]) + " and " + pairs[-1]
+    return f"Duplicate record for {pairs} - the combination of {', '.join(key)} must be unique"
+
+
+def duplicate_key_messages(df: pd.DataFrame, keys: Sequence[Tuple[str, ...]],
+                           duplicate_groups: Optional[DuplicateGroups] = None) -> Dict[Any, List[str]]:
+    """
+    {index label: [messages]} for the rows that break one of the declared
+    uniqueness keys. duplicate_groups holds groups already found by the SQL
+    rule engine; keys missing from it are checked here.
+    """
+    messages: Dict[Any, List[str]] = {}
+    for key in keys:
+        key = tuple(key)
+        groups = (duplicate_groups or {}).get(key)
+        if groups is None:
+            groups = duplicate_key_groups(df, key)
+        if not groups:
+            continue
+        # As objects, so nullable integer columns holding NA keep their integers (no 2023.0)
+        columns = [df[col].astype(object).to_numpy() for col in key]
+        for group in groups:
+            message = describe_key(key, [values[group[0]] for values in columns])
+            for pos in group:
+                messages.setdefault(df.index[pos], []).append(message)
+    return messages
+
+
+__all__ = [
+    "DuplicateGroups",
+    "duplicate_key_groups",
+    "describe_key",
+    "duplicate_key_messages",
+]
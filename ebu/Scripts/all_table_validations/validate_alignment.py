@@ -3,29 +3,18 @@ import pandas as pd
 import numpy as np
 import re
 
-# Required columns for Alignment table
-required_columns = [
-    "Link_No"  # main check
-]
+from all_table_validations.error_report import ErrorReport
+from all_table_validations.geo import gps_point_errors
+from all_table_validations.link_index import LinkIndex
+from all_table_validations.schema_registry import checker_plan, get_schema
+from all_table_validations.type_checks import float_values
+
+
+# Declared in schema_registry, which also compiles their checks
+SCHEMA = get_schema("Alignment")
+required_columns = SCHEMA.required_columns
+field_definitions = SCHEMA.field_definitions
 
-# Field definitions with data types
-field_definitions = {
-    "Province_Code": {"type": "Short Text"},
-    "Kabupaten_Code": {"type": "Short Text"},
-    "Link_No": {"type": "Short Text"},
-    "Chainage": {"type": "Number", "numeric": True},
-    "Chainage_RB": {"type": "Number", "numeric": True},
-    "GPSPoint_North_Deg": {"type": "Number", "numeric": True},
-    "GPSPoint_North_Min": {"type": "Number", "numeric": True},
-    "GPSPoint_North_Sec": {"type": "Number", "numeric": True},
-    "GPSPoint_East_Deg": {"type": "Number", "numeric": True},
-    "GPSPoint_East_Min": {"type": "Number", "numeric": True},
-    "GPSPoint_East_Sec": {"type": "Number", "numeric": True},
-    # "Section_WKT_LineString": {"type": "Short Text"},
-    "East": {"type": "Number", "numeric": True},
-    "North": {"type": "Number", "numeric": True},
-    "Hemis_NS": {"type": "Short Text"}
-}
 
 def normalize_number_for_comparison(value):
     """
@@ -52,6 +41,33 @@ def first_two_digits(value):
         return ""
     return base[:2]
 
+def last_chainage_per_link(df_alignment, link_df, link_column):
+    """
+    Last (largest) Chainage_RB of each Link_No in one groupby, the first row
+    holding it (idxmax) and the link's link_column value from the Link table.
+    Links without a Chainage_RB, with an empty Link_No or missing from the
+    Link table are left out.
+    """
+    columns = ["max_chainage", "row_index", link_column]
+    if "Link_No" not in df_alignment.columns or "Chainage_RB" not in df_alignment.columns:
+        return pd.DataFrame(columns=columns)
+    if link_column not in link_df.columns:
+        return pd.DataFrame(columns=columns)
+
+    chainage = pd.to_numeric(df_alignment["Chainage_RB"], errors="coerce")
+    has_chainage = chainage.notna() & df_alignment["Link_No"].notna()
+    grouped = chainage[has_chainage].groupby(df_alignment["Link_No"][has_chainage])
+    per_link = pd.DataFrame({"max_chainage": grouped.max(), "row_index": grouped.idxmax()})
+    per_link = per_link[per_link.index != ""]
+
+    # Joined to the Link table through its hash index (first row per Link_No)
+    link_nos = pd.Series(per_link.index, index=per_link.index)
+    positions = LinkIndex.for_frame(link_df).positions(link_nos)
+    per_link = per_link[positions >= 0]
+    per_link[link_column] = link_df[link_column].to_numpy()[positions[positions >= 0]]
+    return per_link
+
+
 def validate_link_length_consistency(df_alignment, link_df):
     """
     Validate that the last Chainage_RB value for each Link_No in alignment
@@ -59,43 +75,25 @@ def validate_link_length_consistency(df_alignment, link_df):
     Decimals are ignored. Trailing zeros do not affect the comparison.
     """
     errors = []
+    per_link = last_chainage_per_link(df_alignment, link_df, "Link_Length_Actual")
     
-    if "Link_No" in df_alignment.columns and "Chainage_RB" in df_alignment.columns:
-        alignment_max_chainage = df_alignment.groupby("Link_No")["Chainage_RB"].max()
+    for link_no, max_chainage, row_idx, link_length_actual in per_link.itertuples():
+        chainage_prefix = first_two_digits(max_chainage)
+        length_prefix = first_two_digits(link_length_actual)
         
-        for link_no, max_chainage in alignment_max_chainage.items():
-            if pd.isna(link_no) or link_no == "":
-                continue
-            
-            link_row = link_df[link_df["Link_No"].astype(str) == str(link_no)]
-            if link_row.empty:
-                continue
-            
-            link_length_actual = link_row.iloc[0]["Link_Length_Actual"]
-            
-            chainage_prefix = first_two_digits(max_chainage)
-            length_prefix = first_two_digits(link_length_actual)
-            
-            if chainage_prefix and length_prefix and chainage_prefix != length_prefix:
-                max_chainage_row = df_alignment[
-                    (df_alignment["Link_No"].astype(str) == str(link_no)) &
-                    (df_alignment["Chainage_RB"] == max_chainage)
-                ]
-                
-                if not max_chainage_row.empty:
-                    row_idx = max_chainage_row.index[0]
-                    error_msg = (
-                        f"First two digits of last Chainage_RB ({max_chainage}) "
-                        f"do not match first two digits of Link_Length_Actual ({link_length_actual}) "
-                        f"for Link_No {link_no}"
-                    )
-                    errors.append({
-                        "row_index": row_idx,
-                        "error": error_msg,
-                        "link_no": link_no,
-                        "chainage_rb": max_chainage,
-                        "link_length_actual": link_length_actual
-                    })
+        if chainage_prefix and length_prefix and chainage_prefix != length_prefix:
+            error_msg = (
+                f"First two digits of last Chainage_RB ({max_chainage}) "
+                f"do not match first two digits of Link_Length_Actual ({link_length_actual}) "
+                f"for Link_No {link_no}"
+            )
+            errors.append({
+                "row_index": row_idx,
+                "error": error_msg,
+                "link_no": link_no,
+                "chainage_rb": max_chainage,
+                "link_length_actual": link_length_actual
+            })
     
     return errors
 
@@ -106,193 +104,119 @@ def validate_link_length_official_consistency(df_alignment, link_df):
     Chainage_RB is in meters, Link_Length_Official is in km, so we convert km to meters for comparison.
     """
     errors = []
+    per_link = last_chainage_per_link(df_alignment, link_df, "Link_Length_Official")
     
-    if "Link_No" in df_alignment.columns and "Chainage_RB" in df_alignment.columns:
-        alignment_max_chainage = df_alignment.groupby("Link_No")["Chainage_RB"].max()
-        
-        for link_no, max_chainage in alignment_max_chainage.items():
-            if pd.isna(link_no) or link_no == "":
-                continue
-            
-            link_row = link_df[link_df["Link_No"].astype(str) == str(link_no)]
-            if link_row.empty:
-                continue
-            
-            # Check if Link_Length_Official column exists
-            if "Link_Length_Official" not in link_row.columns:
-                continue
-                
-            link_length_official = link_row.iloc[0]["Link_Length_Official"]
-            
-            # Skip if Link_Length_Official is null or empty
-            if pd.isna(link_length_official) or link_length_official == "":
-                continue
-            
-            try:
-                # Convert Link_Length_Official from km to meters for comparison
-                link_length_official_meters = float(link_length_official) * 1000
-                
-                # Skip validation for links 1.5 km or shorter
-                if link_length_official <= 1.5:
-                    continue
-                
-                max_chainage_meters = float(max_chainage)
-                
-                # Compare with tolerance for floating point precision
-                # Allow for close matches - use 1500 meters tolerance
-                tolerance = 1500.0  # 1500 meters tolerance
-                if abs(max_chainage_meters - link_length_official_meters) > tolerance:
-                    max_chainage_row = df_alignment[
-                        (df_alignment["Link_No"].astype(str) == str(link_no)) &
-                        (df_alignment["Chainage_RB"] == max_chainage)
-                    ]
-                    
-                    if not max_chainage_row.empty:
-                        row_idx = max_chainage_row.index[0]
-                        error_msg = (
-                            f"Last Chainage_RB ({max_chainage} m) does not match "
-                            f"Link_Length_Official ({link_length_official} km = {link_length_official_meters:.0f} m) "
-                            f"within tolerance of {tolerance:.1f} m for Link_No {link_no}"
-                        )
-                        errors.append({
-                            "row_index": row_idx,
-                            "error": error_msg,
-                            "link_no": link_no,
-                            "chainage_rb": max_chainage,
-                            "link_length_official": link_length_official,
-                            "link_length_official_meters": link_length_official_meters
-                        })
-            except (ValueError, TypeError):
-                # Skip if conversion fails
-                continue
+    # Convert Link_Length_Official from km to meters for comparison
+    official = pd.to_numeric(per_link["Link_Length_Official"], errors="coerce")
+    official_meters = official * 1000
+    
+    # Skip validation for links 1.5 km or shorter
+    # Allow for close matches - use 1500 meters tolerance
+    tolerance = 1500.0  # 1500 meters tolerance
+    mismatch = (official > 1.5) & ((per_link["max_chainage"] - official_meters).abs() > tolerance)
+    
+    for link_no, max_chainage, row_idx, link_length_official in per_link[mismatch.fillna(False)].itertuples():
+        link_length_official_meters = official_meters[link_no]
+        error_msg = (
+            f"Last Chainage_RB ({max_chainage} m) does not match "
+            f"Link_Length_Official ({link_length_official} km = {link_length_official_meters:.0f} m) "
+            f"within tolerance of {tolerance:.1f} m for Link_No {link_no}"
+        )
+        errors.append({
+            "row_index": row_idx,
+            "error": error_msg,
+            "link_no": link_no,
+            "chainage_rb": max_chainage,
+            "link_length_official": link_length_official,
+            "link_length_official_meters": link_length_official_meters
+        })
     
     return errors
 
-def validate_data_type(value, field_name, field_def):
+
+def dms_checks(df_alignment, columns):
     """
-    Validate data type for a specific field
+    Degree/minute/second columns of one coordinate, checked for the whole table:
+    a mask of the invalid rows (a value float() rejects, or some parts blank and
+    others not) and a mask of the rows whose values are all zero (a coordinate
+    left blank entirely counts as zero).
     """
-    if pd.isna(value) or value == "":
-        return True, ""  # Allow empty/null values
-    
-    field_type = field_def["type"]
-    
-    if field_type == "Short Text":
-        if not isinstance(value, (str, int, float)):
-            return False, f"Value must be text, got {type(value).__name__}"
-        
-        str_value = str(value).strip()
-        
-        if "max_length" in field_def and len(str_value) > field_def["max_length"]:
-            return False, f"Text too long (max {field_def['max_length']} characters)"
-        
-        if "valid_values" in field_def and str_value not in field_def["valid_values"]:
-            return False, f"Invalid value. Must be one of: {field_def['valid_values']}"
-        
-        return True, ""
-    
-    elif field_type == "Number":
-        try:
-            num_value = float(value)
-        except (ValueError, TypeError):
-            return False, f"Value must be numeric, got {type(value).__name__}"
-        
-        if "range" in field_def:
-            min_val, max_val = field_def["range"]
-            if num_value < min_val or num_value > max_val:
-                return False, f"Value must be between {min_val} and {max_val}"
-        
-        return True, ""
-    
-    return True, ""
+    invalid = np.zeros(len(df_alignment), dtype=bool)
+    all_zero = np.ones(len(df_alignment), dtype=bool)
+    blanks = np.zeros(len(df_alignment), dtype=int)
+    for col in columns:
+        values, failed = float_values(df_alignment[col])
+        missing = df_alignment[col].isna().to_numpy()
+        invalid |= failed
+        all_zero &= missing | (values == 0)
+        blanks += missing
+    invalid |= (blanks > 0) & (blanks < len(columns))
+    return invalid, all_zero & ~invalid
 
-def validate_alignment(df_alignment, link_df):
+
+def validate_alignment(df_alignment, link_df, missing_link_rows=None, kabupaten_extents=None,
+                       error_budget=None, as_report=False):
     """
     Validate alignment data including data types and referential integrity.
     Returns a DataFrame of invalid rows.
+    missing_link_rows: row positions whose Link_No (as text) is not in the
+    Link table, precomputed by the SQL rule engine.
+    kabupaten_extents: {"<Province_Code>-<Kabupaten_Code>": (lat_min, lat_max,
+    lon_min, lon_max)} for the kabupaten extent check of the GPS points.
+    error_budget: stop after this many failures; the report is then
+    marked truncated.
+    as_report: return the ErrorReport itself (compact; the caller renders it).
     """
-    errors = []
+    errors = ErrorReport(df_alignment, error_budget)
     
-    for idx, row in df_alignment.iterrows():
-        row_errors = []
-        
-        # Validate data types for each field
-        for field_name, field_def in field_definitions.items():
-            if field_name in df_alignment.columns:
-                value = row[field_name]
-                is_valid, error_msg = validate_data_type(value, field_name, field_def)
-                if not is_valid:
-                    row_errors.append(f"{field_name}: {error_msg}")
-        
-        # Validate Link_No exists in Link table
-        if "Link_No" in df_alignment.columns:
-            link_no = str(row["Link_No"]).strip()
-            if link_no and link_no not in link_df["Link_No"].astype(str).values:
-                row_errors.append("Link_No not found in Link table")
-        
-        # Validate GPS coordinate consistency
-        if all(field in df_alignment.columns for field in ["GPSPoint_North_Deg", "GPSPoint_North_Min", "GPSPoint_North_Sec"]):
-            try:
-                north_deg = float(row["GPSPoint_North_Deg"]) if pd.notna(row["GPSPoint_North_Deg"]) else 0
-                north_min = float(row["GPSPoint_North_Min"]) if pd.notna(row["GPSPoint_North_Min"]) else 0
-                north_sec = float(row["GPSPoint_North_Sec"]) if pd.notna(row["GPSPoint_North_Sec"]) else 0
-                
-                if north_deg == 0 and north_min == 0 and north_sec == 0:
-                    row_errors.append("GPS North coordinates cannot all be zero")
-            except (ValueError, TypeError):
-                row_errors.append("Invalid GPS North coordinates")
-        
-        if all(field in df_alignment.columns for field in ["GPSPoint_East_Deg", "GPSPoint_East_Min", "GPSPoint_East_Sec"]):
-            try:
-                east_deg = float(row["GPSPoint_East_Deg"]) if pd.notna(row["GPSPoint_East_Deg"]) else 0
-                east_min = float(row["GPSPoint_East_Min"]) if pd.notna(row["GPSPoint_East_Min"]) else 0
-                east_sec = float(row["GPSPoint_East_Sec"]) if pd.notna(row["GPSPoint_East_Sec"]) else 0
-                
-                if east_deg == 0 and east_min == 0 and east_sec == 0:
-                    row_errors.append("GPS East coordinates cannot all be zero")
-            except (ValueError, TypeError):
-                row_errors.append("Invalid GPS East coordinates")
-        
-        # # Validate WKT LineString format
-        # if "Section_WKT_LineString" in df_alignment.columns:
-        #     wkt_value = str(row["Section_WKT_LineString"]).strip()
-        #     if wkt_value and wkt_value != "":
-        #         if not wkt_value.upper().startswith("LINESTRING"):
-        #             row_errors.append("Section_WKT_LineString must start with 'LINESTRING'")
-        #         elif not re.match(r'^LINESTRING\s*\([^)]+\)$', wkt_value, re.IGNORECASE):
-        #             row_errors.append("Invalid WKT LineString format")
-        
-        # If there are any errors for this row, add to errors list
-        if row_errors:
-            new_row = row.copy()
-            new_row["Validation_Message"] = "; ".join(row_errors)
-            new_row["Record_No"] = idx + 1
-            errors.append(new_row)
+    # Data types for each field, checked column-wise
+    errors.add_checks(checker_plan("Alignment"), check_required=False)
+    
+    # Validate Link_No exists in Link table (one hashed lookup for the column)
+    if missing_link_rows is None and not errors.full and "Link_No" in df_alignment.columns:
+        missing_link_rows = LinkIndex.for_frame(link_df).missing_rows(df_alignment["Link_No"])
+    missing_link = np.zeros(len(df_alignment), dtype=bool)
+    missing_link[list(missing_link_rows or ())] = True
+    
+    # Validate GPS coordinate consistency, one coordinate at a time for the whole table
+    gps_checks = []
+    for axis in ["North", "East"]:
+        fields = [f"GPSPoint_{axis}_Deg", f"GPSPoint_{axis}_Min", f"GPSPoint_{axis}_Sec"]
+        if all(field in df_alignment.columns for field in fields):
+            invalid, all_zero = dms_checks(df_alignment, fields)
+            gps_checks.append((all_zero, f"GPS {axis} coordinates cannot all be zero"))
+            gps_checks.append((invalid, f"Invalid GPS {axis} coordinates"))
+    
+    # # Validate WKT LineString format
+    # if "Section_WKT_LineString" in df_alignment.columns:
+    #     wkt_value = str(row["Section_WKT_LineString"]).strip()
+    #     if wkt_value and wkt_value != "":
+    #         if not wkt_value.upper().startswith("LINESTRING"):
+    #             row_errors.append("Section_WKT_LineString must start with 'LINESTRING'")
+    #         elif not re.match(r'^LINESTRING\s*\([^)]+\)$', wkt_value, re.IGNORECASE):
+    #             row_errors.append("Invalid WKT LineString format")
+    
+    # Collected as (row, rule, message) arrays; each row's messages are joined with the report frame
+    errors.add_mask(missing_link, "link", "Link_No not found in Link table")
+    for mask, message in gps_checks:
+        errors.add_mask(mask, "gps", message)
+    
+    # Geospatial sanity of the points: Indonesia and kabupaten extents, jumps along each link
+    point_errors = gps_point_errors(df_alignment, kabupaten_extents) if not errors.full else {}
+    errors.add([pos for pos, messages in point_errors.items() for _ in messages], "gps_point",
+               [message for messages in point_errors.values() for message in messages])
 
     # Add cross-table validation for Link_Length_Actual consistency (first two digits only)
     # Temporarily disabled by request
     # length_consistency_errors = validate_link_length_consistency(df_alignment, link_df)
-    # for error_info in length_consistency_errors:
-    #     row_idx = error_info["row_index"]
-    #     if row_idx < len(df_alignment):
-    #         row = df_alignment.iloc[row_idx]
-    #         new_row = row.copy()
-    #         new_row["Validation_Message"] = error_info["error"]
-    #         new_row["Record_No"] = row_idx + 1
-    #         errors.append(new_row)
+    # errors.add_separate([error_info["row_index"] for error_info in length_consistency_errors], "link_length",
+    #                      [error_info["error"] for error_info in length_consistency_errors])
 
     # Add cross-table validation for Link_Length_Official consistency (Chainage_RB in meters vs Link_Length_Official in km)
-    length_official_consistency_errors = validate_link_length_official_consistency(df_alignment, link_df)
-    for error_info in length_official_consistency_errors:
-        row_idx = error_info["row_index"]
-        if row_idx < len(df_alignment):
-            row = df_alignment.iloc[row_idx]
-            new_row = row.copy()
-            new_row["Validation_Message"] = error_info["error"]
-            new_row["Record_No"] = row_idx + 1
-            errors.append(new_row)
+    length_official_consistency_errors = (
+        validate_link_length_official_consistency(df_alignment, link_df) if not errors.full else []
+    )
+    errors.add_separate([error_info["row_index"] for error_info in length_official_consistency_errors], "link_length",
+                        [error_info["error"] for error_info in length_official_consistency_errors])
 
-    if errors:
-        return pd.DataFrame(errors, columns=["Record_No"] + list(df_alignment.columns) + ["Validation_Message"])
-    else:
-        return pd.DataFrame(columns=["Record_No"] + list(df_alignment.columns) + ["Validation_Message"])
+    return errors if as_report else errors.frame()
@@ -1,13 +1,17 @@
 # validate_bridge_inventory.py
+import pandas as pd
+
+from all_table_validations.schema_registry import get_schema
+
+# Declared in schema_registry (the row rules below are specific to this table)
+required_columns = get_schema("BridgeInventory").required_columns
+
+def _is_missing(value):
+    # Typed (nullable) columns hold pd.NA, which has no truth value
+    if value is None or pd.isna(value):
+        return True
+    return not value
 
-# Table-specific required columns - Only important fields
-required_columns = [
-    "Year",
-    "Province_Code",
-    "Kabupaten_Code", 
-    "Link_No",
-    "Bridge_Number",
-]
 
 def validate_row(row, df_link=None):
     errors = {}
@@ -18,20 +22,20 @@ def validate_row(row, df_link=None):
         if val < 1900 or val > 2100:
             errors["Year"] = "year out of valid range (1900-2100)"
     except:
-        errors["Year"] = "invalid number" if row["Year"] else "missing"
+        errors["Year"] = "missing" if _is_missing(row["Year"]) else "invalid number"
     
     # Province_Code - Short Text
-    if not row["Province_Code"]:
+    if _is_missing(row["Province_Code"]):
         errors["Province_Code"] = "missing"
     elif not str(row["Province_Code"]).isalpha() and not str(row["Province_Code"]).isdigit():
         errors["Province_Code"] = "invalid format"
     
     # Kabupaten_Code - Short Text
-    if not row["Kabupaten_Code"]:
+    if _is_missing(row["Kabupaten_Code"]):
         errors["Kabupaten_Code"] = "missing"
     
     # Link_No - Short Text
-    if not row["Link_No"]:
+    if _is_missing(row["Link_No"]):
         errors["Link_No"] = "missing"
     else:
         link_no = str(row["Link_No"]).strip()
@@ -44,13 +48,13 @@ def validate_row(row, df_link=None):
             errors["Link_No"] = "does not start with province code"
     
     # Bridge_Number - Short Text
-    if not row["Bridge_Number"]:
+    if _is_missing(row["Bridge_Number"]):
         errors["Bridge_Number"] = "missing"
     
     # Cross-table validation: Check if Link_No exists in Link table
     if df_link is not None and "Link_No" in df_link.columns:
         link_no = row.get("Link_No")
-        if link_no and str(link_no).strip():
+        if not _is_missing(link_no) and str(link_no).strip():
             if link_no not in df_link["Link_No"].values:
                 errors["Link_No"] = f"Link_No '{link_no}' does not exist in Link table"
     
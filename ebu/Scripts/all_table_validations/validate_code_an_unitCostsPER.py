@@ -1,90 +1,40 @@
 import pandas as pd
-from typing import Any, Dict, Tuple, List
+from typing import Any, Dict, List
 
-
-# Required columns for the CODE_AN_UnitCostsPER table (top 3 columns)
-required_columns: List[str] = [
-    "Province_Code",
-    "Kabupaten_Code",
-    "Overlay_thick",
-]
-
-
-# Field definitions based on the database schema
-# Supported types: "Short Text", "Number"
-field_definitions: Dict[str, Dict[str, Any]] = {
-    "Province_Code": {"type": "Short Text"},
-    "Kabupaten_Code": {"type": "Short Text"},
-    "Overlay_thick": {"type": "Number", "range": (0, float("inf"))},
-    "Per_unitcost": {"type": "Number", "range": (0, float("inf"))},
-}
-
-
-def _normalize_str(value: Any) -> str:
-    if value is None:
-        return ""
-    return str(value).strip()
+from all_table_validations.error_report import ErrorReport
+from all_table_validations.schema_registry import checker_plan, get_schema
+from all_table_validations.unique_keys import duplicate_key_messages
 
 
-def _is_empty(value: Any) -> bool:
-    if value is None:
-        return True
-    if isinstance(value, str) and value.strip() == "":
-        return True
-    try:
-        # pandas NA check without importing numpy here
-        return pd.isna(value)  # type: ignore[arg-type]
-    except Exception:
-        return False
+# Declared in schema_registry, which also compiles their checks
+SCHEMA = get_schema("CODE_AN_UnitCostsPER")
+required_columns: List[str] = SCHEMA.required_columns
+field_definitions: Dict[str, Dict[str, Any]] = SCHEMA.field_definitions
 
 
-def validate_data_type(value: Any, field_name: str, field_def: Dict[str, Any]) -> Tuple[bool, str]:
-    """
-    Validate a single value against the provided field definition.
-    Empty values are considered valid here; required-ness is enforced separately.
-    """
-    if _is_empty(value):
-        return True, ""
-
-    ftype = field_def.get("type")
-
-    if ftype == "Short Text":
-        # Accept primitives convertible to text
-        if not isinstance(value, (str, int, float)):
-            return False, f"Value must be text, got {type(value).__name__}"
-        return True, ""
-
-    if ftype == "Number":
-        try:
-            num = float(value)
-        except (TypeError, ValueError):
-            return False, f"Value must be numeric, got {type(value).__name__}"
-
-        rng = field_def.get("range")
-        if isinstance(rng, tuple) and len(rng) == 2:
-            min_v, max_v = rng
-            if (min_v is not None and num < min_v) or (max_v is not None and num > max_v):
-                return False, f"Value must be between {min_v} and {max_v}"
-        return True, ""
-
-    return True, ""
-
-
-def validate_code_an_unit_costs_per(df: pd.DataFrame) -> pd.DataFrame:
+def validate_code_an_unit_costs_per(df: pd.DataFrame, duplicate_groups: dict = None,
+                                    error_budget: int = None, as_report: bool = False) -> pd.DataFrame:
     """
     Validate the CODE_AN_UnitCostsPER table.
 
     - Ensures required columns exist
     - Ensures required columns are non-empty per row
     - Validates data types for known fields
+    - Validates the declared uniqueness keys (one record per band)
     - Handles empty database scenario
 
     Returns a DataFrame with the same columns as input plus:
     - Record_No: 1-based row number from the input DataFrame
     - Validation_Message: aggregated error message for the row
     If no errors, returns an empty DataFrame with the same shape.
+
+    duplicate_groups: {key columns: row positions per duplicated key value},
+    already computed by the SQL rule engine.
+    error_budget: stop after this many failures; the report is then
+    marked truncated.
+    as_report: return the ErrorReport itself (compact; the caller renders it).
     """
-    errors: List[pd.Series] = []
+    errors = ErrorReport(df, error_budget)
 
     # Check if database is completely empty - DISABLED FOR NOW
     # if df.empty:
@@ -112,32 +62,13 @@ def validate_code_an_unit_costs_per(df: pd.DataFrame) -> pd.DataFrame:
             columns=["Record_No"] + list(df.columns) + ["Validation_Message"],
         )
 
-    # 2) Row-wise validations
-    for idx, row in df.iterrows():
-        row_errors: List[str] = []
-
-        # Required column emptiness check
-        for col in required_columns:
-            if col in df.columns and _is_empty(row[col]):
-                row_errors.append(f"{col} is required")
-
-        # Data type checks for known fields
-        for field_name, field_def in field_definitions.items():
-            if field_name in df.columns:
-                is_valid, msg = validate_data_type(row[field_name], field_name, field_def)
-                if not is_valid:
-                    row_errors.append(f"{field_name}: {msg}")
-
-        if row_errors:
-            new_row = row.copy()
-            new_row["Record_No"] = idx + 1
-            new_row["Validation_Message"] = "; ".join(row_errors)
-            errors.append(new_row)
-
-    if errors:
-        return pd.DataFrame(errors, columns=["Record_No"] + list(df.columns) + ["Validation_Message"])
-
-    return pd.DataFrame(columns=["Record_No"] + list(df.columns) + ["Validation_Message"])
+    # 2) Row-wise validations: the required and data type checks run
+    # column-wise and each uniqueness key is one hash pass; the report frame
+    # is built once from the collected (row, rule, message) arrays
+    errors.add_checks(checker_plan("CODE_AN_UnitCostsPER"))
+    key_errors = duplicate_key_messages(df, SCHEMA.keys, duplicate_groups)
+    errors.add_labels(key_errors, "unique_key")
+    return errors if as_report else errors.frame()
 
 
 __all__ = [
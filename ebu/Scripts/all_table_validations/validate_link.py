@@ -1,32 +1,39 @@
 # validate_link.py
+from collections import Counter
+
+import pandas as pd
+
+from all_table_validations.error_report import FAILURE_COLUMNS
+from all_table_validations.schema_registry import get_schema
+from all_table_validations.unique_keys import duplicate_key_messages
+
+# Declared in schema_registry (the row rules below are specific to this table)
+SCHEMA = get_schema("Link")
+required_columns = SCHEMA.required_columns
+
+def _is_missing(value):
+    # Typed (nullable) columns hold pd.NA, which has no truth value
+    if value is None or pd.isna(value):
+        return True
+    return not value
 
-# Table-specific required columns - Only important fields
-required_columns = [
-    "Province_Code",
-    "Kabupaten_Code", 
-    "Link_No",
-    "Link_Code",
-    "Link_Name",
-    "Link_Length_Official",
-    "Link_Length_Actual",
-]
 
 def validate_row(row):
     errors = {}
     
     # Province_Code - Short Text
-    if not row["Province_Code"]:
+    if _is_missing(row["Province_Code"]):
         errors["Province_Code"] = "missing"
     elif not str(row["Province_Code"]).isalpha() and not str(row["Province_Code"]).isdigit():
         errors["Province_Code"] = "invalid format"
     
     # Kabupaten_Code - Short Text (allow numeric 0)
     kc = row.get("Kabupaten_Code")
-    if kc is None or (isinstance(kc, str) and kc.strip() == ""):
+    if kc is None or pd.isna(kc) or (isinstance(kc, str) and kc.strip() == ""):
         errors["Kabupaten_Code"] = "missing"
     
     # Link_No - Short Text
-    if not row["Link_No"]:
+    if _is_missing(row["Link_No"]):
         errors["Link_No"] = "missing"
     else:
         link_no = str(row["Link_No"]).strip()
@@ -39,11 +46,11 @@ def validate_row(row):
             errors["Link_No"] = "does not start with province code"
     
     # Link_Code - Short Text
-    if not row["Link_Code"]:
+    if _is_missing(row["Link_Code"]):
         errors["Link_Code"] = "missing"
     
     # Link_Name - Short Text
-    if not row["Link_Name"]:
+    if _is_missing(row["Link_Name"]):
         errors["Link_Name"] = "missing"
     
     # Link_Length_Official - Number
@@ -52,7 +59,7 @@ def validate_row(row):
         if val < 0:
             errors["Link_Length_Official"] = "negative not allowed"
     except:
-        errors["Link_Length_Official"] = "invalid number" if row["Link_Length_Official"] else "missing"
+        errors["Link_Length_Official"] = "missing" if _is_missing(row["Link_Length_Official"]) else "invalid number"
     
     # Link_Length_Actual - Number
     try:
@@ -60,6 +67,71 @@ def validate_row(row):
         if val < 0:
             errors["Link_Length_Actual"] = "negative not allowed"
     except:
-        errors["Link_Length_Actual"] = "invalid number" if row["Link_Length_Actual"] else "missing"
+        errors["Link_Length_Actual"] = "missing" if _is_missing(row["Link_Length_Actual"]) else "invalid number"
     
     return errors
+
+
+def validate_link(df, duplicate_groups=None, error_budget=None):
+    """
+    Validate every Link row with validate_row, and the uniqueness of
+    Link_No and Link_Code.
+    Returns a DataFrame with Record_No, the required columns (empty values
+    shown as "missing") and Validation_Message for each invalid row; its
+    attrs["rule_counts"] counts the failures per rule id (see error_report)
+    and attrs["failures"] lists them (FAILURE_COLUMNS).
+    duplicate_groups: {key columns: row positions per duplicated key value},
+    already computed by the SQL rule engine.
+    error_budget: stop once this many failures are found; attrs["truncated"]
+    then marks the result.
+    """
+    # Rows sharing a key value with another row (one hash pass per key), with
+    # the same describe_key messages as the other tables
+    key_messages = duplicate_key_messages(df, SCHEMA.keys, duplicate_groups)
+
+    invalid_rows = []
+    rule_counts = Counter()
+    failures = []
+    for idx, row in df.iterrows():
+        if error_budget is not None and sum(rule_counts.values()) >= error_budget:
+            break
+        # Get validation errors from the comprehensive validation function
+        errors = validate_row(row)
+        duplicates = key_messages.get(idx, [])
+
+        if errors or duplicates:
+            # Create a row with validation results
+            new_row = {"Record_No": idx + 1}
+
+            # Add all required columns with their values
+            for col in required_columns:
+                if col in df.columns:
+                    cell_value = "" if pd.isna(row[col]) else str(row[col]).strip()
+                    if cell_value == "" or cell_value == "nan" or cell_value == "None":
+                        new_row[col] = "missing"
+                    else:
+                        new_row[col] = row[col]
+                else:
+                    new_row[col] = "missing"
+
+            # Add validation message
+            validation_messages = []
+            for col, error_msg in errors.items():
+                if col in required_columns:
+                    validation_messages.append(f"{col}: {error_msg}")
+                    rule_counts["field"] += 1
+                    failures.append((idx + 1, row.get("Link_No"), "field", f"{col}: {error_msg}"))
+            for message in duplicates:
+                validation_messages.append(message)
+                rule_counts["unique_key"] += 1
+                failures.append((idx + 1, row.get("Link_No"), "unique_key", message))
+
+            new_row["Validation_Message"] = "; ".join(validation_messages)
+            invalid_rows.append(new_row)
+
+    result = pd.DataFrame(invalid_rows, columns=["Record_No"] + required_columns + ["Validation_Message"])
+    result.attrs["rule_counts"] = dict(rule_counts)
+    result.attrs["failures"] = pd.DataFrame(failures, columns=FAILURE_COLUMNS)
+    if error_budget is not None and sum(rule_counts.values()) >= error_budget:
+        result.attrs["truncated"] = True
+    return result
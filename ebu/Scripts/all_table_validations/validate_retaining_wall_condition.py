@@ -1,110 +1,49 @@
 import pandas as pd
-from typing import Any, Dict, Tuple, List
-
-
-# Required columns for the RetainingWallCondition table (top 5 columns)
-required_columns: List[str] = [
-    "Year",
-    "Province_Code",
-    "Kabupaten_Code",
-    "Link_No",
-    "Wall_Number",
-]
-
-
-# Field definitions based on the database schema
-# Supported types: "Short Text", "Number", "Yes/No"
-field_definitions: Dict[str, Dict[str, Any]] = {
-    "Year": {"type": "Number", "range": (1900, 2100)},
-    "Province_Code": {"type": "Short Text"},
-    "Kabupaten_Code": {"type": "Short Text"},
-    "Link_No": {"type": "Short Text"},
-    "Wall_Number": {"type": "Short Text"},
-    "Wall_Mortar_m2": {"type": "Number", "range": (0, float("inf"))},
-    "Wall_Repair_m3": {"type": "Number", "range": (0, float("inf"))},
-    "Wall_Rebuild_m": {"type": "Number", "range": (0, float("inf"))},
-    "AnalysisBaseYear": {"type": "Yes/No"},
-    "SurveyBy": {"type": "Short Text"},
-}
-
-
-def _normalize_str(value: Any) -> str:
-    if value is None:
-        return ""
-    return str(value).strip()
-
-
-def _is_empty(value: Any) -> bool:
-    if value is None:
-        return True
-    if isinstance(value, str) and value.strip() == "":
-        return True
-    try:
-        # pandas NA check without importing numpy here
-        return pd.isna(value)  # type: ignore[arg-type]
-    except Exception:
-        return False
-
-
-def validate_data_type(value: Any, field_name: str, field_def: Dict[str, Any]) -> Tuple[bool, str]:
-    """
-    Validate a single value against the provided field definition.
-    Empty values are considered valid here; required-ness is enforced separately.
-    """
-    if _is_empty(value):
-        return True, ""
-
-    ftype = field_def.get("type")
-
-    if ftype == "Short Text":
-        # Accept primitives convertible to text
-        if not isinstance(value, (str, int, float)):
-            return False, f"Value must be text, got {type(value).__name__}"
-        return True, ""
-
-    if ftype == "Number":
-        try:
-            num = float(value)
-        except (TypeError, ValueError):
-            return False, f"Value must be numeric, got {type(value).__name__}"
-
-        rng = field_def.get("range")
-        if isinstance(rng, tuple) and len(rng) == 2:
-            min_v, max_v = rng
-            if (min_v is not None and num < min_v) or (max_v is not None and num > max_v):
-                return False, f"Value must be between {min_v} and {max_v}"
-        return True, ""
-
-    if ftype == "Yes/No":
-        # Accept boolean values, 0/1, "Yes"/"No", "True"/"False"
-        if isinstance(value, bool):
-            return True, ""
-        if isinstance(value, (int, float)) and value in [0, 1]:
-            return True, ""
-        if isinstance(value, str):
-            normalized = value.strip().lower()
-            if normalized in ["yes", "no", "true", "false", "1", "0"]:
-                return True, ""
-        return False, f"Value must be Yes/No, True/False, or 0/1, got {value}"
-
-    return True, ""
-
-
-def validate_retaining_wall_condition(df: pd.DataFrame, df_link: pd.DataFrame = None) -> pd.DataFrame:
+from typing import Any, Dict, List
+
+from all_table_validations.error_report import ErrorReport
+from all_table_validations.foreign_keys import orphan_messages
+from all_table_validations.link_index import LinkIndex
+from all_table_validations.schema_registry import checker_plan, get_schema
+
+
+# Declared in schema_registry, which also compiles their checks
+SCHEMA = get_schema("RetainingWallCondition")
+required_columns: List[str] = SCHEMA.required_columns
+field_definitions: Dict[str, Dict[str, Any]] = SCHEMA.field_definitions
+
+
+def validate_retaining_wall_condition(
+    df: pd.DataFrame,
+    df_link: pd.DataFrame = None,
+    missing_link_rows: set = None,
+    orphan_rows: dict = None,
+    error_budget: int = None,
+    as_report: bool = False,
+) -> pd.DataFrame:
     """
     Validate the RetainingWallCondition table.
 
     - Ensures required columns exist
     - Ensures required columns are non-empty per row
     - Validates data types for known fields
+    - Validates that each row refers to an existing RetainingWallInventory record
     - Handles empty database scenario
 
     Returns a DataFrame with the same columns as input plus:
     - Record_No: 1-based row number from the input DataFrame
     - Validation_Message: aggregated error message for the row
     If no errors, returns an empty DataFrame with the same shape.
+
+    missing_link_rows: row positions whose Link_No is not in the Link table,
+    already computed by the SQL rule engine; df_link is then not scanned.
+    orphan_rows: {parent table: row positions without a parent record},
+    found by a hash join against RetainingWallInventory before the validators run.
+    error_budget: stop after this many failures; the report is then
+    marked truncated.
+    as_report: return the ErrorReport itself (compact; the caller renders it).
     """
-    errors: List[pd.Series] = []
+    errors = ErrorReport(df, error_budget)
 
     # Check if database is completely empty - DISABLED FOR NOW
     # if df.empty:
@@ -132,39 +71,24 @@ def validate_retaining_wall_condition(df: pd.DataFrame, df_link: pd.DataFrame =
             columns=["Record_No"] + list(df.columns) + ["Validation_Message"],
         )
 
-    # 2) Row-wise validations
-    for idx, row in df.iterrows():
-        row_errors: List[str] = []
-
-        # Required column emptiness check
-        for col in required_columns:
-            if col in df.columns and _is_empty(row[col]):
-                row_errors.append(f"{col} is required")
-
-        # Data type checks for known fields
-        for field_name, field_def in field_definitions.items():
-            if field_name in df.columns:
-                is_valid, msg = validate_data_type(row[field_name], field_name, field_def)
-                if not is_valid:
-                    row_errors.append(f"{field_name}: {msg}")
-
-        # Cross-table validation: Check if Link_No exists in Link table
-        if df_link is not None and "Link_No" in df.columns and "Link_No" in df_link.columns:
-            link_no = row.get("Link_No")
-            if not _is_empty(link_no):
-                if link_no not in df_link["Link_No"].values:
-                    row_errors.append(f"Link_No '{link_no}' does not exist in Link table")
-
-        if row_errors:
-            new_row = row.copy()
-            new_row["Record_No"] = idx + 1
-            new_row["Validation_Message"] = "; ".join(row_errors)
-            errors.append(new_row)
-
-    if errors:
-        return pd.DataFrame(errors, columns=["Record_No"] + list(df.columns) + ["Validation_Message"])
-
-    return pd.DataFrame(columns=["Record_No"] + list(df.columns) + ["Validation_Message"])
+    # 2) Row-wise validations; the required and data type checks run column-wise
+    errors.add_checks(checker_plan("RetainingWallCondition"))
+
+    # Cross-table validation: Link_No must exist in the Link table (one hashed lookup)
+    if missing_link_rows is None and not errors.full and df_link is not None and "Link_No" in df.columns and "Link_No" in df_link.columns:
+        missing_link_rows = LinkIndex.for_frame(df_link).missing_rows(df["Link_No"])
+    missing_links = sorted(missing_link_rows or ())
+
+    # Cross-table validation: the referenced inventory record must exist
+    reference_errors = orphan_messages(df, SCHEMA.references, orphan_rows)
+
+    # Collected as (row, rule, message template) arrays; messages are rendered with the report frame
+    if missing_links:
+        errors.add(missing_links, "link", "Link_No '{Link_No}' does not exist in Link table",
+                   {"Link_No": df["Link_No"].to_numpy()[missing_links]})
+    errors.add_labels(reference_errors, "reference")
+
+    return errors if as_report else errors.frame()
 
 
 __all__ = [
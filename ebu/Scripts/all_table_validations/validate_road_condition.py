@@ -1,123 +1,50 @@
 import pandas as pd
-from typing import Any, Dict, Tuple, List
+from typing import Any, Dict, List
 
+from all_table_validations.chainage import continuity_errors, interval_sweep
+from all_table_validations.error_report import ErrorReport
+from all_table_validations.link_index import LinkIndex
+from all_table_validations.schema_registry import checker_plan, get_schema
+from all_table_validations.unique_keys import duplicate_key_messages
 
-# Required columns for the RoadCondition table
-required_columns: List[str] = [
-    "Year",
-    "Province_Code",
-    "Kabupaten_Code",
-    "Link_No",
-    "ChainageFrom",
-    "ChainageTo",
-]
 
+# Declared in schema_registry, which also compiles their checks
+SCHEMA = get_schema("RoadCondition")
+required_columns: List[str] = SCHEMA.required_columns
+field_definitions: Dict[str, Dict[str, Any]] = SCHEMA.field_definitions
 
-# Field definitions inferred from the database design
-# Supported types: "Short Text", "Number", "Yes/No"
-field_definitions: Dict[str, Dict[str, Any]] = {
-    "Year": {"type": "Number", "range": (0, float("inf"))},
-    "Province_Code": {"type": "Short Text"},
-    "Kabupaten_Code": {"type": "Short Text"},
-    "Link_No": {"type": "Short Text"},
-    "ChainageFrom": {"type": "Number"},
-    "ChainageTo": {"type": "Number"},
-    "DRP_From": {"type": "Number"},
-    "Offset_From": {"type": "Number"},
-    "DRP_To": {"type": "Number"},
-    "Offset_To": {"type": "Number"},
-    "Roughness": {"type": "Yes/No"},
-    "Bleeding_area": {"type": "Number"},
-    "Ravelling_area": {"type": "Number"},
-    "Desintegration_area": {"type": "Number"},
-    "CrackDep_area": {"type": "Number"},
-    "Patching_area": {"type": "Number"},
-    "OthCrack_area": {"type": "Number"},
-    "Pothole_area": {"type": "Number"},
-    "Rutting_area": {"type": "Number"},
-    "EdgeDamage_area": {"type": "Number"},
-    "Crossfall_area": {"type": "Number"},
-    "Depressions_area": {"type": "Number"},
-    "Erosion_area": {"type": "Number"},
-    "Waviness_area": {"type": "Number"},
-}
-
-
-def _normalize_str(value: Any) -> str:
-    if value is None:
-        return ""
-    return str(value).strip()
-
-
-def _is_empty(value: Any) -> bool:
-    if value is None:
-        return True
-    if isinstance(value, str) and value.strip() == "":
-        return True
-    try:
-        # pandas NA check without importing numpy here
-        return pd.isna(value)  # type: ignore[arg-type]
-    except Exception:
-        return False
-
-
-def validate_data_type(value: Any, field_name: str, field_def: Dict[str, Any]) -> Tuple[bool, str]:
-    """
-    Validate a single value against the provided field definition.
-    Empty values are considered valid here; required-ness is enforced separately.
-    """
-    if _is_empty(value):
-        return True, ""
-
-    ftype = field_def.get("type")
-
-    if ftype == "Short Text":
-        # Accept primitives convertible to text
-        if not isinstance(value, (str, int, float)):
-            return False, f"Value must be text, got {type(value).__name__}"
-        return True, ""
-
-    if ftype == "Number":
-        try:
-            num = float(value)
-        except (TypeError, ValueError):
-            return False, f"Value must be numeric, got {type(value).__name__}"
-
-        rng = field_def.get("range")
-        if isinstance(rng, tuple) and len(rng) == 2:
-            min_v, max_v = rng
-            if (min_v is not None and num < min_v) or (max_v is not None and num > max_v):
-                return False, f"Value must be between {min_v} and {max_v}"
-        return True, ""
-
-    if ftype == "Yes/No":
-        acceptable_truthy = {True, 1, "1", "true", "True", "yes", "Yes", "y", "Y"}
-        acceptable_falsy = {False, 0, "0", "false", "False", "no", "No", "n", "N"}
-        if value in acceptable_truthy or value in acceptable_falsy:
-            return True, ""
-        # Also accept strings like "on"/"off"
-        val_str = _normalize_str(value).lower()
-        if val_str in {"on", "off"}:
-            return True, ""
-        return False, "Value must be Yes/No (boolean)"
-
-    return True, ""
-
-
-def validate_road_condition(df: pd.DataFrame, df_link: pd.DataFrame = None) -> pd.DataFrame:
+
+def validate_road_condition(
+    df: pd.DataFrame,
+    df_link: pd.DataFrame = None,
+    missing_link_rows: set = None,
+    duplicate_groups: dict = None,
+    error_budget: int = None,
+    as_report: bool = False,
+) -> pd.DataFrame:
     """
     Validate the RoadCondition table.
 
     - Ensures required columns exist
     - Ensures required columns are non-empty per row
     - Validates data types for known fields
+    - Validates (Link_No, ChainageFrom, Year) uniqueness
+    - Checks chainage continuity, segment overlaps and coverage of each link
 
     Returns a DataFrame with the same columns as input plus:
     - Record_No: 1-based row number from the input DataFrame
     - Validation_Message: aggregated error message for the row
     If no errors, returns an empty DataFrame with the same shape.
+
+    missing_link_rows: row positions whose Link_No is not in the Link table,
+    already computed by the SQL rule engine; df_link is then not scanned.
+    duplicate_groups: {key columns: row positions per duplicated key value},
+    likewise precomputed.
+    error_budget: stop after this many failures; the report is then
+    marked truncated.
+    as_report: return the ErrorReport itself (compact; the caller renders it).
     """
-    errors: List[pd.Series] = []
+    errors = ErrorReport(df, error_budget)
 
     # 1) Check for missing required columns (table schema level)
     missing_cols = [c for c in required_columns if c not in df.columns]
@@ -134,91 +61,42 @@ def validate_road_condition(df: pd.DataFrame, df_link: pd.DataFrame = None) -> p
             columns=["Record_No"] + list(df.columns) + ["Validation_Message"],
         )
 
-    # 2) Row-wise validations
-    for idx, row in df.iterrows():
-        row_errors: List[str] = []
-
-        # Required column emptiness check
-        for col in required_columns:
-            if col in df.columns and _is_empty(row[col]):
-                row_errors.append(f"{col} is required")
-
-        # Data type checks for known fields
-        for field_name, field_def in field_definitions.items():
-            if field_name in df.columns:
-                is_valid, msg = validate_data_type(row[field_name], field_name, field_def)
-                if not is_valid:
-                    row_errors.append(f"{field_name}: {msg}")
-
-        # Cross-table validation: Check if Link_No exists in Link table
-        if df_link is not None and "Link_No" in df.columns and "Link_No" in df_link.columns:
-            link_no = row.get("Link_No")
-            if not _is_empty(link_no):
-                if link_no not in df_link["Link_No"].values:
-                    row_errors.append(f"Link_No '{link_no}' does not exist in Link table")
-
-        if row_errors:
-            new_row = row.copy()
-            new_row["Record_No"] = idx + 1
-            new_row["Validation_Message"] = "; ".join(row_errors)
-            errors.append(new_row)
+    # 2) Row-wise validations; the required and data type checks run column-wise
+    errors.add_checks(checker_plan("RoadCondition"))
+
+    # Cross-table validation: Link_No must exist in the Link table (one hashed lookup)
+    if missing_link_rows is None and not errors.full and df_link is not None and "Link_No" in df.columns and "Link_No" in df_link.columns:
+        missing_link_rows = LinkIndex.for_frame(df_link).missing_rows(df["Link_No"])
+    missing_links = sorted(missing_link_rows or ())
+
+    # Uniqueness keys: one hash pass per declared key
+    key_errors = duplicate_key_messages(df, SCHEMA.keys, duplicate_groups)
+
+    # Collected as (row, rule, message template) arrays; messages are rendered with the report frame
+    if missing_links:
+        errors.add(missing_links, "link", "Link_No '{Link_No}' does not exist in Link table",
+                   {"Link_No": df["Link_No"].to_numpy()[missing_links]})
+    errors.add_labels(key_errors, "unique_key")
 
     # 3) Chainage sequence validation across groups of links
     # Group by Province_Code, Kabupaten_Code, and Year to check continuity across links
     group_keys: List[str] = [k for k in ["Province_Code", "Kabupaten_Code", "Year"] if k in df.columns]
-    if "ChainageFrom" in df.columns and "ChainageTo" in df.columns and group_keys:
-        grouped = df.groupby(group_keys, dropna=False, sort=False)
-        for group_name, group in grouped:
-            try:
-                local = group.copy()
-                local["__from"] = pd.to_numeric(local["ChainageFrom"], errors="coerce")
-                local["__to"] = pd.to_numeric(local["ChainageTo"], errors="coerce")
-                # Sort by Link_No first, then by ChainageFrom to maintain logical order
-                local = local.sort_values(["Link_No", "__from"])
-
-                if local.empty:
-                    continue
-
-                # Check if the first chainage starts at 0 for the entire group
-                first_idx = local.index[0]
-                if pd.isna(local.iloc[0]["__from"]) or local.iloc[0]["__from"] != 0:
-                    r = df.loc[first_idx].copy()
-                    r["Record_No"] = first_idx + 1
-                    r["Validation_Message"] = f"ChainageFrom must start at 0 for the group {group_name}"
-                    errors.append(r)
-
-                # Check continuity across all links in the group
-                prev_to = None
-                prev_link_no = None
-                for i, row_i in local.iterrows():
-                    cf = row_i["__from"]
-                    ct = row_i["__to"]
-                    current_link_no = row_i["Link_No"]
-
-                    if pd.isna(cf) or pd.isna(ct):
-                        continue
-
-                    # Check continuity - ChainageFrom should equal previous ChainageTo
-                    # BUT ignore the first chainage of each link (when Link_No changes)
-                    if prev_to is not None and prev_link_no is not None and current_link_no != prev_link_no:
-                        # We're starting a new link, so don't check continuity for the first chainage
-                        pass
-                    elif prev_to is not None and cf != prev_to:
-                        # Within the same link, check continuity
-                        r = df.loc[i].copy()
-                        r["Record_No"] = i + 1
-                        r["Validation_Message"] = f"ChainageFrom ({cf}) must equal previous ChainageTo ({prev_to}) for continuous chainage within the same link"
-                        errors.append(r)
-
-                    prev_to = ct
-                    prev_link_no = current_link_no
-            except Exception:
-                continue
-
-    if errors:
-        return pd.DataFrame(errors, columns=["Record_No"] + list(df.columns) + ["Validation_Message"])
-
-    return pd.DataFrame(columns=["Record_No"] + list(df.columns) + ["Validation_Message"])
+    # Sorted once across all groups; breaks are found with shifted comparisons
+    if "ChainageFrom" in df.columns and "ChainageTo" in df.columns and group_keys and not df.empty and not errors.full:
+        found = continuity_errors(df, group_keys)
+        errors.add_separate([idx for idx, _ in found], "continuity", [message for _, message in found])
+
+    # 4) Interval sweep per link: reversed, duplicate and overlapping segments,
+    # segments past Link_Length_Official, and the per-link coverage summary
+    coverage = None
+    if "Link_No" in df.columns and "ChainageFrom" in df.columns and "ChainageTo" in df.columns and not errors.full:
+        findings, coverage = interval_sweep(df, ["Year"], df_link)
+        errors.add_separate([idx for idx, _ in findings], "interval", [message for _, message in findings])
+
+    # Travels with the result (also through the worker pool) for the coverage sheet
+    if coverage is not None:
+        errors.attrs["coverage"] = coverage
+    return errors if as_report else errors.frame()
 
 
 __all__ = [
@@ -1,118 +1,26 @@
 import pandas as pd
-from typing import Any, Dict, Tuple, List
-from datetime import datetime
+from typing import Any, Dict, List
 
+from all_table_validations.error_report import ErrorReport
+from all_table_validations.link_index import LinkIndex
+from all_table_validations.schema_registry import checker_plan, get_schema
+from all_table_validations.unique_keys import duplicate_key_groups
 
-# Required columns for the TrafficVolume table (important fields)
-required_columns: List[str] = [
-    "Year",
-    "Province_Code",
-    "Kabupaten_Code",
-    "Link_No",
-]
 
+# Declared in schema_registry, which also compiles their checks
+SCHEMA = get_schema("TrafficVolume")
+required_columns: List[str] = SCHEMA.required_columns
+field_definitions: Dict[str, Dict[str, Any]] = SCHEMA.field_definitions
 
-# Field definitions based on the database schema
-# Supported types: "Short Text", "Number", "Yes/No"
-field_definitions: Dict[str, Dict[str, Any]] = {
-    "Year": {"type": "Number"},
-    "Province_Code": {"type": "Short Text"},
-    "Kabupaten_Code": {"type": "Short Text"},
-    "Link_No": {"type": "Short Text"},
-    "MarketDay": {"type": "Yes/No"},
-    "TrafficCount": {"type": "Short Text"},
-    "JourneyTime": {"type": "Number", "range": (0, float("inf"))},
-    "AADT_MC": {"type": "Number", "range": (0, float("inf"))},
-    "AADT_Car": {"type": "Number", "range": (0, float("inf"))},
-    "AADT_Pickup": {"type": "Number", "range": (0, float("inf"))},
-    "AADT_MicroTruck": {"type": "Number", "range": (0, float("inf"))},
-    "AADT_Small_Bus": {"type": "Number", "range": (0, float("inf"))},
-    "AADT_Large_Bus": {"type": "Number", "range": (0, float("inf"))},
-    "AADT_Small_Truck": {"type": "Number", "range": (0, float("inf"))},
-    "AADT_Medium_Truck": {"type": "Number", "range": (0, float("inf"))},
-    "AADT_Large_Truck": {"type": "Number", "range": (0, float("inf"))},
-    "AADT_Truck_Trailer": {"type": "Number", "range": (0, float("inf"))},
-    "AADT_Semi_Trailer": {"type": "Number", "range": (0, float("inf"))},
-    "AnalysisBaseYear": {"type": "Yes/No"},
-    "SurveyBy": {"type": "Short Text"},
-}
-
-
-def _normalize_str(value: Any) -> str:
-    if value is None:
-        return ""
-    return str(value).strip()
-
-
-def _is_empty(value: Any) -> bool:
-    if value is None:
-        return True
-    if isinstance(value, str) and value.strip() == "":
-        return True
-    try:
-        # pandas NA check without importing numpy here
-        return pd.isna(value)  # type: ignore[arg-type]
-    except Exception:
-        return False
-
-
-def validate_data_type(value: Any, field_name: str, field_def: Dict[str, Any]) -> Tuple[bool, str]:
-    """
-    Validate a single value against the provided field definition.
-    Empty values are considered valid here; required-ness is enforced separately.
-    """
-    if _is_empty(value):
-        return True, ""
-
-    ftype = field_def.get("type")
-
-    if ftype == "Short Text":
-        # Accept primitives convertible to text
-        if not isinstance(value, (str, int, float)):
-            return False, f"Value must be text, got {type(value).__name__}"
-        return True, ""
-
-    if ftype == "Number":
-        try:
-            num = float(value)
-        except (TypeError, ValueError):
-            # Special case for Year field
-            if field_name == "Year":
-                return False, "Enter a valid year"
-            return False, f"Value must be numeric, got {type(value).__name__}"
-
-        # Special validation for Year field
-        if field_name == "Year":
-            current_year = datetime.now().year
-            if num <= 0:
-                return False, "Enter a valid year"
-            if num < 1900 or num > current_year:
-                return False, "Enter a valid year"
-            return True, ""
-
-        rng = field_def.get("range")
-        if isinstance(rng, tuple) and len(rng) == 2:
-            min_v, max_v = rng
-            if (min_v is not None and num < min_v) or (max_v is not None and num > max_v):
-                return False, f"Value must be between {min_v} and {max_v}"
-        return True, ""
-
-    if ftype == "Yes/No":
-        # Accept boolean values, 0/1, "Yes"/"No", "True"/"False"
-        if isinstance(value, bool):
-            return True, ""
-        if isinstance(value, (int, float)) and value in [0, 1]:
-            return True, ""
-        if isinstance(value, str):
-            normalized = value.strip().lower()
-            if normalized in ["yes", "no", "true", "false", "1", "0"]:
-                return True, ""
-        return False, f"Value must be Yes/No, True/False, or 0/1, got {value}"
-
-    return True, ""
-
-
-def validate_traffic_volume(df: pd.DataFrame, df_link: pd.DataFrame = None) -> pd.DataFrame:
+
+def validate_traffic_volume(
+    df: pd.DataFrame,
+    df_link: pd.DataFrame = None,
+    missing_link_rows: set = None,
+    duplicate_groups: dict = None,
+    error_budget: int = None,
+    as_report: bool = False,
+) -> pd.DataFrame:
     """
     Validate the TrafficVolume table.
 
@@ -127,8 +35,16 @@ def validate_traffic_volume(df: pd.DataFrame, df_link: pd.DataFrame = None) -> p
     - Record_No: 1-based row number from the input DataFrame
     - Validation_Message: aggregated error message for the row
     If no errors, returns an empty DataFrame with the same shape.
+
+    missing_link_rows: row positions whose Link_No is not in the Link table,
+    already computed by the SQL rule engine; df_link is then not scanned.
+    duplicate_groups: {key columns: row positions per duplicated key value},
+    likewise precomputed.
+    error_budget: stop after this many failures; the report is then
+    marked truncated.
+    as_report: return the ErrorReport itself (compact; the caller renders it).
     """
-    errors: List[pd.Series] = []
+    errors = ErrorReport(df, error_budget)
 
     # Check if database is completely empty - DISABLED FOR NOW
     # if df.empty:
@@ -157,56 +73,33 @@ def validate_traffic_volume(df: pd.DataFrame, df_link: pd.DataFrame = None) -> p
         )
 
     # 2) Check (Link_No, Year) uniqueness → allow multiple Link_No entries across different years
-    if "Link_No" in df.columns and "Year" in df.columns:
-        # Count occurrences of each (Link_No, Year) pair
-        pair_counts = (
-            df.groupby(["Link_No", "Year"]).size()
+    # (the key declared in schema_registry, found in one hash pass)
+    key = SCHEMA.keys[0]
+    groups = (duplicate_groups or {}).get(key)
+    if groups is None:
+        groups = duplicate_key_groups(df, key)
+    duplicates = [pos for group in groups or () for pos in group]
+    if duplicates:
+        errors.add_separate(
+            df.index[duplicates], "unique_key",
+            "Duplicate record for Link_No '{Link_No}' and Year '{Year}' - only one record per link per year is allowed",
+            {"Link_No": df["Link_No"].to_numpy()[duplicates], "Year": df["Year"].to_numpy()[duplicates]},
         )
-        duplicate_pairs = pair_counts[pair_counts > 1].index.tolist()
-        if duplicate_pairs:
-            for link_no, year in duplicate_pairs:
-                duplicate_rows = df[(df["Link_No"] == link_no) & (df["Year"] == year)]
-                for idx, row in duplicate_rows.iterrows():
-                    new_row = row.copy()
-                    new_row["Record_No"] = idx + 1
-                    new_row["Validation_Message"] = (
-                        f"Duplicate record for Link_No '{link_no}' and Year '{year}' - only one record per link per year is allowed"
-                    )
-                    errors.append(new_row)
-
-    # 3) Row-wise validations
-    for idx, row in df.iterrows():
-        row_errors: List[str] = []
-
-        # Required column emptiness check
-        for col in required_columns:
-            if col in df.columns and _is_empty(row[col]):
-                row_errors.append(f"{col} is required")
-
-        # Data type checks for known fields
-        for field_name, field_def in field_definitions.items():
-            if field_name in df.columns:
-                is_valid, msg = validate_data_type(row[field_name], field_name, field_def)
-                if not is_valid:
-                    row_errors.append(f"{field_name}: {msg}")
-
-        # Cross-table validation: Check if Link_No exists in Link table
-        if df_link is not None and "Link_No" in df.columns and "Link_No" in df_link.columns:
-            link_no = row.get("Link_No")
-            if not _is_empty(link_no):
-                if link_no not in df_link["Link_No"].values:
-                    row_errors.append(f"Link_No '{link_no}' does not exist in Link table")
-
-        if row_errors:
-            new_row = row.copy()
-            new_row["Record_No"] = idx + 1
-            new_row["Validation_Message"] = "; ".join(row_errors)
-            errors.append(new_row)
-
-    if errors:
-        return pd.DataFrame(errors, columns=["Record_No"] + list(df.columns) + ["Validation_Message"])
-
-    return pd.DataFrame(columns=["Record_No"] + list(df.columns) + ["Validation_Message"])
+
+    # 3) Row-wise validations; the required and data type checks run column-wise
+    errors.add_checks(checker_plan("TrafficVolume"))
+
+    # Cross-table validation: Link_No must exist in the Link table (one hashed lookup)
+    if missing_link_rows is None and not errors.full and df_link is not None and "Link_No" in df.columns and "Link_No" in df_link.columns:
+        missing_link_rows = LinkIndex.for_frame(df_link).missing_rows(df["Link_No"])
+    missing_links = sorted(missing_link_rows or ())
+
+    # Collected as (row, rule, message template) arrays; messages are rendered with the report frame
+    if missing_links:
+        errors.add(missing_links, "link", "Link_No '{Link_No}' does not exist in Link table",
+                   {"Link_No": df["Link_No"].to_numpy()[missing_links]})
+
+    return errors if as_report else errors.frame()
 
 
 __all__ = [
@@ -0,0 +1,191 @@
+# error_store.py
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Optional, Union
+
+import pandas as pd
+
+from all_table_validations.error_report import FAILURE_COLUMNS, ErrorReport
+from all_table_validations.link_index import link_keys
+
+
+# File name of a run's error store in its workspace (see run_workspace)
+ERRORS_FILE: str = "errors.sqlite"
+
+# Page sizes of ErrorStore.page
+DEFAULT_PAGE_SIZE: int = 100
+MAX_PAGE_SIZE: int = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS errors (
+    id INTEGER PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    record_no TEXT,
+    link_no TEXT,
+    rule TEXT NOT NULL,
+    message TEXT
+);
+CREATE TABLE IF NOT EXISTS run (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# Built once all errors are in (cheaper than maintaining them row by row)
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS errors_table ON errors (table_name, id);
+CREATE INDEX IF NOT EXISTS errors_rule ON errors (table_name, rule, id);
+CREATE INDEX IF NOT EXISTS errors_link ON errors (link_no, id);
+"""
+
+
+def frame_failures(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    FAILURE_COLUMNS of a validator result frame: its attrs["failures"] when
+    the validator lists them, else one failure per row ("columns" for the
+    required-columns row, "row" otherwise).
+    """
+    if "failures" in frame.attrs:
+        return frame.attrs["failures"]
+    if frame.empty:
+        return pd.DataFrame(columns=FAILURE_COLUMNS)
+    missing_columns = (frame["Record_No"] == "N/A").all() if "Record_No" in frame.columns else False
+    return pd.DataFrame({
+        "Record_No": frame["Record_No"].to_numpy() if "Record_No" in frame.columns else None,
+        "Link_No": frame["Link_No"].to_numpy() if "Link_No" in frame.columns else None,
+        "Rule": "columns" if missing_columns else "row",
+        "Validation_Message": frame["Validation_Message"].to_numpy() if "Validation_Message" in frame.columns else None,
+    }, columns=FAILURE_COLUMNS)
+
+
+class ErrorStore:
+    """
+    The failures of one validation run in a SQLite file: one row per failure
+    (table, Record_No, Link_No, rule id, message) plus the run summary, so
+    that errors can be listed page by page without the report, even while
+    later tables are still being validated. Pages use a keyset cursor on the
+    insertion order (tables in report order, rows in table order), filtered
+    by table, rule and Link_No.
+    """
+
+    def __init__(self, path: str, readonly: bool = False):
+        self.path = path
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        else:
+            self._conn = sqlite3.connect(path)
+            self._conn.executescript(_SCHEMA)
+
+    def add(self, table_name: str, result: Union[ErrorReport, pd.DataFrame],
+            df: Optional[pd.DataFrame] = None) -> int:
+        """Store the failures of a validator result (df: its table, for a pickled report)."""
+        failures = result.failures(df) if isinstance(result, ErrorReport) else frame_failures(result)
+        if failures.empty:
+            return 0
+        # Link_No as trimmed text, like the Link table lookups; NULL when empty
+        link_nos = [None] * len(failures)
+        if failures["Link_No"].notna().any():
+            keys = link_keys(failures["Link_No"])
+            link_nos = keys.where(keys != "", None).tolist()
+        rows = zip(
+            [table_name] * len(failures),
+            failures["Record_No"].astype(str).tolist(),
+            link_nos,
+            failures["Rule"].tolist(),
+            failures["Validation_Message"].astype(object).where(failures["Validation_Message"].notna(), None).tolist(),
+        )
+        self._conn.executemany(
+            "INSERT INTO errors (table_name, record_no, link_no, rule, message) VALUES (?, ?, ?, ?, ?)", rows)
+        # Readers see each table as soon as it is stored
+        self._conn.commit()
+        return len(failures)
+
+    def set_summary(self, summary: Dict[str, Any]) -> None:
+        """The run summary (counts, truncated and skipped tables), as JSON."""
+        self._conn.execute("INSERT OR REPLACE INTO run (key, value) VALUES ('summary', ?)",
+                           (json.dumps(summary, default=str),))
+
+    def finish(self, summary: Dict[str, Any]) -> None:
+        """Store the run summary, index the errors and close; the run is then complete."""
+        self.set_summary(summary)
+        self._conn.executescript(_INDEXES)
+        self.close()
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        self._conn.commit()
+        self._conn.close()
+        self._conn = None
+
+    def __enter__(self) -> "ErrorStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    @staticmethod
+    def _where(table: Optional[str], rule: Optional[str], link_no: Optional[str]):
+        conditions, params = [], []
+        for column, value in (("table_name", table), ("rule", rule), ("link_no", link_no)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value.strip() if column == "link_no" else value)
+        return conditions, params
+
+    def page(self, table: Optional[str] = None, rule: Optional[str] = None, link_no: Optional[str] = None,
+             cursor: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+        """
+        Up to limit failures after cursor (None: from the start) matching the
+        filters, the total matching count, and next_cursor (None on the last page).
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        conditions, params = self._where(table, rule, link_no)
+        total = self._conn.execute(
+            "SELECT COUNT(*) FROM errors" + (" WHERE " + " AND ".join(conditions) if conditions else ""),
+            params).fetchone()[0]
+        if cursor is not None:
+            conditions.append("id > ?")
+            params.append(int(cursor))
+        rows = self._conn.execute(
+            "SELECT id, table_name, record_no, link_no, rule, message FROM errors"
+            + (" WHERE " + " AND ".join(conditions) if conditions else "")
+            + " ORDER BY id LIMIT ?", params + [limit + 1]).fetchall()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            "errors": [
+                {"table": table_name, "record_no": record_no, "link_no": link_no, "rule": rule_id, "message": message}
+                for _, table_name, record_no, link_no, rule_id, message in rows
+            ],
+            "count": total,
+            "next_cursor": str(rows[-1][0]) if more else None,
+        }
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Failures per table and rule id."""
+        counts: Dict[str, Dict[str, int]] = {}
+        for table_name, rule_id, count in self._conn.execute(
+                "SELECT table_name, rule, COUNT(*) FROM errors GROUP BY table_name, rule ORDER BY MIN(id)"):
+            counts.setdefault(table_name, {})[rule_id] = count
+        return counts
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT value FROM run WHERE key = 'summary'").fetchone()
+        return json.loads(row[0]) if row else None
+
+
+def open_store(directory: str) -> Optional[ErrorStore]:
+    """The error store of a run's workspace directory, read-only; None when the run kept none."""
+    path = os.path.join(directory, ERRORS_FILE)
+    if not os.path.exists(path):
+        return None
+    return ErrorStore(path, readonly=True)
+
+
+__all__ = [
+    "ERRORS_FILE",
+    "DEFAULT_PAGE_SIZE",
+    "MAX_PAGE_SIZE",
+    "ErrorStore",
+    "frame_failures",
+    "open_store",
+]
@@ -1,8 +1,12 @@
 import os as _os
-import subprocess as _subprocess
-import io as _io
+import sys as _sys
 import pandas as _pd
 
+# Make the sibling helper modules (table_extraction, all_table_validations, ...) importable
+_SCRIPT_DIR = _os.path.dirname(_os.path.abspath(__file__))
+if _SCRIPT_DIR not in _sys.path:
+    _sys.path.insert(0, _SCRIPT_DIR)
+
 def _read_link_table_cross_platform(db_path: str) -> _pd.DataFrame:
     try:
         if _os.name == 'nt':
@@ -18,17 +22,18 @@ def _read_link_table_cross_platform(db_path: str) -> _pd.DataFrame:
                 conn.close()
             return df
         else:
-            result = _subprocess.run(['mdb-export', db_path, 'Link'], capture_output=True, text=True, check=True)
-            df = _pd.read_csv(_io.StringIO(result.stdout))
+            from table_extraction import stream_mdb_export
+            df = stream_mdb_export(db_path, 'Link')
             cols = [c for c in df.columns if c in ['Province_Code','Kabupaten_Code']]
             return df[cols] if cols else _pd.DataFrame(columns=['Province_Code','Kabupaten_Code'])
     except Exception:
         return _pd.DataFrame(columns=['Province_Code','Kabupaten_Code'])
 
-def check_admcode_in_link_table(db_path: str, adm_code: str) -> dict:
+def check_admcode_in_link_table(db_path: str, adm_code: str, df_link: _pd.DataFrame = None) -> dict:
     """
     Verify that adm_code (format 'PP-KK') exists in Link table by matching Province_Code==PP
     and Kabupaten_Code==KK, treating '0' and '00' as equivalent and ignoring leading zeros.
+    Pass an already extracted Link table as df_link to avoid reading it again.
     Returns: {success, exists, matched_rows, message}
     """
     try:
@@ -45,7 +50,7 @@ def check_admcode_in_link_table(db_path: str, adm_code: str) -> dict:
                 except Exception: return None
         prov_int = norm_to_int(prov_part)
         kab_int = norm_to_int(kab_part)
-        df = _read_link_table_cross_platform(db_path)
+        df = df_link if df_link is not None else _read_link_table_cross_platform(db_path)
         if df.empty:
             return {'success': False, 'exists': False, 'matched_rows': 0, 'message': 'Link table empty or unreadable'}
         df_norm = _pd.DataFrame({
@@ -69,24 +74,166 @@ def check_admcode_in_link_table(db_path: str, adm_code: str) -> dict:
         return {'success': False, 'exists': False, 'matched_rows': 0, 'message': str(ex)}
 
 
-def runValidationScript(db_path , admCode):
+def admcode_row_filter(adm_code: str) -> dict:
+    """
+    Turn adm_code 'PP-KK' into a {Province_Code, Kabupaten_Code} row filter
+    for extract_tables. Like check_admcode_in_link_table, codes match
+    regardless of leading zeros ('18-01' selects Kabupaten_Code 1 or '1').
+    Returns None for a malformed adm_code.
+    """
+    if not adm_code or '-' not in adm_code:
+        return None
+    prov_part, kab_part = [p.strip() for p in adm_code.split('-', 1)]
+    if not prov_part or not kab_part:
+        return None
+    return {'Province_Code': prov_part, 'Kabupaten_Code': kab_part}
+
+
+# Validator module for each extracted table
+_VALIDATOR_MODULES = {
+    "Link": "validate_link",
+    "Alignment": "validate_alignment",
+    "RoadCondition": "validate_road_condition",
+    "RoadInventory": "validate_road_inventory",
+    "BridgeInventory": "validate_bridge_inventory",
+    "CulvertCondition": "validate_culvert_condition",
+    "CulvertInventory": "validate_culvert_inventory",
+    "RetainingWallCondition": "validate_retaining_wall_condition",
+    "RetainingWallInventory": "validate_retaining_wall_inventory",
+    "TrafficVolume": "validate_traffic_volume",
+    "CODE_AN_UnitCostsPER": "validate_code_an_unitCostsPER",
+    "CODE_AN_UnitCostsPERUnpaved": "validate_code_an_unitCostsPERUnpaved",
+    "CODE_AN_UnitCostsREH": "validate_code_an_unitCostsREH",
+    "CODE_AN_UnitCostsRIGID": "validate_code_an_unitCostsRIGID",
+    "CODE_AN_UnitCostsRM": "validate_code_an_unitCostsRm",
+    "CODE_AN_UnitCostsWidening": "validate_code_an_unitCostsWidening",
+}
+
+
+# Validator function for each table and whether it also takes the Link frame
+# (BridgeInventory validation is currently disabled)
+_VALIDATOR_FUNCTIONS = {
+    "Link": ("validate_link", False),
+    "Alignment": ("validate_alignment", True),
+    "RoadCondition": ("validate_road_condition", True),
+    "RoadInventory": ("validate_road_inventory", True),
+    "CulvertCondition": ("validate_culvert_condition", True),
+    "CulvertInventory": ("validate_culvert_inventory", True),
+    "RetainingWallCondition": ("validate_retaining_wall_condition", True),
+    "RetainingWallInventory": ("validate_retaining_wall_inventory", True),
+    "TrafficVolume": ("validate_traffic_volume", True),
+    "CODE_AN_UnitCostsPER": ("validate_code_an_unit_costs_per", False),
+    "CODE_AN_UnitCostsPERUnpaved": ("validate_code_an_unit_costs_per_unpaved", False),
+    "CODE_AN_UnitCostsREH": ("validate_code_an_unit_costs_reh", False),
+    "CODE_AN_UnitCostsRIGID": ("validate_code_an_unit_costs_rigid", False),
+    "CODE_AN_UnitCostsRM": ("validate_code_an_unit_costs_rm", False),
+    "CODE_AN_UnitCostsWidening": ("validate_code_an_unit_costs_widening", False),
+}
+
+
+# Validators that hand back their compact ErrorReport (as_report=True), rendered
+# here when the report is written; the Link validator builds its rows itself
+_COMPACT_RESULTS = frozenset(_VALIDATOR_FUNCTIONS) - {"Link"}
+
+
+def marker_frame(columns, record_no: str, message: str) -> _pd.DataFrame:
+    """A one-row sheet body (like the NO_ERRORS rows) for the given table columns."""
+    row = {"Record_No": record_no}
+    for col in columns:
+        row[col] = ""
+    row["Validation_Message"] = message
+    return _pd.DataFrame([row])
+
+
+def validation_columns() -> dict:
+    """
+    Columns each validated table declares in the schema registry (required
+    columns, field definitions and keys), used as the read projection:
+    {table: [columns]}.
+    """
+    from all_table_validations.schema_registry import get_schema
+    return {table_name: get_schema(table_name).columns() for table_name in _VALIDATOR_MODULES}
+
+
+def prepare_validation(db_path, admCode, report_format=None, max_workers=None, cache_dir=None,
+                       cache_max_bytes=None, filter_by_admcode=False) -> dict:
+    """
+    The steps of runValidationScript that come before any sheet is written:
+    check the report format, extract every validated table once and match
+    adm_code against the Link table. Returns {success: True, tables, cache}
+    to pass on as runValidationScript(prepared=...), or the run's failure
+    result, so a streamed run can fail before its response starts.
+    """
+    from table_extraction import VALIDATION_TABLES, extract_tables
+    from snapshot_cache import SnapshotCache, parquet_available
+    from report_writer import DEFAULT_REPORT_FORMAT, REPORT_FORMATS
+
+    # Report format: xlsx (default), csv (zip of CSVs), parquet (zip of Parquet files) or jsonl
+    report_format = report_format or DEFAULT_REPORT_FORMAT
+    if report_format not in REPORT_FORMATS:
+        return {
+            "success": False,
+            "message": f"❌ Unknown report format '{report_format}' (expected one of: {', '.join(REPORT_FORMATS)})"
+        }
+    if report_format == "parquet" and not parquet_available():
+        return {"success": False, "message": "❌ Parquet reports require pyarrow, which is not installed"}
+
+    # === Extract every table once (bounded parallel readers, optional snapshot cache) ===
+    # Only the columns the validators declare are read; with filter_by_admcode,
+    # only the rows of the submitted Province/Kabupaten as well.
+    print("db path ", db_path)
+    cache = SnapshotCache(cache_dir, cache_max_bytes) if cache_dir else None
+    row_filter = admcode_row_filter(admCode) if filter_by_admcode else None
+    tables = extract_tables(db_path, VALIDATION_TABLES, max_workers=max_workers, cache=cache,
+                            columns=validation_columns(), row_filter=row_filter)
+
+    # An unreadable file has an empty Link table, so it fails here as well
+    if not check_admcode_in_link_table(db_path, admCode, df_link=tables["Link"])['exists']:
+        return {
+            "success": False,
+            "message": f"❌ Validation failed: adm_code '{admCode}'  Admin Code must match with the inputed Db_File"
+        }
+    return {"success": True, "tables": tables, "cache": cache.stats() if cache else None}
+
+
+def runValidationScript(db_path , admCode, max_workers=None, cache_dir=None, cache_max_bytes=None,
+                        filter_by_admcode=False, sql_engine=None, validation_workers=None,
+                        kabupaten_extents=None, error_budget=None, table_error_budget=None, fail_fast=False,
+                        output_dir=None, report_format=None, report_writer=None, errors_path=None,
+                        prepared=None):
     import os
     import sys
     import pandas as pd
-    from openpyxl import load_workbook
-    from openpyxl.utils import get_column_letter
 
     # Add the Scripts directory to Python path to resolve imports
     script_dir = os.path.dirname(os.path.abspath(__file__))
     if script_dir not in sys.path:
         sys.path.insert(0, script_dir)
 
-    check_admcode_in_link_table(db_path, admCode)
-    if not check_admcode_in_link_table(db_path, admCode)['exists']:
-        return {
-            "success": False,
-            "message": f"❌ Validation failed: adm_code '{admCode}'  Admin Code must match with the inputed Db_File"
-        }
+    from sql_engine import SqlRuleEngine
+    from validation_pool import ValidatorPool
+    from report_writer import DEFAULT_REPORT_FORMAT, REPORT_FORMATS
+    from error_store import ErrorStore
+    from all_table_validations.schema_registry import get_schema
+    from all_table_validations.geo import load_kabupaten_extents
+    from all_table_validations.foreign_keys import find_orphans
+    from all_table_validations.error_report import ErrorReport, rule_counts
+
+    # Format check, table extraction and adm_code check; a caller that has
+    # already run prepare_validation for these arguments passes its result
+    if prepared is None:
+        prepared = prepare_validation(db_path, admCode, report_format=report_format, max_workers=max_workers,
+                                      cache_dir=cache_dir, cache_max_bytes=cache_max_bytes,
+                                      filter_by_admcode=filter_by_admcode)
+    if not prepared["success"]:
+        # The run is complete (and failed) for the errors API as well
+        if errors_path:
+            ErrorStore(errors_path).finish(prepared)
+        return prepared
+    report_format = report_format or DEFAULT_REPORT_FORMAT
+    report_spec = REPORT_FORMATS[report_format]
+    tables = prepared["tables"]
+    cache_stats = prepared["cache"]
 
     # id_columns = ["Province_Code", "Kabupaten_Code", "Link_No", "Link_Code"]
 
@@ -107,124 +254,146 @@ def runValidationScript(db_path , admCode):
     #             df[col] = df[col].astype(str)
 
     
-    from all_table_validations.validate_link import required_columns as link_required, validate_row as validate_link_row
-    from all_table_validations.validate_alignment import required_columns as align_required, validate_alignment
-    from all_table_validations.validate_road_condition import required_columns as road_required, validate_road_condition
-    from all_table_validations.validate_road_inventory import required_columns as inventory_required, validate_road_inventory
-    from all_table_validations.validate_bridge_inventory import required_columns as bridge_required, validate_row as validate_bridge_row
-    from all_table_validations.validate_culvert_condition import required_columns as culvert_required, validate_culvert_condition
-    from all_table_validations.validate_culvert_inventory import required_columns as culvert_inventory_required, validate_culvert_inventory
-    from all_table_validations.validate_retaining_wall_condition import required_columns as retaining_wall_required, validate_retaining_wall_condition
-    from all_table_validations.validate_retaining_wall_inventory import required_columns as retaining_wall_inventory_required, validate_retaining_wall_inventory
-    from all_table_validations.validate_traffic_volume import required_columns as traffic_volume_required, validate_traffic_volume
-    from all_table_validations.validate_code_an_unitCostsPER import required_columns as unit_costs_required, validate_code_an_unit_costs_per
-    from all_table_validations.validate_code_an_unitCostsPERUnpaved import required_columns as unit_costs_unpaved_required, validate_code_an_unit_costs_per_unpaved
-    from all_table_validations.validate_code_an_unitCostsREH import required_columns as unit_costs_reh_required, validate_code_an_unit_costs_reh
-    from all_table_validations.validate_code_an_unitCostsRIGID import required_columns as unit_costs_rigid_required, validate_code_an_unit_costs_rigid
-    from all_table_validations.validate_code_an_unitCostsRm import required_columns as unit_costs_rm_required, validate_code_an_unit_costs_rm
-    from all_table_validations.validate_code_an_unitCostsWidening import required_columns as unit_costs_widening_required, validate_code_an_unit_costs_widening
-
-    # === Cross-platform Database connection ===
-    print("db path ", db_path)
-    
-    # Detect operating system and use appropriate method
-    if os.name == 'nt':  # Windows
-        import pyodbc
-        conn_str = (
-            r'DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};'
-            f'DBQ={db_path};'
-        )
-        conn = pyodbc.connect(conn_str)
-        
-        def get_all_tables(conn):
-            """
-            Get all table names from the database (Windows)
-            """
-            cursor = conn.cursor()
-            tables = []
-            for row in cursor.tables():
-                if row.table_type == 'TABLE':
-                    tables.append(row.table_name)
-            cursor.close()
-            return tables
-            
-    else:  # Linux/Unix
-        import subprocess
-        import tempfile
-        
-        def get_all_tables(conn):
-            """
-            Get all table names from the database (Linux using MDBTools)
-            """
-            try:
-                result = subprocess.run(['mdb-tables', '-1', db_path], 
-                                      capture_output=True, text=True, check=True)
-                tables = [table.strip() for table in result.stdout.split('\n') if table.strip()]
-                return tables
-            except subprocess.CalledProcessError as e:
-                print(f"Error getting tables: {e}")
-                return []
-        
-        def execute_query(query, db_path):
-            """
-            Execute SQL query using MDBTools on Linux
-            """
-            try:
-                # Use mdb-sql to execute the query
-                result = subprocess.run(['mdb-sql', db_path, query], 
-                                      capture_output=True, text=True, check=True)
-                return result.stdout
-            except subprocess.CalledProcessError as e:
-                print(f"Error executing query: {e}")
-                return None
-        
-        def read_sql_query(query, db_path):
-            """
-            Read SQL query and return pandas DataFrame (Linux)
-            """
-            try:
-                # Use mdb-export to export table data
-                if 'SELECT * FROM' in query.upper():
-                    # Extract table name from SELECT * FROM [TableName]
-                    table_name = query.split('[')[1].split(']')[0]
-                    result = subprocess.run(['mdb-export', db_path, table_name], 
-                                          capture_output=True, text=True, check=True)
-                    
-                    # Parse CSV output
-                    import io
-                    df = pd.read_csv(io.StringIO(result.stdout))
-                    return df
-                else:
-                    # For other queries, use mdb-sql
-                    output = execute_query(query, db_path)
-                    if output:
-                        # Parse the output (this is a simplified approach)
-                        lines = output.strip().split('\n')
-                        if len(lines) > 1:
-                            headers = lines[0].split('|')
-                            data = [line.split('|') for line in lines[1:] if line.strip()]
-                            return pd.DataFrame(data, columns=headers)
-                    return pd.DataFrame()
-            except Exception as e:
-                print(f"Error reading SQL query: {e}")
-                return pd.DataFrame()
-
-    # Output setup
-    output_folder = "validation_outputs"
+    from all_table_validations.validate_link import required_columns as link_required
+    from all_table_validations.validate_alignment import required_columns as align_required
+    from all_table_validations.validate_road_condition import required_columns as road_required
+    from all_table_validations.validate_road_inventory import required_columns as inventory_required
+    from all_table_validations.validate_bridge_inventory import required_columns as bridge_required
+    from all_table_validations.validate_culvert_condition import required_columns as culvert_required
+    from all_table_validations.validate_culvert_inventory import required_columns as culvert_inventory_required
+    from all_table_validations.validate_retaining_wall_condition import required_columns as retaining_wall_required
+    from all_table_validations.validate_retaining_wall_inventory import required_columns as retaining_wall_inventory_required
+    from all_table_validations.validate_traffic_volume import required_columns as traffic_volume_required
+    from all_table_validations.validate_code_an_unitCostsPER import required_columns as unit_costs_required
+    from all_table_validations.validate_code_an_unitCostsPERUnpaved import required_columns as unit_costs_unpaved_required
+    from all_table_validations.validate_code_an_unitCostsREH import required_columns as unit_costs_reh_required
+    from all_table_validations.validate_code_an_unitCostsRIGID import required_columns as unit_costs_rigid_required
+    from all_table_validations.validate_code_an_unitCostsRm import required_columns as unit_costs_rm_required
+    from all_table_validations.validate_code_an_unitCostsWidening import required_columns as unit_costs_widening_required
+
+    # === Optional SQL engine for the set-based rules (Link_No existence, duplicate and foreign keys) ===
+    rules = SqlRuleEngine(tables, sql_engine) if sql_engine else None
+    if rules is not None:
+        print(f"🗄️ Running cross-table rules in {rules.backend}")
+
+    # Registered kabupaten extents (CSV) for the Alignment GPS checks; without
+    # them the points are checked against their kabupaten's median point
+    extents = load_kabupaten_extents(kabupaten_extents) if kabupaten_extents else None
+
+    # === Validators: run inline in report order, or concurrently in worker processes ===
+    # Every validator is queued at the start of the try block below; each
+    # table section then collects its result in report order.
+    validators = ValidatorPool(tables["Link"], validation_workers)
+    if validators.parallel:
+        print(f"⚙️ Running validators in {validation_workers} worker processes")
+
+    # Exact counts per table: report rows, and failures per rule id
+    report_rows = {}
+    rule_summary = {}
+
+    # Error budgets (0/None = unlimited): a validator stops once its table has
+    # table_error_budget failures or the run error_budget is used up, and its
+    # sheet is marked truncated. Once the run budget is used up, or with
+    # fail_fast after the first table with errors, the remaining tables are
+    # not validated and their sheets say so.
+    error_budget = error_budget or None
+    table_error_budget = table_error_budget or None
+    if error_budget is not None:
+        table_error_budget = min(table_error_budget or error_budget, error_budget)
+    failures = 0
+    stopped = None
+    truncated_tables = []
+    skipped_tables = []
+
+    def table_result(table_name):
+        """The report frame of a table; compact results are rendered only now."""
+        nonlocal failures, stopped
+        if stopped:
+            validators.discard(table_name)
+            skipped_tables.append(table_name)
+            return marker_frame(tables[table_name].columns, "SKIPPED",
+                                f"⏭️ SKIPPED: {table_name} table not validated - {stopped}")
+
+        budget = table_error_budget
+        if error_budget is not None:
+            budget = min(budget, error_budget - failures)
+        # Inline validators start only now and get the remaining budget;
+        # worker results are cut to it afterwards
+        result = validators.result(table_name, **({"error_budget": budget} if budget is not None else {}))
+        if isinstance(result, ErrorReport) and budget is not None:
+            result.limit(budget)
+        counts = rule_counts(result)
+        rule_summary[table_name] = counts
+        if store is not None:
+            store.add(table_name, result, tables[table_name])
+        failures += sum(counts.values())
+        if isinstance(result, ErrorReport):
+            result = result.frame(tables[table_name])
+        report_rows[table_name] = len(result)
+
+        if result.attrs.get("truncated"):
+            truncated_tables.append(table_name)
+            attrs = dict(result.attrs)
+            marker = marker_frame([col for col in result.columns if col not in ("Record_No", "Validation_Message")],
+                                  "TRUNCATED", f"⚠️ TRUNCATED: error budget reached - validation of the "
+                                  f"{table_name} table stopped after {sum(counts.values())} errors")
+            result = pd.concat([result, marker], ignore_index=True)
+            result.attrs.update(attrs)
+        if fail_fast and report_rows[table_name]:
+            stopped = f"fail-fast: the {table_name} table has errors"
+        elif error_budget is not None and failures >= error_budget:
+            stopped = f"the error budget of {error_budget} is used up"
+        return result
+
+    # Output setup: the run's own workspace directory (see run_workspace), or
+    # validation_outputs under the working directory
+    output_folder = output_dir or "validation_outputs"
     os.makedirs(output_folder, exist_ok=True)
-    output_excel = os.path.join(output_folder, "link_validation.xlsx")
+    output_excel = os.path.join(output_folder, report_spec.file_name)
+
+    # Sheets are written as soon as their table is validated: to the report
+    # file, or to report_writer (an open writer of report_format, e.g. one
+    # streaming the report to the client), which the caller closes
+    owns_writer = report_writer is None
+    writer = None
+
+    # Every failure of the run (rule id, Record_No, Link_No, message) is also
+    # kept in a SQLite error store at errors_path, for the paginated errors API
+    store = ErrorStore(errors_path) if errors_path else None
 
     try:
+        for table_name, (func_name, with_link) in _VALIDATOR_FUNCTIONS.items():
+            kwargs = {}
+            if with_link and rules is not None:
+                kwargs["missing_link_rows"] = rules.missing_link_rows(table_name)
+            keys = get_schema(table_name).keys
+            if keys and rules is not None:
+                kwargs["duplicate_groups"] = {key: rules.duplicate_key_rows(table_name, list(key)) for key in keys}
+            # Foreign keys need the parent table, so they are joined here rather than in the validator
+            references = get_schema(table_name).references
+            if references and rules is not None:
+                kwargs["orphan_rows"] = {
+                    ref.parent: rules.orphan_rows(table_name, ref.columns, ref.parent, ref.parent_columns)
+                    for ref in references
+                }
+            elif references:
+                kwargs["orphan_rows"] = find_orphans(tables, table_name, references)
+            if table_name == "Alignment" and extents:
+                kwargs["kabupaten_extents"] = extents
+            if table_name in _COMPACT_RESULTS:
+                kwargs["as_report"] = True
+            if table_error_budget is not None:
+                kwargs["error_budget"] = table_error_budget
+            validators.submit(table_name, _VALIDATOR_MODULES[table_name], func_name, tables[table_name],
+                              with_link=with_link, **kwargs)
+
+        writer = report_spec.writer(output_excel) if owns_writer else report_writer
+
         # ---------------- LINK TABLE VALIDATION ---------------- 
         print("🔍 Starting Link table validation...")
         
         # Link table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_link = pd.read_sql_query("SELECT * FROM [Link]", conn)
-        else:  # Linux
-            df_link = read_sql_query("SELECT * FROM [Link]", db_path)
-        
-        df_link = df_link.fillna("")
+        df_link = tables["Link"]
         
         # Check for missing columns
         missing_cols = [col for col in link_required if col not in df_link.columns]
@@ -232,53 +401,20 @@ def runValidationScript(db_path , admCode):
             raise ValueError(f"❌ Link table missing columns: {', '.join(missing_cols)}")
 
         # Apply comprehensive validation rules
-        invalid_rows_link = []
-        for idx, row in df_link.iterrows():
-            # Get validation errors from the comprehensive validation function
-            errors = validate_link_row(row)
-            
-            if errors:
-                # Create a row with validation results
-                new_row = {"Record_No": idx + 1}
-                
-                # Add all required columns with their values
-                for col in link_required:
-                    if col in df_link.columns:
-                        cell_value = str(row[col]).strip()
-                        if cell_value == "" or cell_value == "nan" or cell_value == "None":
-                            new_row[col] = "missing"
-                        else:
-                            new_row[col] = row[col]
-                    else:
-                        new_row[col] = "missing"
-                
-                # Add validation message
-                validation_messages = []
-                for col, error_msg in errors.items():
-                    if col in link_required:
-                        validation_messages.append(f"{col}: {error_msg}")
-                
-                new_row["Validation_Message"] = "; ".join(validation_messages)
-                invalid_rows_link.append(new_row)
+        invalid_df_link = table_result("Link")
 
         # If no validation errors found, add a success message
-        if not invalid_rows_link:
+        if invalid_df_link.empty:
             success_row = {"Record_No": "NO_ERRORS", "Province_Code": "", "Kabupaten_Code": "", "Link_No": "", "Link_Code": "", "Link_Name": "", "Link_Length_Official": "", "Link_Length_Actual": "", "Validation_Message": "✅ SUCCESS: No validation errors found in Link table"}
-            invalid_rows_link.append(success_row)
-            invalid_df_link = pd.DataFrame(invalid_rows_link)
-        else:
-            invalid_df_link = pd.DataFrame(invalid_rows_link)
+            invalid_df_link = pd.DataFrame([success_row])
+
+        writer.add_sheet("Link", invalid_df_link)
 
         # ---------------- ALIGNMENT TABLE VALIDATION ---------------- 
         print("🔍 Starting Alignment table validation...")
         
         # Alignment table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_alignment = pd.read_sql_query("SELECT * FROM [Alignment]", conn)
-        else:  # Linux
-            df_alignment = read_sql_query("SELECT * FROM [Alignment]", db_path)
-        
-        df_alignment = df_alignment.fillna("")
+        df_alignment = tables["Alignment"]
         
         # Check for missing columns
         missing_cols = [col for col in align_required if col not in df_alignment.columns]
@@ -286,7 +422,7 @@ def runValidationScript(db_path , admCode):
             raise ValueError(f"❌ Alignment table missing columns: {', '.join(missing_cols)}")
 
         # Apply comprehensive validation rules (includes cross-table validation with Link table)
-        invalid_df_alignment = validate_alignment(df_alignment, df_link)
+        invalid_df_alignment = table_result("Alignment")
         
         # If no validation errors found, add a success message
         if invalid_df_alignment.empty:
@@ -296,16 +432,13 @@ def runValidationScript(db_path , admCode):
             success_row["Validation_Message"] = "✅ SUCCESS: No validation errors found in Alignment table"
             invalid_df_alignment = pd.DataFrame([success_row])
 
+        writer.add_sheet("Alignment", invalid_df_alignment)
+
         # ---------------- ROAD CONDITION TABLE VALIDATION ---------------- 
         print("🔍 Starting RoadCondition table validation...")
         
         # RoadCondition table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_road_condition = pd.read_sql_query("SELECT * FROM [RoadCondition]", conn)
-        else:  # Linux
-            df_road_condition = read_sql_query("SELECT * FROM [RoadCondition]", db_path)
-        
-        df_road_condition = df_road_condition.fillna("")
+        df_road_condition = tables["RoadCondition"]
 
         # Check for missing columns
         missing_cols = [col for col in road_required if col not in df_road_condition.columns]
@@ -313,7 +446,8 @@ def runValidationScript(db_path , admCode):
             raise ValueError(f"❌ RoadCondition table missing columns: {', '.join(missing_cols)}")
 
         # Apply comprehensive validation rules
-        invalid_df_road_condition = validate_road_condition(df_road_condition, df_link)
+        invalid_df_road_condition = table_result("RoadCondition")
+        road_condition_coverage = invalid_df_road_condition.attrs.get("coverage")
         
         # If no validation errors found, add a success message
         if invalid_df_road_condition.empty:
@@ -323,16 +457,13 @@ def runValidationScript(db_path , admCode):
             success_row["Validation_Message"] = "✅ SUCCESS: No validation errors found in RoadCondition table"
             invalid_df_road_condition = pd.DataFrame([success_row])
 
+        writer.add_sheet("RoadCondition", invalid_df_road_condition)
+
         # ---------------- ROAD INVENTORY TABLE VALIDATION ---------------- 
         print("🔍 Starting RoadInventory table validation...")
         
         # RoadInventory table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_road_inventory = pd.read_sql_query("SELECT * FROM [RoadInventory]", conn)
-        else:  # Linux
-            df_road_inventory = read_sql_query("SELECT * FROM [RoadInventory]", db_path)
-        
-        df_road_inventory = df_road_inventory.fillna("")
+        df_road_inventory = tables["RoadInventory"]
 
         # Check for missing columns
         missing_cols = [col for col in inventory_required if col not in df_road_inventory.columns]
@@ -340,7 +471,8 @@ def runValidationScript(db_path , admCode):
             raise ValueError(f"❌ RoadInventory table missing columns: {', '.join(missing_cols)}")
 
         # Apply comprehensive validation rules
-        invalid_df_road_inventory = validate_road_inventory(df_road_inventory, df_link)
+        invalid_df_road_inventory = table_result("RoadInventory")
+        road_inventory_coverage = invalid_df_road_inventory.attrs.get("coverage")
         
         # If no validation errors found, add a success message
         if invalid_df_road_inventory.empty:
@@ -350,16 +482,18 @@ def runValidationScript(db_path , admCode):
             success_row["Validation_Message"] = "✅ SUCCESS: No validation errors found in RoadInventory table"
             invalid_df_road_inventory = pd.DataFrame([success_row])
 
+        writer.add_sheet("RoadInventory", invalid_df_road_inventory)
+        # Per-link coverage from the interval sweep of the segment tables
+        if road_condition_coverage is not None:
+            writer.add_sheet("RoadCondition_Coverage", road_condition_coverage)
+        if road_inventory_coverage is not None:
+            writer.add_sheet("RoadInventory_Coverage", road_inventory_coverage)
+
         # ---------------- BRIDGE INVENTORY TABLE VALIDATION ---------------- 
         print("🔍 Starting BridgeInventory table validation... (TEMPORARILY DISABLED)")
         
         # BridgeInventory table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_bridge_inventory = pd.read_sql_query("SELECT * FROM [BridgeInventory]", conn)
-        else:  # Linux
-            df_bridge_inventory = read_sql_query("SELECT * FROM [BridgeInventory]", db_path)
-        
-        df_bridge_inventory = df_bridge_inventory.fillna("")
+        df_bridge_inventory = tables["BridgeInventory"]
 
         # Check if table is completely empty - DISABLED FOR NOW
         # is_empty = len(df_bridge_inventory) == 0
@@ -413,16 +547,13 @@ def runValidationScript(db_path , admCode):
         # Since bridge validation is disabled, we already have a success row
         invalid_df_bridge_inventory = pd.DataFrame(invalid_rows_bridge)
 
+        writer.add_sheet("BridgeInventory", invalid_df_bridge_inventory)
+
         # ---------------- CULVERT CONDITION TABLE VALIDATION ---------------- 
         print("🔍 Starting CulvertCondition table validation...")
         
         # CulvertCondition table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_culvert_condition = pd.read_sql_query("SELECT * FROM [CulvertCondition]", conn)
-        else:  # Linux
-            df_culvert_condition = read_sql_query("SELECT * FROM [CulvertCondition]", db_path)
-        
-        df_culvert_condition = df_culvert_condition.fillna("")
+        df_culvert_condition = tables["CulvertCondition"]
 
         # Check for missing columns
         missing_cols = [col for col in culvert_required if col not in df_culvert_condition.columns]
@@ -430,7 +561,7 @@ def runValidationScript(db_path , admCode):
             raise ValueError(f"❌ CulvertCondition table missing columns: {', '.join(missing_cols)}")
 
         # Apply comprehensive validation rules
-        invalid_df_culvert_condition = validate_culvert_condition(df_culvert_condition, df_link)
+        invalid_df_culvert_condition = table_result("CulvertCondition")
         
         # If no validation errors found, add a success message
         if invalid_df_culvert_condition.empty:
@@ -440,16 +571,13 @@ def runValidationScript(db_path , admCode):
             success_row["Validation_Message"] = "✅ SUCCESS: No validation errors found in CulvertCondition table"
             invalid_df_culvert_condition = pd.DataFrame([success_row])
 
+        writer.add_sheet("CulvertCondition", invalid_df_culvert_condition)
+
         # ---------------- CULVERT INVENTORY TABLE VALIDATION ---------------- 
         print("🔍 Starting CulvertInventory table validation...")
         
         # CulvertInventory table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_culvert_inventory = pd.read_sql_query("SELECT * FROM [CulvertInventory]", conn)
-        else:  # Linux
-            df_culvert_inventory = read_sql_query("SELECT * FROM [CulvertInventory]", db_path)
-        
-        df_culvert_inventory = df_culvert_inventory.fillna("")
+        df_culvert_inventory = tables["CulvertInventory"]
 
         # Check for missing columns
         missing_cols = [col for col in culvert_inventory_required if col not in df_culvert_inventory.columns]
@@ -457,7 +585,7 @@ def runValidationScript(db_path , admCode):
             raise ValueError(f"❌ CulvertInventory table missing columns: {', '.join(missing_cols)}")
 
         # Apply comprehensive validation rules
-        invalid_df_culvert_inventory = validate_culvert_inventory(df_culvert_inventory, df_link)
+        invalid_df_culvert_inventory = table_result("CulvertInventory")
         
         # If no validation errors found, add a success message
         if invalid_df_culvert_inventory.empty:
@@ -467,16 +595,13 @@ def runValidationScript(db_path , admCode):
             success_row["Validation_Message"] = "✅ SUCCESS: No validation errors found in CulvertInventory table"
             invalid_df_culvert_inventory = pd.DataFrame([success_row])
 
+        writer.add_sheet("CulvertInventory", invalid_df_culvert_inventory)
+
         # ---------------- RETAINING WALL CONDITION TABLE VALIDATION ---------------- 
         print("🔍 Starting RetainingWallCondition table validation...")
         
         # RetainingWallCondition table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_retaining_wall_condition = pd.read_sql_query("SELECT * FROM [RetainingWallCondition]", conn)
-        else:  # Linux
-            df_retaining_wall_condition = read_sql_query("SELECT * FROM [RetainingWallCondition]", db_path)
-        
-        df_retaining_wall_condition = df_retaining_wall_condition.fillna("")
+        df_retaining_wall_condition = tables["RetainingWallCondition"]
 
         # Check for missing columns
         missing_cols = [col for col in retaining_wall_required if col not in df_retaining_wall_condition.columns]
@@ -484,7 +609,7 @@ def runValidationScript(db_path , admCode):
             raise ValueError(f"❌ RetainingWallCondition table missing columns: {', '.join(missing_cols)}")
 
         # Apply comprehensive validation rules
-        invalid_df_retaining_wall_condition = validate_retaining_wall_condition(df_retaining_wall_condition, df_link)
+        invalid_df_retaining_wall_condition = table_result("RetainingWallCondition")
         
         # If no validation errors found, add a success message
         if invalid_df_retaining_wall_condition.empty:
@@ -494,16 +619,13 @@ def runValidationScript(db_path , admCode):
             success_row["Validation_Message"] = "✅ SUCCESS: No validation errors found in RetainingWallCondition table"
             invalid_df_retaining_wall_condition = pd.DataFrame([success_row])
 
+        writer.add_sheet("RetainingWallCondition", invalid_df_retaining_wall_condition)
+
         # ---------------- RETAINING WALL INVENTORY TABLE VALIDATION ---------------- 
         print("🔍 Starting RetainingWallInventory table validation...")
         
         # RetainingWallInventory table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_retaining_wall_inventory = pd.read_sql_query("SELECT * FROM [RetainingWallInventory]", conn)
-        else:  # Linux
-            df_retaining_wall_inventory = read_sql_query("SELECT * FROM [RetainingWallInventory]", db_path)
-        
-        df_retaining_wall_inventory = df_retaining_wall_inventory.fillna("")
+        df_retaining_wall_inventory = tables["RetainingWallInventory"]
 
         # Check for missing columns
         missing_cols = [col for col in retaining_wall_inventory_required if col not in df_retaining_wall_inventory.columns]
@@ -511,7 +633,7 @@ def runValidationScript(db_path , admCode):
             raise ValueError(f"❌ RetainingWallInventory table missing columns: {', '.join(missing_cols)}")
 
         # Apply comprehensive validation rules
-        invalid_df_retaining_wall_inventory = validate_retaining_wall_inventory(df_retaining_wall_inventory, df_link)
+        invalid_df_retaining_wall_inventory = table_result("RetainingWallInventory")
         
         # If no validation errors found, add a success message
         if invalid_df_retaining_wall_inventory.empty:
@@ -521,16 +643,13 @@ def runValidationScript(db_path , admCode):
             success_row["Validation_Message"] = "✅ SUCCESS: No validation errors found in RetainingWallInventory table"
             invalid_df_retaining_wall_inventory = pd.DataFrame([success_row])
 
+        writer.add_sheet("RetainingWallInventory", invalid_df_retaining_wall_inventory)
+
         # ---------------- TRAFFIC VOLUME TABLE VALIDATION ---------------- 
         print("🔍 Starting TrafficVolume table validation...")
         
         # TrafficVolume table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_traffic_volume = pd.read_sql_query("SELECT * FROM [TrafficVolume]", conn)
-        else:  # Linux
-            df_traffic_volume = read_sql_query("SELECT * FROM [TrafficVolume]", db_path)
-        
-        df_traffic_volume = df_traffic_volume.fillna("")
+        df_traffic_volume = tables["TrafficVolume"]
 
         # Check for missing columns
         missing_cols = [col for col in traffic_volume_required if col not in df_traffic_volume.columns]
@@ -538,7 +657,7 @@ def runValidationScript(db_path , admCode):
             raise ValueError(f"❌ TrafficVolume table missing columns: {', '.join(missing_cols)}")
 
         # Apply comprehensive validation rules
-        invalid_df_traffic_volume = validate_traffic_volume(df_traffic_volume, df_link)
+        invalid_df_traffic_volume = table_result("TrafficVolume")
         
         # If no validation errors found, add a success message
         if invalid_df_traffic_volume.empty:
@@ -548,16 +667,13 @@ def runValidationScript(db_path , admCode):
             success_row["Validation_Message"] = "✅ SUCCESS: No validation errors found in TrafficVolume table"
             invalid_df_traffic_volume = pd.DataFrame([success_row])
 
+        writer.add_sheet("TrafficVolume", invalid_df_traffic_volume)
+
         # ---------------- CODE_AN_UNITCOSTSPER TABLE VALIDATION ---------------- 
         print("🔍 Starting CODE_AN_UnitCostsPER table validation...")
         
         # CODE_AN_UnitCostsPER table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_unit_costs = pd.read_sql_query("SELECT * FROM [CODE_AN_UnitCostsPER]", conn)
-        else:  # Linux
-            df_unit_costs = read_sql_query("SELECT * FROM [CODE_AN_UnitCostsPER]", db_path)
-        
-        df_unit_costs = df_unit_costs.fillna("")
+        df_unit_costs = tables["CODE_AN_UnitCostsPER"]
 
         # Check for missing columns
         missing_cols = [col for col in unit_costs_required if col not in df_unit_costs.columns]
@@ -565,7 +681,7 @@ def runValidationScript(db_path , admCode):
             raise ValueError(f"❌ CODE_AN_UnitCostsPER table missing columns: {', '.join(missing_cols)}")
 
         # Apply comprehensive validation rules
-        invalid_df_unit_costs = validate_code_an_unit_costs_per(df_unit_costs)
+        invalid_df_unit_costs = table_result("CODE_AN_UnitCostsPER")
         
         # If no validation errors found, add a success message
         if invalid_df_unit_costs.empty:
@@ -575,16 +691,13 @@ def runValidationScript(db_path , admCode):
             success_row["Validation_Message"] = "✅ SUCCESS: No validation errors found in CODE_AN_UnitCostsPER table"
             invalid_df_unit_costs = pd.DataFrame([success_row])
 
+        writer.add_sheet("CODE_AN_UnitCostsPER", invalid_df_unit_costs)
+
         # ---------------- CODE_AN_UNITCOSTSPERUNPAVED TABLE VALIDATION ---------------- 
         print("🔍 Starting CODE_AN_UnitCostsPERUnpaved table validation...")
         
         # CODE_AN_UnitCostsPERUnpaved table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_unit_costs_unpaved = pd.read_sql_query("SELECT * FROM [CODE_AN_UnitCostsPERUnpaved]", conn)
-        else:  # Linux
-            df_unit_costs_unpaved = read_sql_query("SELECT * FROM [CODE_AN_UnitCostsPERUnpaved]", db_path)
-        
-        df_unit_costs_unpaved = df_unit_costs_unpaved.fillna("")
+        df_unit_costs_unpaved = tables["CODE_AN_UnitCostsPERUnpaved"]
 
         # Check for missing columns
         missing_cols = [col for col in unit_costs_unpaved_required if col not in df_unit_costs_unpaved.columns]
@@ -592,7 +705,7 @@ def runValidationScript(db_path , admCode):
             raise ValueError(f"❌ CODE_AN_UnitCostsPERUnpaved table missing columns: {', '.join(missing_cols)}")
 
         # Apply comprehensive validation rules
-        invalid_df_unit_costs_unpaved = validate_code_an_unit_costs_per_unpaved(df_unit_costs_unpaved)
+        invalid_df_unit_costs_unpaved = table_result("CODE_AN_UnitCostsPERUnpaved")
         
         # If no validation errors found, add a success message
         if invalid_df_unit_costs_unpaved.empty:
@@ -602,16 +715,13 @@ def runValidationScript(db_path , admCode):
             success_row["Validation_Message"] = "✅ SUCCESS: No validation errors found in CODE_AN_UnitCostsPERUnpaved table"
             invalid_df_unit_costs_unpaved = pd.DataFrame([success_row])
 
+        writer.add_sheet("CODE_AN_UnitCostsPERUnpaved", invalid_df_unit_costs_unpaved)
+
         # ---------------- CODE_AN_UNITCOSTSREH TABLE VALIDATION ---------------- 
         print("🔍 Starting CODE_AN_UnitCostsREH table validation...")
         
         # CODE_AN_UnitCostsREH table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_unit_costs_reh = pd.read_sql_query("SELECT * FROM [CODE_AN_UnitCostsREH]", conn)
-        else:  # Linux
-            df_unit_costs_reh = read_sql_query("SELECT * FROM [CODE_AN_UnitCostsREH]", db_path)
-        
-        df_unit_costs_reh = df_unit_costs_reh.fillna("")
+        df_unit_costs_reh = tables["CODE_AN_UnitCostsREH"]
 
         # Check for missing columns
         missing_cols = [col for col in unit_costs_reh_required if col not in df_unit_costs_reh.columns]
@@ -619,7 +729,7 @@ def runValidationScript(db_path , admCode):
             raise ValueError(f"❌ CODE_AN_UnitCostsREH table missing columns: {', '.join(missing_cols)}")
 
         # Apply comprehensive validation rules
-        invalid_df_unit_costs_reh = validate_code_an_unit_costs_reh(df_unit_costs_reh)
+        invalid_df_unit_costs_reh = table_result("CODE_AN_UnitCostsREH")
         
         # If no validation errors found, add a success message
         if invalid_df_unit_costs_reh.empty:
@@ -629,16 +739,13 @@ def runValidationScript(db_path , admCode):
             success_row["Validation_Message"] = "✅ SUCCESS: No validation errors found in CODE_AN_UnitCostsREH table"
             invalid_df_unit_costs_reh = pd.DataFrame([success_row])
 
+        writer.add_sheet("CODE_AN_UnitCostsREH", invalid_df_unit_costs_reh)
+
         # ---------------- CODE_AN_UNITCOSTSRIGID TABLE VALIDATION ---------------- 
         print("🔍 Starting CODE_AN_UnitCostsRIGID table validation...")
         
         # CODE_AN_UnitCostsRIGID table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_unit_costs_rigid = pd.read_sql_query("SELECT * FROM [CODE_AN_UnitCostsRIGID]", conn)
-        else:  # Linux
-            df_unit_costs_rigid = read_sql_query("SELECT * FROM [CODE_AN_UnitCostsRIGID]", db_path)
-        
-        df_unit_costs_rigid = df_unit_costs_rigid.fillna("")
+        df_unit_costs_rigid = tables["CODE_AN_UnitCostsRIGID"]
 
         # Check for missing columns
         missing_cols = [col for col in unit_costs_rigid_required if col not in df_unit_costs_rigid.columns]
@@ -646,7 +753,7 @@ def runValidationScript(db_path , admCode):
             raise ValueError(f"❌ CODE_AN_UnitCostsRIGID table missing columns: {', '.join(missing_cols)}")
 
         # Apply comprehensive validation rules
-        invalid_df_unit_costs_rigid = validate_code_an_unit_costs_rigid(df_unit_costs_rigid)
+        invalid_df_unit_costs_rigid = table_result("CODE_AN_UnitCostsRIGID")
         
         # If no validation errors found, add a success message
         if invalid_df_unit_costs_rigid.empty:
@@ -656,16 +763,13 @@ def runValidationScript(db_path , admCode):
             success_row["Validation_Message"] = "✅ SUCCESS: No validation errors found in CODE_AN_UnitCostsRIGID table"
             invalid_df_unit_costs_rigid = pd.DataFrame([success_row])
 
+        writer.add_sheet("CODE_AN_UnitCostsRIGID", invalid_df_unit_costs_rigid)
+
         # ---------------- CODE_AN_UNITCOSTSRM TABLE VALIDATION ---------------- 
         print("🔍 Starting CODE_AN_UnitCostsRM table validation...")
         
         # CODE_AN_UnitCostsRM table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_unit_costs_rm = pd.read_sql_query("SELECT * FROM [CODE_AN_UnitCostsRM]", conn)
-        else:  # Linux
-            df_unit_costs_rm = read_sql_query("SELECT * FROM [CODE_AN_UnitCostsRM]", db_path)
-        
-        df_unit_costs_rm = df_unit_costs_rm.fillna("")
+        df_unit_costs_rm = tables["CODE_AN_UnitCostsRM"]
 
         # Check for missing columns
         missing_cols = [col for col in unit_costs_rm_required if col not in df_unit_costs_rm.columns]
@@ -673,7 +777,7 @@ def runValidationScript(db_path , admCode):
             raise ValueError(f"❌ CODE_AN_UnitCostsRM table missing columns: {', '.join(missing_cols)}")
 
         # Apply comprehensive validation rules
-        invalid_df_unit_costs_rm = validate_code_an_unit_costs_rm(df_unit_costs_rm)
+        invalid_df_unit_costs_rm = table_result("CODE_AN_UnitCostsRM")
         
         # If no validation errors found, add a success message
         if invalid_df_unit_costs_rm.empty:
@@ -683,16 +787,13 @@ def runValidationScript(db_path , admCode):
             success_row["Validation_Message"] = "✅ SUCCESS: No validation errors found in CODE_AN_UnitCostsRM table"
             invalid_df_unit_costs_rm = pd.DataFrame([success_row])
 
+        writer.add_sheet("CODE_AN_UnitCostsRM", invalid_df_unit_costs_rm)
+
         # ---------------- CODE_AN_UNITCOSTSWIDENING TABLE VALIDATION ---------------- 
         print("🔍 Starting CODE_AN_UnitCostsWidening table validation...")
         
         # CODE_AN_UnitCostsWidening table comprehensive validation
-        if os.name == 'nt':  # Windows
-            df_unit_costs_widening = pd.read_sql_query("SELECT * FROM [CODE_AN_UnitCostsWidening]", conn)
-        else:  # Linux
-            df_unit_costs_widening = read_sql_query("SELECT * FROM [CODE_AN_UnitCostsWidening]", db_path)
-        
-        df_unit_costs_widening = df_unit_costs_widening.fillna("")
+        df_unit_costs_widening = tables["CODE_AN_UnitCostsWidening"]
 
         # Check for missing columns
         missing_cols = [col for col in unit_costs_widening_required if col not in df_unit_costs_widening.columns]
@@ -700,7 +801,7 @@ def runValidationScript(db_path , admCode):
             raise ValueError(f"❌ CODE_AN_UnitCostsWidening table missing columns: {', '.join(missing_cols)}")
 
         # Apply comprehensive validation rules
-        invalid_df_unit_costs_widening = validate_code_an_unit_costs_widening(df_unit_costs_widening)
+        invalid_df_unit_costs_widening = table_result("CODE_AN_UnitCostsWidening")
         
         # If no validation errors found, add a success message
         if invalid_df_unit_costs_widening.empty:
@@ -710,95 +811,76 @@ def runValidationScript(db_path , admCode):
             success_row["Validation_Message"] = "✅ SUCCESS: No validation errors found in CODE_AN_UnitCostsWidening table"
             invalid_df_unit_costs_widening = pd.DataFrame([success_row])
 
-        # ---------------- SAVE ALL RESULTS TO EXCEL ---------------- 
-        with pd.ExcelWriter(output_excel, engine="openpyxl") as writer:
-            # Save table-specific validation results
-            invalid_df_link.to_excel(writer, sheet_name="Link", index=False)
-            invalid_df_alignment.to_excel(writer, sheet_name="Alignment", index=False)
-            invalid_df_road_condition.to_excel(writer, sheet_name="RoadCondition", index=False)
-            invalid_df_road_inventory.to_excel(writer, sheet_name="RoadInventory", index=False)
-            invalid_df_bridge_inventory.to_excel(writer, sheet_name="BridgeInventory", index=False)
-            invalid_df_culvert_condition.to_excel(writer, sheet_name="CulvertCondition", index=False)
-            invalid_df_culvert_inventory.to_excel(writer, sheet_name="CulvertInventory", index=False)
-            invalid_df_retaining_wall_condition.to_excel(writer, sheet_name="RetainingWallCondition", index=False)
-            invalid_df_retaining_wall_inventory.to_excel(writer, sheet_name="RetainingWallInventory", index=False)
-            invalid_df_traffic_volume.to_excel(writer, sheet_name="TrafficVolume", index=False)
-            invalid_df_unit_costs.to_excel(writer, sheet_name="CODE_AN_UnitCostsPER", index=False)
-            invalid_df_unit_costs_unpaved.to_excel(writer, sheet_name="CODE_AN_UnitCostsPERUnpaved", index=False)
-            invalid_df_unit_costs_reh.to_excel(writer, sheet_name="CODE_AN_UnitCostsREH", index=False)
-            invalid_df_unit_costs_rigid.to_excel(writer, sheet_name="CODE_AN_UnitCostsRIGID", index=False)
-            invalid_df_unit_costs_rm.to_excel(writer, sheet_name="CODE_AN_UnitCostsRM", index=False)
-            invalid_df_unit_costs_widening.to_excel(writer, sheet_name="CODE_AN_UnitCostsWidening", index=False)
-
-        # ---------------- AUTO-ADJUST COLUMN WIDTHS ---------------- 
-        wb = load_workbook(output_excel)
-        for sheet in wb.sheetnames:
-            ws = wb[sheet]
-            for col in ws.columns:
-                max_len = 0
-                col_letter = get_column_letter(col[0].column)
-                for cell in col:
-                    if cell.value:
-                        max_len = max(max_len, len(str(cell.value)))
-                ws.column_dimensions[col_letter].width = max_len + 2
-        wb.save(output_excel)
-
-        print(f"✅ Validation complete. Results saved to {output_excel}")
+        writer.add_sheet("CODE_AN_UnitCostsWidening", invalid_df_unit_costs_widening)
+
+        # Every sheet has been written; an owned writer saves the report now
+        if owns_writer:
+            writer.close()
+
+        # Error rows per table; the "no errors" rows of clean tables are not
+        # counted, and tables a stopped run did not validate have None
+        summary = {table_name: None if table_name in skipped_tables else report_rows.get(table_name, 0)
+                   for table_name in _VALIDATOR_MODULES}
+
+        print(f"✅ Validation complete. Results saved to {output_excel if owns_writer else 'the report stream'}")
         print(f"📊 Summary:")
-        print(f"   - Link table issues: {len(invalid_df_link)}")
-        print(f"   - Alignment table issues: {len(invalid_df_alignment)}")
-        print(f"   - RoadCondition table issues: {len(invalid_df_road_condition)}")
-        print(f"   - RoadInventory table issues: {len(invalid_df_road_inventory)}")
-        print(f"   - BridgeInventory table issues: {len(invalid_df_bridge_inventory)}")
-        print(f"   - CulvertCondition table issues: {len(invalid_df_culvert_condition)}")
-        print(f"   - CulvertInventory table issues: {len(invalid_df_culvert_inventory)}")
-        print(f"   - RetainingWallCondition table issues: {len(invalid_df_retaining_wall_condition)}")
-        print(f"   - RetainingWallInventory table issues: {len(invalid_df_retaining_wall_inventory)}")
-        print(f"   - TrafficVolume table issues: {len(invalid_df_traffic_volume)}")
-        print(f"   - CODE_AN_UnitCostsPER table issues: {len(invalid_df_unit_costs)}")
-        print(f"   - CODE_AN_UnitCostsPERUnpaved table issues: {len(invalid_df_unit_costs_unpaved)}")
-        print(f"   - CODE_AN_UnitCostsREH table issues: {len(invalid_df_unit_costs_reh)}")
-        print(f"   - CODE_AN_UnitCostsRIGID table issues: {len(invalid_df_unit_costs_rigid)}")
-        print(f"   - CODE_AN_UnitCostsRM table issues: {len(invalid_df_unit_costs_rm)}")
-        print(f"   - CODE_AN_UnitCostsWidening table issues: {len(invalid_df_unit_costs_widening)}")
-        
-        # Close connection only on Windows
-        if os.name == 'nt' and 'conn' in locals():
-            conn.close()
-            
-        return {
+        for table_name, count in summary.items():
+            print(f"   - {table_name} table issues: {'not validated' if count is None else count}")
+        for name, coverage in (("RoadCondition", road_condition_coverage), ("RoadInventory", road_inventory_coverage)):
+            if coverage is not None and not coverage.empty:
+                print(f"   - {name} coverage: {len(coverage)} links, {int((coverage['Coverage_Pct'] < 100).sum())} below 100%")
+        if truncated_tables:
+            print(f"   - Truncated by the error budget: {', '.join(truncated_tables)}")
+        if skipped_tables:
+            print(f"   - Not validated ({stopped}): {', '.join(skipped_tables)}")
+        if cache_stats:
+            print(f"   - Snapshot cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+
+        if skipped_tables:
+            message = (f"⚠️ Database validation stopped early ({stopped}): "
+                       f"{len(skipped_tables)} tables were not validated")
+        elif truncated_tables:
+            message = (f"⚠️ Database validation completed, but the error budget truncated the results of: "
+                       f"{', '.join(truncated_tables)}")
+        else:
+            message = "✅ Database validation completed successfully!"
+
+        result = {
             "success": True,
-            "message": "✅ Database validation completed successfully!",
-            "output_file": output_excel,
-            "summary": {
-                "Link": len(invalid_df_link),
-                "Alignment": len(invalid_df_alignment),
-                "RoadCondition": len(invalid_df_road_condition),
-                "RoadInventory": len(invalid_df_road_inventory),
-                "BridgeInventory": len(invalid_df_bridge_inventory),
-                "CulvertCondition": len(invalid_df_culvert_condition),
-                "CulvertInventory": len(invalid_df_culvert_inventory),
-                "RetainingWallCondition": len(invalid_df_retaining_wall_condition),
-                "RetainingWallInventory": len(invalid_df_retaining_wall_inventory),
-                "TrafficVolume": len(invalid_df_traffic_volume),
-                "CODE_AN_UnitCostsPER": len(invalid_df_unit_costs),
-                "CODE_AN_UnitCostsPERUnpaved": len(invalid_df_unit_costs_unpaved),
-                "CODE_AN_UnitCostsREH": len(invalid_df_unit_costs_reh),
-                "CODE_AN_UnitCostsRIGID": len(invalid_df_unit_costs_rigid),
-                "CODE_AN_UnitCostsRM": len(invalid_df_unit_costs_rm),
-                "CODE_AN_UnitCostsWidening": len(invalid_df_unit_costs_widening)
-            }
+            "message": message,
+            "output_file": output_excel if owns_writer else None,
+            "report_format": report_format,
+            "content_type": report_spec.content_type,
+            "cache": cache_stats,
+            "summary": summary,
+            "rule_summary": {table_name: None if count is None else rule_summary.get(table_name, {})
+                             for table_name, count in summary.items()},
+            "total_errors": sum(count for count in summary.values() if count is not None),
+            "truncated": truncated_tables,
+            "skipped": skipped_tables,
         }
+        if store is not None:
+            store.finish({key: value for key, value in result.items() if key != "output_file"})
+        return result
 
     except Exception as ex:
         print("Error:", ex)
-        # Close connection on error only on Windows
-        if os.name == 'nt' and 'conn' in locals():
-            try:
-                conn.close()
-            except:
-                pass
-        return {
+        result = {
             "success": False,
             "message": f"Validation error: {str(ex)}"
         }
+        # Errors stored so far stay listed; the summary marks the run complete
+        if store is not None:
+            try:
+                store.finish(result)
+            except Exception as store_error:
+                print(f"Warning: could not store the run summary: {store_error}")
+        return result
+    finally:
+        if owns_writer and writer is not None:
+            writer.close()
+        if store is not None:
+            store.close()
+        validators.shutdown()
+        if rules is not None:
+            rules.close()
@@ -0,0 +1,435 @@
+# report_writer.py
+import io
+import json
+import queue
+import threading
+import zipfile
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
+
+
+# Column widths: longest value (header included) plus padding, at most MAX_COLUMN_WIDTH
+COLUMN_PADDING: int = 2
+MAX_COLUMN_WIDTH: int = 80
+
+
+def column_widths(df: pd.DataFrame, max_width: int = MAX_COLUMN_WIDTH) -> List[int]:
+    """
+    Width of each column of df as written to a sheet: the length of its
+    longest non-empty value or of its header, plus COLUMN_PADDING, capped at
+    max_width. Computed with one vectorized str.len() per column.
+    """
+    widths = []
+    for pos, col in enumerate(df.columns):
+        series = df.iloc[:, pos]
+        longest = len(str(col))
+        # Empty, zero and False cells are not counted, as in a cell-by-cell pass
+        filled = series[series.notna()]
+        if filled.dtype.kind in "biuf":
+            filled = filled[filled != 0]
+        if len(filled):
+            if filled.dtype.kind == "f":
+                # Floats are stored as "%.16g" text and shown as that number:
+                # 2059.9999999999995 -> "2060", 65.15 -> "65.15000000000001" -> 65.15
+                text = pd.Series(np.char.mod("%.16g", filled.to_numpy(dtype="float64")))
+                integral = ~text.str.contains(r"[.eEna]")
+                lengths = text.astype("float64").astype(str).str.len().to_numpy() - 2 * integral.to_numpy()
+            else:
+                lengths = filled.astype(str).str.len().to_numpy()
+            longest = max(longest, int(lengths.max()))
+        widths.append(min(longest + COLUMN_PADDING, max_width))
+    return widths
+
+
+# Rows converted for the sheet at a time, bounding the extra memory of a huge report
+ROW_CHUNK: int = 50_000
+
+
+def _sheet_rows(df: pd.DataFrame):
+    """The rows of df as tuples of Python values, missing values as None (empty cells)."""
+    for start in range(0, len(df), ROW_CHUNK):
+        part = df.iloc[start:start + ROW_CHUNK]
+        values = part.astype(object).where(part.notna().to_numpy(), None)
+        yield from values.itertuples(index=False, name=None)
+
+
+class XlsxReportWriter:
+    """
+    Writes the validation report in one pass with openpyxl's write-only
+    workbook: each sheet is streamed out as it is added, with its column
+    widths taken from the DataFrame beforehand, so the file is never read
+    back. Header cells are styled like DataFrame.to_excel's.
+    """
+
+    def __init__(self, path: str, max_width: int = MAX_COLUMN_WIDTH):
+        self.path = path
+        self.max_width = max_width
+        self._workbook: Optional[Workbook] = Workbook(write_only=True)
+        side = Side(style="thin")
+        self._header_font = Font(bold=True)
+        self._header_border = Border(top=side, right=side, bottom=side, left=side)
+        self._header_alignment = Alignment(horizontal="center", vertical="top")
+
+    def _header(self, ws, columns) -> list:
+        cells = []
+        for col in columns:
+            cell = WriteOnlyCell(ws, value=str(col))
+            cell.font = self._header_font
+            cell.border = self._header_border
+            cell.alignment = self._header_alignment
+            cells.append(cell)
+        return cells
+
+    def add_sheet(self, name: str, df: pd.DataFrame) -> None:
+        """Write df (header row, then its rows without the index) as sheet name."""
+        ws = self._workbook.create_sheet(title=name)
+        # Write-only sheets take their column widths before the first row
+        for pos, width in enumerate(column_widths(df, self.max_width), start=1):
+            ws.column_dimensions[get_column_letter(pos)].width = width
+        ws.append(self._header(ws, df.columns))
+        for row in _sheet_rows(df):
+            ws.append(row)
+
+    def close(self) -> None:
+        if self._workbook is not None:
+            self._workbook.save(self.path)
+            self._workbook = None
+
+    def __enter__(self) -> "XlsxReportWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+# Name of the trailing run summary in a streamed report (_summary.json, or the
+# JSON Lines record whose JSONL_TABLE_KEY is this)
+SUMMARY_NAME: str = "_summary"
+
+
+def _summary_json(summary: Dict[str, Any]) -> str:
+    return json.dumps(summary, default=str, ensure_ascii=False)
+
+
+class CsvZipReportWriter:
+    """
+    Writes each sheet as <name>.csv (UTF-8, no index) into a zip archive,
+    one member at a time. target is a path or a writable binary file, which
+    need not be seekable (see stream_report); it is flushed after every sheet.
+    """
+
+    def __init__(self, target: Union[str, BinaryIO]):
+        self.path = target if isinstance(target, str) else None
+        self._file = None if isinstance(target, str) else target
+        self._zip: Optional[zipfile.ZipFile] = zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def _flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def add_sheet(self, name: str, df: pd.DataFrame) -> None:
+        with self._zip.open(f"{name}.csv", "w") as member:
+            with io.TextIOWrapper(member, encoding="utf-8", newline="") as text:
+                df.to_csv(text, index=False, chunksize=ROW_CHUNK)
+        self._flush()
+
+    def add_summary(self, summary: Dict[str, Any]) -> None:
+        """The run summary as a JSON member, SUMMARY_NAME.json."""
+        self._zip.writestr(f"{SUMMARY_NAME}.json", _summary_json(summary))
+        self._flush()
+
+    def close(self) -> None:
+        archive, self._zip = self._zip, None
+        if archive is not None:
+            archive.close()
+
+    def __enter__(self) -> "CsvZipReportWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def _parquet_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    df with its object columns as nullable strings: report columns mix
+    values and markers (Record_No "N/A", "" in success rows), which Parquet
+    cannot store in one typed column. attrs (e.g. the coverage frame) are
+    not written.
+    """
+    out = df.copy(deep=False)
+    out.attrs = {}
+    out.columns = [str(col) for col in out.columns]
+    for col in out.columns[(out.dtypes == object).to_numpy()]:
+        out[col] = out[col].astype("string")
+    return out
+
+
+class ParquetZipReportWriter:
+    """Writes each sheet as <name>.parquet into a zip archive (stored: Parquet is already compressed)."""
+
+    def __init__(self, path: str):
+        from snapshot_cache import parquet_available
+        if not parquet_available():
+            raise RuntimeError("Parquet reports require pyarrow")
+        self.path = path
+        self._zip: Optional[zipfile.ZipFile] = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED)
+
+    def add_sheet(self, name: str, df: pd.DataFrame) -> None:
+        buffer = io.BytesIO()
+        _parquet_frame(df).to_parquet(buffer, index=False)
+        self._zip.writestr(f"{name}.parquet", buffer.getvalue())
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def __enter__(self) -> "ParquetZipReportWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+# Key naming the sheet (table) of each JSON Lines record
+JSONL_TABLE_KEY: str = "Table"
+
+
+def jsonl_records(name: str, df: pd.DataFrame):
+    """The rows of sheet name as JSON Lines text blocks, ROW_CHUNK rows each; missing values are null."""
+    for start in range(0, len(df), ROW_CHUNK):
+        part = df.iloc[start:start + ROW_CHUNK]
+        part = part.assign(**{JSONL_TABLE_KEY: name})[[JSONL_TABLE_KEY] + list(df.columns)]
+        text = part.to_json(orient="records", lines=True, date_format="iso", force_ascii=False)
+        # Older pandas leave out the final newline
+        yield text if text.endswith("\n") else text + "\n"
+
+
+class JsonLinesReportWriter:
+    """
+    Writes every sheet into one JSON Lines file, a record per row with its
+    sheet under JSONL_TABLE_KEY. target is a path or a writable binary file
+    (left open by close), flushed after every sheet.
+    """
+
+    def __init__(self, target: Union[str, BinaryIO]):
+        self.path = target if isinstance(target, str) else None
+        if self.path is not None:
+            self._file = open(target, "w", encoding="utf-8", newline="\n")
+        else:
+            self._file = io.TextIOWrapper(target, encoding="utf-8", newline="\n")
+
+    def add_sheet(self, name: str, df: pd.DataFrame) -> None:
+        for block in jsonl_records(name, df):
+            self._file.write(block)
+        self._file.flush()
+
+    def add_summary(self, summary: Dict[str, Any]) -> None:
+        """The run summary as a last record, with SUMMARY_NAME under JSONL_TABLE_KEY."""
+        self._file.write(_summary_json({JSONL_TABLE_KEY: SUMMARY_NAME, **summary}) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        text, self._file = self._file, None
+        if text is None:
+            return
+        if self.path is not None:
+            text.close()
+            return
+        try:
+            text.flush()
+        finally:
+            text.detach()
+
+    def __enter__(self) -> "JsonLinesReportWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class ReportFormat(NamedTuple):
+    file_name: str
+    content_type: str
+    writer: type
+    # The writer can write to a non-seekable stream (stream_report)
+    streams: bool = False
+
+
+# Report formats by name; xlsx is the default
+REPORT_FORMATS: Dict[str, ReportFormat] = {
+    "xlsx": ReportFormat("link_validation.xlsx",
+                         "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", XlsxReportWriter),
+    "csv": ReportFormat("link_validation_csv.zip", "application/zip", CsvZipReportWriter, streams=True),
+    "parquet": ReportFormat("link_validation_parquet.zip", "application/zip", ParquetZipReportWriter),
+    "jsonl": ReportFormat("link_validation.jsonl", "application/x-ndjson", JsonLinesReportWriter, streams=True),
+}
+DEFAULT_REPORT_FORMAT: str = "xlsx"
+
+# Accept header media types of the formats (the zip formats by their content)
+_MEDIA_TYPES: Dict[str, str] = {
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
+    "text/csv": "csv",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/json-lines": "jsonl",
+}
+
+
+def format_from_accept(accept: str) -> Optional[str]:
+    """The report format of the most preferred media type in an Accept header, or None."""
+    choices = []
+    for order, item in enumerate((accept or "").split(",")):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if media_type.lower() in _MEDIA_TYPES and quality > 0:
+            choices.append((-quality, order, _MEDIA_TYPES[media_type.lower()]))
+    return min(choices)[2] if choices else None
+
+
+# Bytes handed to the response at a time, and blocks buffered ahead of a slow client
+STREAM_BLOCK_BYTES: int = 64 * 1024
+STREAM_QUEUE_BLOCKS: int = 64
+
+
+class _QueueSink(io.RawIOBase):
+    """Write end of stream_report: every write becomes a block on the queue."""
+
+    def __init__(self, blocks: "queue.Queue", cancelled: threading.Event):
+        super().__init__()
+        self._blocks = blocks
+        self._cancelled = cancelled
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        block = bytes(data)
+        while True:
+            if self._cancelled.is_set():
+                raise BrokenPipeError("the report stream was closed by the client")
+            try:
+                self._blocks.put(block, timeout=1)
+                return len(block)
+            except queue.Full:
+                continue
+
+
+class _ReportStream:
+    """The blocks of a streamed report; close() stops the producer even if nothing was read."""
+
+    def __init__(self, blocks: Iterator[bytes], cancelled: threading.Event):
+        self._blocks = blocks
+        self._cancelled = cancelled
+
+    def __iter__(self) -> "_ReportStream":
+        return self
+
+    def __next__(self) -> bytes:
+        return next(self._blocks)
+
+    def close(self) -> None:
+        # A producer blocked on the full queue sees this within a second
+        self._cancelled.set()
+        self._blocks.close()
+
+
+def stream_report(report_format: str, run: Callable[[Any], Dict[str, Any]]) -> Iterator[bytes]:
+    """
+    Produce a report of a streaming format while it is being written.
+    run(writer) is called in a background thread, started right away, with
+    an open writer of report_format and returns the run's result dict (e.g.
+    runValidationScript(..., report_writer=writer)); its summary is written
+    last and the writer closed here. The returned iterator yields the bytes
+    as each sheet is written, in blocks of about STREAM_BLOCK_BYTES.
+    Closing it (the client went away, or the response was never sent)
+    makes the next write in run fail with BrokenPipeError; the thread is
+    not waited for and ends on its own.
+    """
+    spec = REPORT_FORMATS[report_format]
+    if not spec.streams:
+        raise ValueError(f"Report format '{report_format}' cannot be streamed")
+    blocks: "queue.Queue" = queue.Queue(maxsize=STREAM_QUEUE_BLOCKS)
+    cancelled = threading.Event()
+    done = object()
+
+    def produce() -> None:
+        sink = io.BufferedWriter(_QueueSink(blocks, cancelled), buffer_size=STREAM_BLOCK_BYTES)
+        writer = None
+        try:
+            writer = spec.writer(sink)
+            try:
+                result = run(writer)
+            except Exception as e:
+                result = {"success": False, "message": f"Validation error: {e}"}
+            summary = {key: value for key, value in (result or {}).items() if key != "output_file"}
+            writer.add_summary(summary)
+            writer.close()
+            sink.flush()
+        except BrokenPipeError:
+            # The client is gone: drop the rest of the report
+            if writer is not None:
+                try:
+                    writer.close()
+                except OSError:
+                    pass
+        finally:
+            while True:
+                try:
+                    blocks.put(done, timeout=1)
+                    break
+                except queue.Full:
+                    if cancelled.is_set():
+                        break
+
+    def consume() -> Iterator[bytes]:
+        try:
+            while True:
+                block = blocks.get()
+                if block is done:
+                    break
+                yield block
+        finally:
+            cancelled.set()
+
+    # Started before the first read, so run (and whatever it releases when it
+    # ends) runs even if the stream is closed without being read
+    threading.Thread(target=produce, name="report-stream", daemon=True).start()
+    return _ReportStream(consume(), cancelled)
+
+
+__all__ = [
+    "COLUMN_PADDING",
+    "MAX_COLUMN_WIDTH",
+    "ROW_CHUNK",
+    "JSONL_TABLE_KEY",
+    "SUMMARY_NAME",
+    "STREAM_BLOCK_BYTES",
+    "STREAM_QUEUE_BLOCKS",
+    "REPORT_FORMATS",
+    "DEFAULT_REPORT_FORMAT",
+    "ReportFormat",
+    "column_widths",
+    "format_from_accept",
+    "jsonl_records",
+    "stream_report",
+    "XlsxReportWriter",
+    "CsvZipReportWriter",
+    "ParquetZipReportWriter",
+    "JsonLinesReportWriter",
+]
@@ -0,0 +1,151 @@
+# run_workspace.py
+import os
+import re
+import shutil
+import time
+import uuid
+from typing import Dict, List, Optional
+
+
+# Default bounds for the scratch root: finished workspaces are kept this long
+# (a crashed run's workspace is evicted after the same time) ...
+DEFAULT_MAX_AGE_SECONDS: int = 6 * 3600
+# ... and the oldest finished ones are deleted while the root is larger than this (5 GiB)
+DEFAULT_MAX_BYTES: int = 5 * 1024 ** 3
+
+# Present while the run that owns the workspace is in progress
+ACTIVE_MARKER: str = ".active"
+
+_RUN_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex
+
+
+def is_run_id(value: str) -> bool:
+    """True for ids made by new_run_id (so an id never escapes the scratch root)."""
+    return bool(_RUN_ID_RE.match(value or ""))
+
+
+class RunWorkspace:
+    """
+    Private directory of one validation run: <root>/<run_id>/ holds the
+    uploaded database, the report and any other file of the run, so
+    concurrent runs never share a path. The workspace is marked active
+    until release(); WorkspaceJanitor only deletes released workspaces
+    (and active ones old enough to belong to a crashed run).
+    """
+
+    def __init__(self, root: str, run_id: Optional[str] = None):
+        run_id = run_id or new_run_id()
+        if not is_run_id(run_id):
+            raise ValueError(f"Invalid run id: {run_id!r}")
+        self.root = root
+        self.run_id = run_id
+        self.path = os.path.join(root, run_id)
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, ACTIVE_MARKER), "w"):
+            pass
+
+    def file(self, name: str) -> str:
+        """Path of a file of this run."""
+        return os.path.join(self.path, name)
+
+    def release(self, keep: Optional[List[str]] = None) -> None:
+        """
+        Mark the run finished. Files not named in keep (e.g. the uploaded
+        database) are deleted now; the kept ones stay until the janitor
+        evicts the workspace.
+        """
+        keep = set(keep or ())
+        for entry in os.scandir(self.path):
+            if entry.name in keep:
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    os.unlink(entry.path)
+            except OSError as e:
+                print(f"Warning: could not clean up {entry.path}: {e}")
+        try:
+            os.utime(self.path)
+        except OSError:
+            pass
+
+    def discard(self) -> None:
+        """Delete the whole workspace."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self) -> "RunWorkspace":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+
+def _dir_size(path: str) -> int:
+    size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                size += os.stat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return size
+
+
+class WorkspaceJanitor:
+    """
+    Evicts stale run workspaces under a scratch root: every workspace older
+    than max_age_seconds, then the least recently used finished ones until
+    the root fits in max_bytes. Safe to run from any number of processes.
+    """
+
+    def __init__(self, root: str, max_age_seconds: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.root = root
+        self.max_age_seconds = DEFAULT_MAX_AGE_SECONDS if max_age_seconds is None else int(max_age_seconds)
+        self.max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else int(max_bytes)
+
+    def sweep(self) -> Dict[str, int]:
+        """Delete stale workspaces; returns how many were removed and the bytes left."""
+        if not os.path.isdir(self.root):
+            return {"removed": 0, "bytes": 0}
+        now = time.time()
+        finished = []
+        total = 0
+        removed = 0
+        for entry in os.scandir(self.root):
+            if not entry.is_dir(follow_symlinks=False) or not is_run_id(entry.name):
+                continue
+            try:
+                mtime = entry.stat(follow_symlinks=False).st_mtime
+            except OSError:
+                continue
+            if now - mtime > self.max_age_seconds:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+                continue
+            size = _dir_size(entry.path)
+            total += size
+            if not os.path.exists(os.path.join(entry.path, ACTIVE_MARKER)):
+                finished.append((mtime, entry.path, size))
+        for _, path, size in sorted(finished):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+            total -= size
+        return {"removed": removed, "bytes": total}
+
+
+__all__ = [
+    "ACTIVE_MARKER",
+    "DEFAULT_MAX_AGE_SECONDS",
+    "DEFAULT_MAX_BYTES",
+    "RunWorkspace",
+    "WorkspaceJanitor",
+    "is_run_id",
+    "new_run_id",
+]
@@ -0,0 +1,176 @@
+# snapshot_cache.py
+import os
+import json
+import shutil
+import hashlib
+import threading
+import uuid
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+
+# Default size bound for the whole cache directory (2 GiB)
+DEFAULT_MAX_BYTES: int = 2 * 1024 ** 3
+
+# Bumped whenever the shape or dtypes of extracted tables change
+SNAPSHOT_FORMAT_VERSION: int = 2
+
+# Table list and column types of the snapshotted file, next to its tables
+CATALOG_FILE: str = "catalog.json"
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the hex SHA-256 digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class SnapshotCache:
+    """
+    Content-addressed cache of extracted Access tables.
+
+    Layout: <root>/<sha256 of .accdb>-v<format>/<table>.parquet, plus the
+    file's catalog (catalog.json) so that tables the file does not have are
+    known without asking the database again. A snapshot directory's mtime is refreshed whenever it is read, and the least recently
+    used snapshots are deleted once the cache grows past max_bytes.
+    Requires pyarrow; without it every lookup is a miss and nothing is stored.
+    """
+
+    def __init__(self, root: str, max_bytes: Optional[int] = None):
+        self.root = root
+        self.max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else int(max_bytes)
+        self.enabled = parquet_available()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(self.root, exist_ok=True)
+
+    def key_for(self, db_path: str) -> str:
+        # The format version keeps snapshots from older extraction code apart
+        return f"{file_sha256(db_path)}-v{SNAPSHOT_FORMAT_VERSION}"
+
+    def _table_path(self, key: str, table_name: str) -> str:
+        return os.path.join(self.root, key, f"{table_name}.parquet")
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def load(self, key: str, table_name: str) -> Optional[pd.DataFrame]:
+        """Return the cached table, or None (counted as a miss)."""
+        path = self._table_path(key, table_name)
+        if not self.enabled or not os.path.exists(path):
+            self._count(False)
+            return None
+        try:
+            df = pd.read_parquet(path)
+        except Exception as e:
+            # Partially evicted or corrupt entry: fall back to a fresh export
+            print(f"Warning: could not read cached table {table_name}: {e}")
+            self._count(False)
+            return None
+        try:
+            os.utime(os.path.dirname(path))
+        except OSError:
+            pass
+        self._count(True)
+        return df
+
+    def load_catalog(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached {"tables": [...], "schema": {...}} of a file, or None."""
+        path = os.path.join(self.root, key, CATALOG_FILE)
+        if not self.enabled or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not read cached catalog: {e}")
+            return None
+
+    def store_catalog(self, key: str, tables, schema: Dict[str, Dict[str, Optional[str]]]) -> None:
+        if not self.enabled:
+            return
+        path = os.path.join(self.root, key, CATALOG_FILE)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump({"tables": list(tables), "schema": schema}, fh)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: could not cache the table catalog: {e}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def store(self, key: str, table_name: str, df: pd.DataFrame) -> None:
+        if not self.enabled:
+            return
+        path = self._table_path(key, table_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            # Mixed-type object columns cannot always be written; skip caching them
+            print(f"Warning: could not cache table {table_name}: {e}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def evict(self) -> None:
+        """Delete least recently used snapshots until the cache fits in max_bytes."""
+        if not self.enabled or not os.path.isdir(self.root):
+            return
+        snapshots = []
+        total = 0
+        for name in os.listdir(self.root):
+            snap_dir = os.path.join(self.root, name)
+            if not os.path.isdir(snap_dir):
+                continue
+            size = 0
+            for entry in os.scandir(snap_dir):
+                try:
+                    size += entry.stat().st_size
+                except OSError:
+                    pass
+            try:
+                mtime = os.stat(snap_dir).st_mtime
+            except OSError:
+                continue
+            snapshots.append((mtime, snap_dir, size))
+            total += size
+        for _, snap_dir, size in sorted(snapshots):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(snap_dir, ignore_errors=True)
+            total -= size
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+__all__ = [
+    "CATALOG_FILE",
+    "DEFAULT_MAX_BYTES",
+    "SNAPSHOT_FORMAT_VERSION",
+    "SnapshotCache",
+    "file_sha256",
+    "parquet_available",
+]
@@ -0,0 +1,188 @@
+# sql_engine.py
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Set
+
+import numpy as np
+import pandas as pd
+
+
+# Values accepted for the sql_engine option of runValidationScript
+SQL_ENGINES = ("auto", "sqlite", "duckdb")
+
+# Column holding each row's 0-based position in the extracted DataFrame
+ROW_COLUMN = "_row"
+
+
+def duckdb_available() -> bool:
+    try:
+        import duckdb  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SqlRuleEngine:
+    """
+    Runs the set-based cross-table rules (Link_No existence, key uniqueness)
+    as indexed anti-joins and windowed counts in an embedded database instead of Python
+    row loops. Each result is a set or list of 0-based row positions, which
+    the validators turn into their usual Record_No / Validation_Message rows.
+
+    Only the columns a rule needs are loaded, once per table, together with
+    the row position. backend is "duckdb", "sqlite" (in memory) or "auto"
+    (DuckDB when it is installed).
+    """
+
+    def __init__(self, tables: Dict[str, pd.DataFrame], backend: str = "auto"):
+        if backend not in SQL_ENGINES:
+            raise ValueError(f"Unknown SQL engine: {backend}")
+        if backend == "auto":
+            backend = "duckdb" if duckdb_available() else "sqlite"
+        self.backend = backend
+        self.tables = tables
+        self._loaded: Dict[str, Set[str]] = {}
+        if backend == "duckdb":
+            import duckdb
+            self._conn = duckdb.connect(":memory:")
+        else:
+            self._conn = sqlite3.connect(":memory:")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _query(self, sql: str) -> list:
+        return self._conn.execute(sql).fetchall()
+
+    def _has_columns(self, table_name: str, columns: Sequence[str]) -> bool:
+        df = self.tables.get(table_name)
+        return df is not None and all(col in df.columns for col in columns)
+
+    def _load(self, table_name: str, columns: Sequence[str]) -> str:
+        """Load table_name's columns (plus the row position); returns the SQL table name."""
+        sql_name = _quote(table_name)
+        loaded = self._loaded.get(table_name)
+        if loaded is not None and set(columns) <= loaded:
+            return sql_name
+        wanted = sorted(set(columns) | (loaded or set()))
+        frame = self.tables[table_name][wanted].copy()
+        frame[ROW_COLUMN] = np.arange(len(frame), dtype="int64")
+        self._conn.execute(f"DROP TABLE IF EXISTS {sql_name}")
+        if self.backend == "duckdb":
+            self._conn.register("_frame", frame)
+            self._conn.execute(f"CREATE TABLE {sql_name} AS SELECT * FROM _frame")
+            self._conn.unregister("_frame")
+        else:
+            frame.to_sql(table_name, self._conn, index=False)
+        self._loaded[table_name] = set(wanted)
+        return sql_name
+
+    def _index(self, table_name: str, column: str) -> None:
+        # DuckDB hash-joins without one; SQLite needs it for the NOT EXISTS lookups
+        if self.backend == "sqlite":
+            index_name = _quote(f"ix_{table_name}_{column}")
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {_quote(table_name)} ({_quote(column)})")
+
+    def missing_link_rows(self, table_name: str) -> Optional[Set[int]]:
+        """
+        Positions of the rows whose non-empty Link_No is not in the Link
+        table. Keys are compared as trimmed text, like LinkIndex. Returns
+        None when either table has no Link_No column.
+        """
+        if not self._has_columns(table_name, ["Link_No"]) or not self._has_columns("Link", ["Link_No"]):
+            return None
+        table = self._load(table_name, ["Link_No"])
+        link = self._load("Link", ["Link_No"])
+        # Text copy of the Link keys, so the lookup can still use an index
+        if "_link_text" not in self._loaded:
+            self._conn.execute(
+                f'CREATE TABLE "_link_text" AS SELECT DISTINCT TRIM(CAST(Link_No AS TEXT)) AS Link_No '
+                f"FROM {link} WHERE Link_No IS NOT NULL"
+            )
+            self._loaded["_link_text"] = {"Link_No"}
+            self._index("_link_text", "Link_No")
+        value = "TRIM(CAST(t.Link_No AS TEXT))"
+        sql = (
+            f"SELECT t.{ROW_COLUMN} FROM {table} t "
+            f"WHERE t.Link_No IS NOT NULL AND {value} <> '' "
+            f'AND NOT EXISTS (SELECT 1 FROM "_link_text" l WHERE l.Link_No = {value})'
+        )
+        return {int(row) for (row,) in self._query(sql)}
+
+    def orphan_rows(self, table_name: str, columns: Sequence[str], parent: str,
+                    parent_columns: Sequence[str]) -> Optional[Set[int]]:
+        """
+        Positions of the rows whose key (every part non-empty) matches no
+        row of the parent table. Keys are compared as trimmed text, like
+        foreign_keys.orphan_rows. None when either side lacks a key column.
+        """
+        if not self._has_columns(table_name, columns) or not self._has_columns(parent, parent_columns):
+            return None
+        table = self._load(table_name, columns)
+        parent_table = self._load(parent, parent_columns)
+        # Distinct text copy of the parent keys, indexed for the lookups
+        keys_name = f"_ref_{parent}_{'_'.join(parent_columns)}"
+        names = [f"k{i}" for i in range(len(columns))]
+        if keys_name not in self._loaded:
+            select = ", ".join(f"TRIM(CAST({_quote(col)} AS TEXT)) AS {name}" for col, name in zip(parent_columns, names))
+            not_null = " AND ".join(f"{_quote(col)} IS NOT NULL" for col in parent_columns)
+            self._conn.execute(
+                f"CREATE TABLE {_quote(keys_name)} AS SELECT DISTINCT {select} FROM {parent_table} WHERE {not_null}"
+            )
+            self._loaded[keys_name] = set(names)
+            if self.backend == "sqlite":
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {_quote('ix_' + keys_name)} ON {_quote(keys_name)} ({', '.join(names)})"
+                )
+        values = [f"TRIM(CAST(t.{_quote(col)} AS TEXT))" for col in columns]
+        present = " AND ".join(f"t.{_quote(col)} IS NOT NULL AND {value} <> ''" for col, value in zip(columns, values))
+        match = " AND ".join(f"p.{name} = {value}" for name, value in zip(names, values))
+        sql = (
+            f"SELECT t.{ROW_COLUMN} FROM {table} t WHERE {present} "
+            f"AND NOT EXISTS (SELECT 1 FROM {_quote(keys_name)} p WHERE {match})"
+        )
+        return {int(row) for (row,) in self._query(sql)}
+
+    def duplicate_key_rows(self, table_name: str, keys: Sequence[str]) -> Optional[List[List[int]]]:
+        """
+        Rows sharing the same non-null key values with at least one other
+        row, grouped per key in pandas groupby order (sorted keys, then row
+        position). Returns None when the table lacks a key column.
+        """
+        if not self._has_columns(table_name, keys):
+            return None
+        table = self._load(table_name, keys)
+        key_list = ", ".join(_quote(k) for k in keys)
+        not_null = " AND ".join(f"{_quote(k)} IS NOT NULL" for k in keys)
+        # One sort of the table: count each key with a window instead of joining back to a GROUP BY
+        sql = (
+            f"SELECT {ROW_COLUMN}, {key_list} FROM ("
+            f"SELECT {ROW_COLUMN}, {key_list}, COUNT(*) OVER (PARTITION BY {key_list}) AS key_count "
+            f"FROM {table} WHERE {not_null}) "
+            f"WHERE key_count > 1 ORDER BY {key_list}, {ROW_COLUMN}"
+        )
+        groups: List[List[int]] = []
+        current_key = None
+        for row in self._query(sql):
+            key = tuple(row[1:])
+            if not groups or key != current_key:
+                groups.append([])
+                current_key = key
+            groups[-1].append(int(row[0]))
+        return groups
+
+
+__all__ = [
+    "SQL_ENGINES",
+    "SqlRuleEngine",
+    "duckdb_available",
+]
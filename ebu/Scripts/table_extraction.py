@@ -0,0 +1,577 @@
+# table_extraction.py
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+
+# Tables read for a validation run, in report order
+VALIDATION_TABLES: List[str] = [
+    "Link",
+    "Alignment",
+    "RoadCondition",
+    "RoadInventory",
+    "BridgeInventory",
+    "CulvertCondition",
+    "CulvertInventory",
+    "RetainingWallCondition",
+    "RetainingWallInventory",
+    "TrafficVolume",
+    "CODE_AN_UnitCostsPER",
+    "CODE_AN_UnitCostsPERUnpaved",
+    "CODE_AN_UnitCostsREH",
+    "CODE_AN_UnitCostsRIGID",
+    "CODE_AN_UnitCostsRM",
+    "CODE_AN_UnitCostsWidening",
+]
+
+# Upper bound on concurrent table readers (mdb-export processes, connections, ...)
+DEFAULT_MAX_WORKERS: int = 4
+
+
+# Access column types (mdb-schema and ODBC type names) -> pandas nullable dtypes.
+# Types not listed here (DateTime, OLE, ...) map to None and are left to pandas inference.
+ACCESS_DTYPES: Dict[str, str] = {
+    "boolean": "boolean",
+    "bit": "boolean",
+    "byte": "Int64",
+    "integer": "Int64",
+    "long integer": "Int64",
+    "smallint": "Int64",
+    "counter": "Int64",
+    "single": "Float64",
+    "double": "Float64",
+    "real": "Float64",
+    "currency": "Float64",
+    "numeric": "Float64",
+    "decimal": "Float64",
+    "text": "string",
+    "memo": "string",
+    "memo/hyperlink": "string",
+    "varchar": "string",
+    "longchar": "string",
+}
+
+_CREATE_TABLE_RE = re.compile(r'CREATE TABLE \[([^\]]+)\]\s*\((.*?)\n\s*\);', re.S)
+_COLUMN_RE = re.compile(r'^\s*\[([^\]]+)\]\s+(.+?)\s*,?\s*$')
+
+# Read size used to discard the rest of an mdb-export that failed to parse
+STREAM_DRAIN_BYTES: int = 1 << 16
+
+# Column separator for mdb-sql output; unlike tab or comma it does not occur in the data
+MDB_SQL_DELIMITER: str = "\x1f"
+
+
+class MdbExportError(RuntimeError):
+    """mdb-export exited with a non-zero status."""
+
+    def __init__(self, table_name: str, returncode: int, stderr: str):
+        self.table_name = table_name
+        self.returncode = returncode
+        self.stderr = stderr
+        detail = stderr.strip() or "no error output"
+        super().__init__(f"mdb-export failed for table {table_name} (exit code {returncode}): {detail}")
+
+
+class MdbSqlError(RuntimeError):
+    """mdb-sql failed, or printed output that does not match the query."""
+
+    def __init__(self, query: str, detail: str):
+        self.query = query
+        self.detail = detail
+        super().__init__(f"mdb-sql failed for {query!r}: {detail}")
+
+
+def _access_connection(db_path: str):
+    import pyodbc
+    conn_str = (
+        r'DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};'
+        f'DBQ={db_path};'
+    )
+    return pyodbc.connect(conn_str)
+
+
+def list_tables(db_path: str) -> List[str]:
+    """
+    Get all table names from the database (pyodbc on Windows, MDBTools elsewhere).
+    Returns an empty list if the catalog cannot be read.
+    """
+    try:
+        if os.name == 'nt':
+            conn = _access_connection(db_path)
+            try:
+                cursor = conn.cursor()
+                tables = [row.table_name for row in cursor.tables() if row.table_type == 'TABLE']
+                cursor.close()
+                return tables
+            finally:
+                conn.close()
+        result = subprocess.run(['mdb-tables', '-1', db_path],
+                                capture_output=True, text=True, check=True)
+        return [table.strip() for table in result.stdout.split('\n') if table.strip()]
+    except Exception as e:
+        print(f"Error getting tables: {e}")
+        return []
+
+
+def _access_type_to_dtype(type_name: str) -> Optional[str]:
+    base = re.sub(r'\(.*?\)|NOT NULL', '', type_name, flags=re.I).strip().lower()
+    return ACCESS_DTYPES.get(base)
+
+
+def parse_mdb_schema(ddl: str) -> Dict[str, Dict[str, Optional[str]]]:
+    """
+    Parse mdb-schema DDL into {table: {column: pandas dtype}}, in table
+    column order. Columns without a known nullable dtype map to None.
+    """
+    schema: Dict[str, Dict[str, Optional[str]]] = {}
+    for table_name, body in _CREATE_TABLE_RE.findall(ddl):
+        columns: Dict[str, Optional[str]] = {}
+        for line in body.splitlines():
+            match = _COLUMN_RE.match(line)
+            if match:
+                columns[match.group(1)] = _access_type_to_dtype(match.group(2))
+        schema[table_name] = columns
+    return schema
+
+
+def read_schema(db_path: str) -> Dict[str, Dict[str, Optional[str]]]:
+    """
+    Read the columns and column types of every table from the Access catalog
+    (ODBC column metadata on Windows, mdb-schema elsewhere).
+    Returns an empty dict if the schema cannot be read.
+    """
+    try:
+        if os.name == 'nt':
+            conn = _access_connection(db_path)
+            try:
+                cursor = conn.cursor()
+                schema: Dict[str, Dict[str, Optional[str]]] = {}
+                for col in cursor.columns():
+                    schema.setdefault(col.table_name, {})[col.column_name] = _access_type_to_dtype(col.type_name)
+                cursor.close()
+                return schema
+            finally:
+                conn.close()
+        result = subprocess.run(['mdb-schema', db_path],
+                                capture_output=True, text=True, check=True)
+        return parse_mdb_schema(result.stdout)
+    except Exception as e:
+        print(f"Error reading schema: {e}")
+        return {}
+
+
+def _known_dtypes(column_types: Optional[Dict[str, Optional[str]]]) -> Dict[str, str]:
+    return {col: dtype for col, dtype in (column_types or {}).items() if dtype}
+
+
+def apply_schema(df: pd.DataFrame, column_types: Optional[Dict[str, Optional[str]]] = None) -> pd.DataFrame:
+    """
+    Cast columns to their schema dtypes where the values allow it, and give
+    every other column the matching nullable dtype (Int64, Float64, boolean,
+    string). Columns that cannot be cast are left as they are.
+    """
+    for col, dtype in _known_dtypes(column_types).items():
+        if col not in df.columns or str(df[col].dtype) == dtype:
+            continue
+        try:
+            if dtype in ("Int64", "Float64", "boolean") and df[col].dtype == object:
+                df[col] = pd.to_numeric(df[col]).astype(dtype)
+            else:
+                df[col] = df[col].astype(dtype)
+        except (ValueError, TypeError):
+            print(f"Warning: column {col} does not match its {dtype} schema type; left untyped")
+    return df.convert_dtypes()
+
+
+def stream_mdb_export(
+    db_path: str,
+    table_name: str,
+    chunksize: Optional[int] = None,
+    dtype: Optional[Dict[str, str]] = None,
+    usecols: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Run mdb-export and parse its stdout directly as it is produced, so the CSV
+    text is never held in memory as a whole. With chunksize, the parser reads
+    that many rows at a time and the chunks are concatenated at the end.
+    With usecols, only those columns are parsed (mdb-export has no projection).
+
+    stderr goes to a temporary file (a pipe could fill up and stall the export)
+    and is reported in MdbExportError when the process exits non-zero. If the
+    output does not parse (e.g. a value that does not fit dtype), the export is
+    still read to its end and the parse error is raised.
+    """
+    with tempfile.TemporaryFile() as stderr_file:
+        proc = subprocess.Popen(['mdb-export', db_path, table_name],
+                                stdout=subprocess.PIPE, stderr=stderr_file)
+        df = None
+        parse_error = None
+        # A callable keeps columns missing from the table from being an error
+        selected = (lambda col: col in usecols) if usecols is not None else None
+        try:
+            if chunksize:
+                chunks = list(pd.read_csv(proc.stdout, chunksize=chunksize, dtype=dtype, usecols=selected))
+                df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+            else:
+                df = pd.read_csv(proc.stdout, dtype=dtype, usecols=selected)
+        except pd.errors.EmptyDataError:
+            df = pd.DataFrame()
+        except Exception as e:
+            parse_error = e
+            # Read the export to its end: closing the pipe early would kill
+            # mdb-export with a broken pipe and hide the parse error
+            while proc.stdout.read(STREAM_DRAIN_BYTES):
+                pass
+        finally:
+            proc.stdout.close()
+            returncode = proc.wait()
+
+        if returncode != 0:
+            stderr_file.seek(0)
+            stderr = stderr_file.read().decode("utf-8", errors="replace")
+            raise MdbExportError(table_name, returncode, stderr) from parse_error
+    if parse_error is not None:
+        raise parse_error
+    return df
+
+
+def _quote_identifier(name: str) -> str:
+    return name if re.fullmatch(r'\w+', name) else f"[{name}]"
+
+
+# Leading zeros of a whole number, as dropped by code_key ('007' -> '7', '00' -> '0')
+_LEADING_ZEROS_RE = r'^0+(?=\d+$)'
+
+
+def code_key(value) -> Optional[str]:
+    """
+    A row filter value as it is compared: trimmed text without the leading
+    zeros of a whole number, so '01' matches 1 and '0' matches '00' (the
+    rules of check_admcode_in_link_table). None for a missing value.
+    """
+    if value is None or value is pd.NA:
+        return None
+    return re.sub(_LEADING_ZEROS_RE, "", str(value).strip())
+
+
+def _code_keys(values: pd.Series) -> pd.Series:
+    return values.astype("string").str.strip().str.replace(_LEADING_ZEROS_RE, "", regex=True)
+
+
+def split_row_filter(
+    row_filter: Optional[Dict[str, str]],
+    column_types: Optional[Dict[str, Optional[str]]] = None,
+):
+    """
+    Split a row filter into the conditions a query tests exactly like
+    filter_rows (whole numbers on integer columns) and the rest, which
+    filter_rows applies after the read. Returns (pushed, rest).
+    """
+    pushed: Dict[str, str] = {}
+    rest: Dict[str, str] = {}
+    for col, value in (row_filter or {}).items():
+        key = code_key(value)
+        if (column_types or {}).get(col) == "Int64" and key is not None and key.isdigit():
+            pushed[col] = key
+        else:
+            rest[col] = value
+    return pushed, rest
+
+
+def _typed_value(value, dtype: Optional[str]):
+    value = code_key(value)
+    if dtype == "Int64":
+        return int(value)
+    if dtype == "Float64":
+        return float(value)
+    return str(value)
+
+
+def _sql_literal(value) -> str:
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def build_select(
+    table_name: str,
+    columns: Optional[List[str]] = None,
+    row_filter: Optional[Dict[str, str]] = None,
+    column_types: Optional[Dict[str, Optional[str]]] = None,
+    placeholder: Optional[str] = None,
+):
+    """
+    Build "SELECT <columns> FROM <table> [WHERE col = value AND ...]".
+    Filter values (see code_key) are inlined as literals typed after
+    column_types, or bound as parameters when a placeholder (e.g. '?' for
+    pyodbc) is given. Only conditions from split_row_filter match rows the
+    way filter_rows does. Returns (query, params).
+    """
+    select_list = ", ".join(_quote_identifier(c) for c in columns) if columns else "*"
+    query = f"SELECT {select_list} FROM {_quote_identifier(table_name)}"
+    params: list = []
+    if row_filter:
+        conditions = []
+        for col, value in row_filter.items():
+            value = _typed_value(value, (column_types or {}).get(col))
+            if placeholder:
+                conditions.append(f"{_quote_identifier(col)} = {placeholder}")
+                params.append(value)
+            else:
+                conditions.append(f"{_quote_identifier(col)} = {_sql_literal(value)}")
+        query += " WHERE " + " AND ".join(conditions)
+    return query, params
+
+
+def run_mdb_sql(db_path: str, query: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Run a single SELECT through mdb-sql and return the result as a DataFrame
+    of strings (NULLs and empty values become None).
+
+    The query is fed on stdin, output is requested unpadded and without the
+    footer, with MDB_SQL_DELIMITER between columns. Any row whose field count
+    differs from the header (e.g. a memo value containing a line break) makes
+    the result untrustworthy, so it raises MdbSqlError rather than guessing.
+    So does a header other than columns, the selected columns when given
+    (e.g. an mdb-sql that ignored the delimiter).
+    """
+    result = subprocess.run(['mdb-sql', '-p', '-F', '-d', MDB_SQL_DELIMITER, db_path],
+                            input=f"{query}\ngo\n", capture_output=True, text=True)
+    if result.returncode != 0:
+        raise MdbSqlError(query, result.stderr.strip() or f"exit code {result.returncode}")
+    lines = [line for line in result.stdout.split("\n") if line.strip()]
+    if not lines:
+        raise MdbSqlError(query, result.stderr.strip() or "no output")
+    header = [h.strip() for h in lines[0].split(MDB_SQL_DELIMITER)]
+    if columns is not None and header != list(columns):
+        raise MdbSqlError(query, f"header {header!r} does not match the selected columns")
+    rows = []
+    for number, line in enumerate(lines[1:], start=2):
+        fields = line.split(MDB_SQL_DELIMITER)
+        if len(fields) != len(header):
+            raise MdbSqlError(query, f"line {number} has {len(fields)} fields, expected {len(header)}")
+        rows.append([field if field.strip() != "" else None for field in fields])
+    return pd.DataFrame(rows, columns=header, dtype=object)
+
+
+def filter_rows(df: pd.DataFrame, row_filter: Optional[Dict[str, str]]) -> pd.DataFrame:
+    """
+    Keep the rows whose columns equal the row_filter values (compared by
+    code_key, so leading zeros do not matter). Tables without every filter
+    column are returned whole.
+    """
+    if not row_filter or not all(col in df.columns for col in row_filter):
+        return df
+    mask = pd.Series(True, index=df.index)
+    for col, value in row_filter.items():
+        mask &= (_code_keys(df[col]) == code_key(value)).fillna(False)
+    return df[mask].reset_index(drop=True)
+
+
+def select_rows(df: pd.DataFrame, columns: Optional[List[str]], row_filter: Optional[Dict[str, str]]) -> pd.DataFrame:
+    """filter_rows, then keep only columns (None: all of them)."""
+    df = filter_rows(df, row_filter)
+    if columns is None:
+        return df
+    wanted = set(columns)
+    return df[[c for c in df.columns if c in wanted]]
+
+
+def _read_columns(columns: Optional[List[str]], row_filter: Optional[Dict[str, str]]) -> Optional[List[str]]:
+    # The filter columns are read too, so filter_rows can test them before the projection
+    if columns is None or not row_filter:
+        return columns
+    return columns + [c for c in row_filter if c not in columns]
+
+
+def read_table(
+    db_path: str,
+    table_name: str,
+    chunksize: Optional[int] = None,
+    column_types: Optional[Dict[str, Optional[str]]] = None,
+    columns: Optional[List[str]] = None,
+    row_filter: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """
+    Read a table into a DataFrame with nullable dtypes taken from the Access
+    schema (column_types, see read_schema). Each call opens its own
+    connection or subprocess so that it can run in a worker thread.
+
+    columns limits the read to those columns (ones the table lacks are
+    skipped) and row_filter to rows matching {column: value}; it is ignored
+    for tables that do not have all the filter columns. Both are pushed into
+    the query where the backend allows it: a parameterised SELECT over ODBC,
+    or mdb-sql when it is installed and the schema is known (filter
+    conditions only as far as split_row_filter allows). Otherwise the table
+    is exported whole and trimmed in pandas.
+    """
+    table_columns = list(column_types or {})
+    if columns is not None and table_columns:
+        wanted = set(columns)
+        columns = [c for c in table_columns if c in wanted]
+    if row_filter and table_columns and not all(c in table_columns for c in row_filter):
+        row_filter = None
+    pushed, rest = split_row_filter(row_filter, column_types)
+    read_columns = _read_columns(columns, row_filter)
+
+    if os.name == 'nt':
+        # Without the schema a projection could name missing columns: read all, trim in pandas
+        pushdown = bool(table_columns)
+        query, params = build_select(table_name, read_columns if pushdown else None,
+                                     pushed, column_types, placeholder="?")
+        conn = _access_connection(db_path)
+        try:
+            if chunksize:
+                chunks = list(pd.read_sql_query(query, conn, params=params or None, chunksize=chunksize))
+                df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+            else:
+                df = pd.read_sql_query(query, conn, params=params or None)
+        finally:
+            conn.close()
+        return apply_schema(select_rows(df, columns, rest), column_types)
+
+    if (read_columns or pushed) and table_columns and shutil.which('mdb-sql'):
+        query, _ = build_select(table_name, read_columns, pushed, column_types)
+        try:
+            df = run_mdb_sql(db_path, query, columns=read_columns or table_columns)
+            return apply_schema(select_rows(df, columns, rest), column_types)
+        except (MdbSqlError, OSError) as e:
+            print(f"Warning: {e}; exporting {table_name} with mdb-export instead")
+
+    dtypes = _known_dtypes(column_types)
+    try:
+        df = stream_mdb_export(db_path, table_name, chunksize=chunksize,
+                               dtype=dtypes or None, usecols=read_columns)
+    except MdbExportError:
+        raise
+    except (ValueError, TypeError) as e:
+        # A value the typed parser rejects: export again and cast column by column.
+        # Text columns stay text so codes like '0011' keep their leading zeros.
+        print(f"Warning: typed read of {table_name} failed ({e}); falling back to inferred dtypes")
+        text_columns = {c: "string" for c, t in dtypes.items() if t == "string"}
+        df = stream_mdb_export(db_path, table_name, chunksize=chunksize,
+                               dtype=text_columns or None, usecols=read_columns)
+    return apply_schema(select_rows(df, columns, row_filter), column_types)
+
+
+def _snapshot_name(table_name: str, columns: Optional[List[str]], row_filter: Optional[Dict[str, str]]) -> str:
+    # Projected or filtered reads are cached apart from the full table
+    if columns is None and not row_filter:
+        return table_name
+    row_filter = {col: code_key(value) for col, value in (row_filter or {}).items()}
+    spec = json.dumps([sorted(columns) if columns is not None else None, row_filter], sort_keys=True)
+    return f"{table_name}-{hashlib.sha256(spec.encode('utf-8')).hexdigest()[:12]}"
+
+
+def extract_tables(
+    source,
+    table_names: Iterable[str] = VALIDATION_TABLES,
+    max_workers: Optional[int] = None,
+    cache=None,
+    chunksize: Optional[int] = None,
+    columns: Optional[Dict[str, List[str]]] = None,
+    row_filter: Optional[Dict[str, str]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Extract every requested table exactly once, using a bounded pool of workers.
+
+    source is a TableSource or a path for table_sources.open_source (Access
+    file, SQLite file, or Parquet/CSV directory). The table catalog and column types are read once up front; tables are
+    loaded with nullable dtypes from the schema. columns maps a table name to
+    the columns to read (tables not listed are read whole) and row_filter
+    restricts every table that has those columns, see read_table. Tables that
+    are not in the catalog (or fail to export) come back as empty DataFrames
+    so that the per-table column checks report them. When a SnapshotCache is
+    given, tables already cached for this file are loaded from it, as is
+    the catalog, so MDBTools is not invoked at all if every table that the
+    file has hits.
+    Returns {table_name: DataFrame}.
+    """
+    from table_sources import open_source
+
+    source = open_source(source)
+    table_names = list(table_names)
+    columns = columns or {}
+    if max_workers is None:
+        max_workers = min(DEFAULT_MAX_WORKERS, os.cpu_count() or 1)
+    snapshot_names = {t: _snapshot_name(t, columns.get(t), row_filter) for t in table_names}
+
+    frames: Dict[str, pd.DataFrame] = {}
+    cache_key = None
+    catalog = None
+    if cache is not None and cache.enabled and source.cacheable:
+        cache_key = cache.key_for(source.path)
+        catalog = cache.load_catalog(cache_key)
+        for table_name in table_names:
+            # Tables missing from a cached catalog are reported below without a lookup
+            if catalog is not None and table_name not in catalog["tables"]:
+                continue
+            cached = cache.load(cache_key, snapshot_names[table_name])
+            if cached is not None:
+                frames[table_name] = cached
+    pending = [t for t in table_names if t not in frames]
+    if not pending:
+        return frames
+
+    if catalog is not None:
+        available = set(catalog["tables"])
+        schema = catalog["schema"]
+    else:
+        tables = source.list_tables()
+        available = set(tables)
+        schema = source.read_schema()
+        # An unreadable catalog or schema is not cached, so the next run asks again
+        if cache_key is not None and tables and schema:
+            cache.store_catalog(cache_key, tables, schema)
+
+    def _extract(table_name: str) -> pd.DataFrame:
+        # An unreadable catalog should not hide tables that can still be exported
+        if available and table_name not in available:
+            print(f"⚠️ Table {table_name} not found in database")
+            return pd.DataFrame()
+        try:
+            df = source.read_table(table_name, chunksize=chunksize, column_types=schema.get(table_name),
+                                   columns=columns.get(table_name), row_filter=row_filter)
+        except Exception as e:
+            print(f"Error reading table {table_name}: {e}")
+            return pd.DataFrame()
+        if cache_key is not None:
+            cache.store(cache_key, snapshot_names[table_name], df)
+        return df
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        frames.update(zip(pending, pool.map(_extract, pending)))
+    if cache_key is not None:
+        cache.evict()
+    return {t: frames[t] for t in table_names}
+
+
+__all__ = [
+    "VALIDATION_TABLES",
+    "DEFAULT_MAX_WORKERS",
+    "ACCESS_DTYPES",
+    "MDB_SQL_DELIMITER",
+    "MdbExportError",
+    "MdbSqlError",
+    "list_tables",
+    "parse_mdb_schema",
+    "read_schema",
+    "apply_schema",
+    "stream_mdb_export",
+    "code_key",
+    "split_row_filter",
+    "build_select",
+    "run_mdb_sql",
+    "filter_rows",
+    "select_rows",
+    "read_table",
+    "extract_tables",
+]
@@ -0,0 +1,301 @@
+# table_sources.py
+import json
+import os
+import re
+import sqlite3
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from table_extraction import (
+    VALIDATION_TABLES,
+    apply_schema,
+    build_select,
+    list_tables as _access_list_tables,
+    read_schema as _access_read_schema,
+    read_table as _access_read_table,
+    select_rows,
+    split_row_filter,
+)
+
+
+ACCESS_EXTENSIONS = (".accdb", ".mdb")
+SQLITE_EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+
+# Column types written next to the tables of a directory source
+SCHEMA_FILE = "schema.json"
+
+_NULLABLE_DTYPES = ("Int64", "Float64", "boolean", "string")
+
+# SQLite declared types -> pandas nullable dtypes, by SQLite's affinity rules
+_SQLITE_AFFINITY = [
+    (re.compile(r'BOOL', re.I), "boolean"),
+    (re.compile(r'INT', re.I), "Int64"),
+    (re.compile(r'CHAR|CLOB|TEXT', re.I), "string"),
+    (re.compile(r'REAL|FLOA|DOUB|NUMERIC|DECIMAL', re.I), "Float64"),
+]
+
+
+class TableSource(ABC):
+    """
+    A database the validators can read tables from.
+
+    Implementations return the table catalog, the column types
+    ({table: {column: pandas dtype or None}}, in column order) and single
+    tables; read_table takes the same projection and row filter as
+    table_extraction.read_table. Every call must be safe to run from a
+    worker thread.
+    """
+
+    # Whether SnapshotCache should keep Parquet copies of this source's tables
+    cacheable = True
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @abstractmethod
+    def list_tables(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def read_schema(self) -> Dict[str, Dict[str, Optional[str]]]:
+        ...
+
+    @abstractmethod
+    def read_table(
+        self,
+        table_name: str,
+        chunksize: Optional[int] = None,
+        column_types: Optional[Dict[str, Optional[str]]] = None,
+        columns: Optional[List[str]] = None,
+        row_filter: Optional[Dict[str, str]] = None,
+    ) -> pd.DataFrame:
+        ...
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.path!r})"
+
+
+class AccessSource(TableSource):
+    """An .accdb/.mdb file, read with pyodbc on Windows and MDBTools elsewhere."""
+
+    def list_tables(self) -> List[str]:
+        return _access_list_tables(self.path)
+
+    def read_schema(self) -> Dict[str, Dict[str, Optional[str]]]:
+        return _access_read_schema(self.path)
+
+    def read_table(self, table_name, chunksize=None, column_types=None, columns=None, row_filter=None):
+        return _access_read_table(self.path, table_name, chunksize=chunksize, column_types=column_types,
+                                  columns=columns, row_filter=row_filter)
+
+
+def _sqlite_type_to_dtype(declared: str) -> Optional[str]:
+    for pattern, dtype in _SQLITE_AFFINITY:
+        if pattern.search(declared or ""):
+            return dtype
+    return None
+
+
+class SQLiteSource(TableSource):
+    """A SQLite database file, opened read-only; projection and filter run in SQL."""
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+
+    def list_tables(self) -> List[str]:
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY rowid").fetchall()
+            return [name for (name,) in rows if not name.startswith("sqlite_")]
+        finally:
+            conn.close()
+
+    def read_schema(self) -> Dict[str, Dict[str, Optional[str]]]:
+        conn = self._connect()
+        try:
+            schema: Dict[str, Dict[str, Optional[str]]] = {}
+            for table_name in self.list_tables():
+                escaped = table_name.replace('"', '""')
+                info = conn.execute(f'PRAGMA table_info("{escaped}")').fetchall()
+                schema[table_name] = {row[1]: _sqlite_type_to_dtype(row[2]) for row in info}
+            return schema
+        finally:
+            conn.close()
+
+    def read_table(self, table_name, chunksize=None, column_types=None, columns=None, row_filter=None):
+        table_columns = list(column_types or {})
+        # Without the schema a projection could name missing columns: read all, trim in pandas
+        pushdown = bool(table_columns)
+        if columns is not None and pushdown:
+            wanted = set(columns)
+            columns = [c for c in table_columns if c in wanted]
+        if row_filter and pushdown and not all(c in table_columns for c in row_filter):
+            row_filter = None
+        # The filter columns the query does not test are read too, for filter_rows
+        pushed, rest = split_row_filter(row_filter, column_types)
+        read_columns = columns
+        if columns and rest:
+            read_columns = columns + [c for c in rest if c not in columns]
+        query, params = build_select(table_name, (read_columns or None) if pushdown else None,
+                                     pushed, column_types, placeholder="?")
+        conn = self._connect()
+        try:
+            if chunksize:
+                chunks = list(pd.read_sql_query(query, conn, params=params or None, chunksize=chunksize))
+                df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+            else:
+                df = pd.read_sql_query(query, conn, params=params or None)
+        finally:
+            conn.close()
+        return apply_schema(select_rows(df, columns, rest), column_types)
+
+
+class DirectorySource(TableSource):
+    """
+    A directory holding one <table>.parquet or <table>.csv file per table.
+    Column types come from schema.json when present (written by
+    convert_tables), otherwise from the Parquet files themselves; CSV
+    columns without a schema entry are read as text.
+    """
+
+    # The files are already a fast local format
+    cacheable = False
+
+    def _table_file(self, table_name: str) -> Optional[str]:
+        for ext in (".parquet", ".csv"):
+            path = os.path.join(self.path, table_name + ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def list_tables(self) -> List[str]:
+        names = []
+        for entry in sorted(os.listdir(self.path)):
+            stem, ext = os.path.splitext(entry)
+            if ext in (".parquet", ".csv") and stem not in names:
+                names.append(stem)
+        return names
+
+    def read_schema(self) -> Dict[str, Dict[str, Optional[str]]]:
+        schema_path = os.path.join(self.path, SCHEMA_FILE)
+        declared: Dict[str, Dict[str, Optional[str]]] = {}
+        if os.path.exists(schema_path):
+            with open(schema_path, "r", encoding="utf-8") as fh:
+                declared = json.load(fh)
+        schema: Dict[str, Dict[str, Optional[str]]] = {}
+        for table_name in self.list_tables():
+            path = self._table_file(table_name)
+            if path.endswith(".parquet"):
+                import pyarrow.parquet as pq
+                names = pq.read_schema(path).names
+            else:
+                names = list(pd.read_csv(path, nrows=0).columns)
+            types = declared.get(table_name, {})
+            schema[table_name] = {col: types.get(col) for col in names}
+        return schema
+
+    def read_table(self, table_name, chunksize=None, column_types=None, columns=None, row_filter=None):
+        path = self._table_file(table_name)
+        if path is None:
+            return pd.DataFrame()
+        if columns is not None:
+            wanted = set(columns)
+            columns = [c for c in (column_types or {}) if c in wanted] if column_types else columns
+        if row_filter and column_types and not all(c in column_types for c in row_filter):
+            row_filter = None
+        # The filter columns are read too, so filter_rows can test them before the projection
+        read_columns = columns
+        if columns is not None and row_filter:
+            read_columns = columns + [c for c in row_filter if c not in columns]
+        if path.endswith(".parquet"):
+            # Projected names are known to exist only when they come from the schema
+            df = pd.read_parquet(path, columns=read_columns if column_types else None)
+        else:
+            # Untyped CSV columns stay text so codes keep their leading zeros
+            dtype = {col: (t or "string") for col, t in (column_types or {}).items()}
+            df = pd.read_csv(path, dtype=dtype or None, usecols=lambda c: read_columns is None or c in read_columns)
+        return apply_schema(select_rows(df, columns, row_filter), column_types)
+
+
+def open_source(path) -> TableSource:
+    """
+    Pick the TableSource for a path: a directory of Parquet/CSV files, a
+    SQLite file, or an Access file. A TableSource is returned unchanged.
+    """
+    if isinstance(path, TableSource):
+        return path
+    if os.path.isdir(path):
+        return DirectorySource(path)
+    if path.lower().endswith(SQLITE_EXTENSIONS):
+        return SQLiteSource(path)
+    return AccessSource(path)
+
+
+def convert_tables(source, dest: str, table_names: Iterable[str] = VALIDATION_TABLES,
+                   fmt: str = "parquet", max_workers: Optional[int] = None) -> List[str]:
+    """
+    Copy tables from any source into a local format that later validation
+    runs can read much faster: a SQLite file when dest ends in .sqlite/.db,
+    otherwise a directory of Parquet (fmt="parquet") or CSV files plus
+    schema.json. Returns the names of the tables written.
+    """
+    from table_extraction import extract_tables
+
+    if fmt not in ("parquet", "csv"):
+        raise ValueError(f"Unsupported format: {fmt}")
+    source = open_source(source)
+    available = set(source.list_tables())
+    names = [t for t in table_names if not available or t in available]
+    tables = extract_tables(source, names, max_workers=max_workers)
+
+    if dest.lower().endswith(SQLITE_EXTENSIONS):
+        conn = sqlite3.connect(dest)
+        try:
+            for table_name, df in tables.items():
+                # SQLite stores booleans as integers; the declared type keeps them boolean on read
+                bool_columns = {col: "BOOLEAN" for col, dtype in df.dtypes.items() if str(dtype) == "boolean"}
+                df.to_sql(table_name, conn, if_exists="replace", index=False, dtype=bool_columns or None)
+            conn.commit()
+        finally:
+            conn.close()
+        return list(tables)
+
+    os.makedirs(dest, exist_ok=True)
+    schema = {}
+    for table_name, df in tables.items():
+        if fmt == "parquet":
+            df.to_parquet(os.path.join(dest, f"{table_name}.parquet"), index=False)
+        else:
+            df.to_csv(os.path.join(dest, f"{table_name}.csv"), index=False)
+        schema[table_name] = {col: (str(dtype) if str(dtype) in _NULLABLE_DTYPES else None)
+                              for col, dtype in df.dtypes.items()}
+    with open(os.path.join(dest, SCHEMA_FILE), "w", encoding="utf-8") as fh:
+        json.dump(schema, fh, indent=2)
+    return list(tables)
+
+
+__all__ = [
+    "ACCESS_EXTENSIONS",
+    "SQLITE_EXTENSIONS",
+    "SCHEMA_FILE",
+    "TableSource",
+    "AccessSource",
+    "SQLiteSource",
+    "DirectorySource",
+    "open_source",
+    "convert_tables",
+]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert a validation database into SQLite or Parquet/CSV files")
+    parser.add_argument("source", help=".accdb/.mdb, SQLite file, or Parquet/CSV directory")
+    parser.add_argument("dest", help="SQLite file (.sqlite/.db) or output directory")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    args = parser.parse_args()
+    written = convert_tables(args.source, args.dest, fmt=args.format)
+    print(f"✅ Wrote {len(written)} tables to {args.dest}")
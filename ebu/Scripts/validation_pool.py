@@ -0,0 +1,100 @@
+# validation_pool.py
+import importlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Link frame of the current run, set once per worker process by _init_worker
+_shared_link: Optional[pd.DataFrame] = None
+
+
+def _init_worker(script_dir: str, df_link: Optional[pd.DataFrame]) -> None:
+    global _shared_link
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    _shared_link = df_link
+
+
+def _load_validator(module_name: str, func_name: str) -> Callable:
+    module = importlib.import_module(f"all_table_validations.{module_name}")
+    return getattr(module, func_name)
+
+
+def _run_validator(module_name: str, func_name: str, df: pd.DataFrame, with_link: bool, kwargs: Dict[str, Any]):
+    func = _load_validator(module_name, func_name)
+    if with_link:
+        return func(df, _shared_link, **kwargs)
+    return func(df, **kwargs)
+
+
+class ValidatorPool:
+    """
+    Runs table validators either inline (max_workers 0/None: each one runs
+    when its result is asked for, in the caller's order) or in a
+    ProcessPoolExecutor (every submitted validator starts right away).
+
+    Validators are named by module and function in all_table_validations so
+    that the tasks pickle cheaply. The Link frame is sent to each worker once,
+    through the pool initializer, instead of with every task that needs it.
+    """
+
+    def __init__(self, df_link: Optional[pd.DataFrame] = None, max_workers: Optional[int] = None):
+        self.df_link = df_link
+        self.max_workers = max_workers or 0
+        self._executor = None
+        if self.max_workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(_SCRIPT_DIR, df_link),
+            )
+        self._pending: Dict[str, Any] = {}
+
+    @property
+    def parallel(self) -> bool:
+        return self._executor is not None
+
+    def submit(self, key: str, module_name: str, func_name: str, df: pd.DataFrame,
+               with_link: bool = False, **kwargs) -> None:
+        """Queue validator module_name.func_name(df[, df_link], **kwargs) under key."""
+        if self._executor is not None:
+            self._pending[key] = self._executor.submit(_run_validator, module_name, func_name, df, with_link, kwargs)
+        else:
+            self._pending[key] = (module_name, func_name, df, with_link, kwargs)
+
+    def result(self, key: str, **late_kwargs) -> pd.DataFrame:
+        """
+        The result of the validator queued under key. late_kwargs update its
+        keyword arguments when it has not started yet (inline mode); a worker
+        process has already been given the submitted ones.
+        """
+        task = self._pending.pop(key)
+        if self._executor is not None:
+            return task.result()
+        module_name, func_name, df, with_link, kwargs = task
+        kwargs = {**kwargs, **late_kwargs}
+        func = _load_validator(module_name, func_name)
+        return func(df, self.df_link, **kwargs) if with_link else func(df, **kwargs)
+
+    def discard(self, key: str) -> None:
+        """Drop the validator queued under key; a worker task not started yet is cancelled."""
+        task = self._pending.pop(key, None)
+        if self._executor is not None and task is not None:
+            task.cancel()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._pending.clear()
+
+
+__all__ = [
+    "ValidatorPool",
+]
@@ -473,13 +473,14 @@ def validate_db_file(request):
                 if validation_result and validation_result.get("success"):
                     # Collect validation summary
                     summary = validation_result.get("summary", {})
-                    total_errors = sum(summary.values()) if summary else 0
-                    validation_passed = total_errors == 16  # adjust logic if needed
+                    # Exact error rows per table (the "no errors" rows are not counted)
+                    total_errors = validation_result.get("total_errors", 0)
+                    validation_passed = total_errors == 0
 
                     excel_file_path = validation_result.get("output_file")
 
                     # Case 1: Errors exist OR force download
-                    if total_errors > 16 or force_download:
+                    if not validation_passed or force_download:
                         if excel_file_path and os.path.exists(excel_file_path):
                             from django.http import FileResponse
                             import mimetypes
@@ -491,7 +492,7 @@ def validate_db_file(request):
                             file_handle = open(excel_file_path, 'rb')
                             response = FileResponse(file_handle, content_type=mime_type)
 
-                            filename = "validation_errors.xlsx" if total_errors > 16 else "validation_report.xlsx"
+                            filename = "validation_errors.xlsx" if not validation_passed else "validation_report.xlsx"
                             response['Content-Disposition'] = f'attachment; filename="{filename}"'
                             response['X-Validation-Errors'] = str(total_errors)
                             response['X-Validation-Summary'] = json.dumps(summary)
@@ -1,3 +1,692 @@
-from django.test import TestCase
-
-# Create your tests here.
+import os
+import shutil
+import sqlite3
+import stat
+import sys
+import tempfile
+import textwrap
+import time
+from unittest import mock, skipUnless
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+# The validation scripts import their sibling modules by bare name
+SCRIPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Scripts")
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+import table_extraction  # noqa: E402
+from snapshot_cache import parquet_available  # noqa: E402
+from table_sources import TableSource  # noqa: E402
+
+
+class FakeToolsMixin:
+    """Put stand-in mdbtools commands (small Python scripts) first on PATH."""
+
+    def setUp(self):
+        super().setUp()
+        self.bin_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.bin_dir, ignore_errors=True)
+        path = self.bin_dir + os.pathsep + os.environ.get("PATH", "")
+        patcher = mock.patch.dict(os.environ, {"PATH": path})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fake_tool(self, name, body):
+        path = os.path.join(self.bin_dir, name)
+        with open(path, "w") as f:
+            f.write(f"#!{sys.executable}\nimport sys\n" + textwrap.dedent(body))
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+        return path
+
+
+class StreamMdbExportTests(FakeToolsMixin, SimpleTestCase):
+    ROWS = 500_000
+
+    def setUp(self):
+        super().setUp()
+        # Far more output than a pipe buffer holds, with a bad number near the start
+        self.fake_tool("mdb-export", f"""
+            out = sys.stdout
+            out.write("Link_No,Length,Remarks\\n")
+            for i in range({self.ROWS}):
+                length = "unknown" if i == 10 else str(i)
+                out.write(f"{{i:06d}},{{length}},row {{i}}\\n")
+        """)
+
+    def test_parse_error_is_raised_instead_of_a_broken_pipe(self):
+        with self.assertRaises(ValueError) as ctx:
+            table_extraction.stream_mdb_export("db.accdb", "Link", dtype={"Length": "Int64"})
+        self.assertNotIsInstance(ctx.exception, table_extraction.MdbExportError)
+
+    def test_read_table_falls_back_to_text_on_a_bad_value(self):
+        column_types = {"Link_No": "string", "Length": "Int64", "Remarks": "string"}
+        df = table_extraction.read_table("db.accdb", "Link", column_types=column_types)
+        self.assertEqual(len(df), self.ROWS)
+        self.assertEqual(df["Link_No"].iloc[0], "000000")
+        self.assertEqual(df["Length"].iloc[10], "unknown")
+
+
+LINK_TYPES = {"Link_No": "string", "Province_Code": "string", "Kabupaten_Code": "Int64", "Remarks": "string"}
+LINK_ROWS = [
+    ("001", "18", 1, "a"),
+    ("002", "018", 11, "b"),
+    ("003", "18", 11, "it's"),
+    ("004", "19", 1, None),
+    ("005", " 18 ", 1, "c"),
+]
+
+
+class BuildSelectTests(SimpleTestCase):
+    def test_identifiers_are_bracketed_when_not_plain_words(self):
+        query, params = table_extraction.build_select("Road Inventory", ["Link_No", "Lane Width"])
+        self.assertEqual(query, "SELECT Link_No, [Lane Width] FROM [Road Inventory]")
+        self.assertEqual(params, [])
+
+    def test_literals_are_typed_after_the_schema(self):
+        query, _ = table_extraction.build_select(
+            "Link", None, {"Kabupaten_Code": "011", "Province_Code": "O'Brien"}, LINK_TYPES)
+        self.assertEqual(query, "SELECT * FROM Link WHERE Kabupaten_Code = 11 AND Province_Code = 'O''Brien'")
+
+    def test_placeholders_bind_typed_parameters(self):
+        query, params = table_extraction.build_select("Link", ["Link_No"], {"Kabupaten_Code": "01"},
+                                                      LINK_TYPES, placeholder="?")
+        self.assertEqual(query, "SELECT Link_No FROM Link WHERE Kabupaten_Code = ?")
+        self.assertEqual(params, [1])
+
+
+class RowFilterTests(SimpleTestCase):
+    def link_frame(self):
+        frame = pd.DataFrame(LINK_ROWS, columns=list(LINK_TYPES))
+        return table_extraction.apply_schema(frame, LINK_TYPES)
+
+    def test_leading_zeros_do_not_matter(self):
+        df = table_extraction.filter_rows(self.link_frame(), {"Province_Code": "18", "Kabupaten_Code": "011"})
+        self.assertEqual(df["Link_No"].tolist(), ["002", "003"])
+
+    def test_only_whole_numbers_on_integer_columns_are_pushed(self):
+        pushed, rest = table_extraction.split_row_filter(
+            {"Province_Code": "018", "Kabupaten_Code": "01"}, LINK_TYPES)
+        self.assertEqual(pushed, {"Kabupaten_Code": "1"})
+        self.assertEqual(rest, {"Province_Code": "018"})
+
+    def test_sqlite_pushdown_matches_filter_rows(self):
+        from table_sources import SQLiteSource
+
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        path = os.path.join(tmp, "links.sqlite")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE Link (Link_No TEXT, Province_Code TEXT, Kabupaten_Code INTEGER, Remarks TEXT)")
+        conn.executemany("INSERT INTO Link VALUES (?, ?, ?, ?)", LINK_ROWS)
+        conn.commit()
+        conn.close()
+
+        source = SQLiteSource(path)
+        column_types = source.read_schema()["Link"]
+        for row_filter in ({"Province_Code": "18", "Kabupaten_Code": "01"},
+                           {"Province_Code": "018", "Kabupaten_Code": "11"},
+                           {"Kabupaten_Code": "001"}):
+            with self.subTest(row_filter=row_filter):
+                pushed = source.read_table("Link", column_types=column_types,
+                                           columns=["Link_No"], row_filter=row_filter)
+                expected = table_extraction.filter_rows(self.link_frame(), row_filter)
+                self.assertEqual(pushed["Link_No"].tolist(), expected["Link_No"].tolist())
+
+
+class MdbSqlTests(FakeToolsMixin, SimpleTestCase):
+    EXPORT = """
+        print("Link_No,Province_Code,Kabupaten_Code,Remarks")
+        for row in {rows!r}:
+            print(",".join('"%s"' % v if isinstance(v, str) else ("" if v is None else str(v)) for v in row))
+    """
+
+    def fake_mdb_sql(self, output):
+        # Records the query it was given, then prints output as its result
+        self.query_file = os.path.join(self.bin_dir, "query.sql")
+        self.fake_tool("mdb-sql", f"""
+            with open({self.query_file!r}, "w") as f:
+                f.write(sys.stdin.read())
+            sys.stdout.write({output!r})
+        """)
+
+    def read_query(self):
+        with open(self.query_file) as f:
+            return f.read()
+
+    def test_fields_are_split_on_the_delimiter(self):
+        d = table_extraction.MDB_SQL_DELIMITER
+        self.fake_mdb_sql(f"Link_No{d}Remarks\n001{d}a, b\n002{d}\n")
+        df = table_extraction.run_mdb_sql("db.accdb", "SELECT Link_No, Remarks FROM Link")
+        self.assertEqual(df.values.tolist(), [["001", "a, b"], ["002", None]])
+        self.assertEqual(self.read_query(), "SELECT Link_No, Remarks FROM Link\ngo\n")
+
+    def test_a_row_with_the_wrong_field_count_is_an_error(self):
+        d = table_extraction.MDB_SQL_DELIMITER
+        self.fake_mdb_sql(f"Link_No{d}Remarks\n001{d}first line\nsecond line\n")
+        with self.assertRaisesRegex(table_extraction.MdbSqlError, "line 3 has 1 fields, expected 2"):
+            table_extraction.run_mdb_sql("db.accdb", "SELECT Link_No, Remarks FROM Link")
+
+    def test_output_without_the_delimiter_is_an_error(self):
+        self.fake_mdb_sql("Link_No\tRemarks\n001\ta\n")
+        with self.assertRaisesRegex(table_extraction.MdbSqlError, "does not match the selected columns"):
+            table_extraction.run_mdb_sql("db.accdb", "SELECT Link_No, Remarks FROM Link",
+                                         columns=["Link_No", "Remarks"])
+
+    def test_read_table_pushes_the_filter_into_mdb_sql(self):
+        d = table_extraction.MDB_SQL_DELIMITER
+        self.fake_mdb_sql(f"Link_No{d}Province_Code{d}Kabupaten_Code\n001{d}18{d}1\n004{d}19{d}1\n005{d} 18 {d}1\n")
+        df = table_extraction.read_table("db.accdb", "Link", column_types=LINK_TYPES, columns=["Link_No"],
+                                         row_filter={"Province_Code": "18", "Kabupaten_Code": "01"})
+        self.assertEqual(self.read_query(),
+                         "SELECT Link_No, Province_Code, Kabupaten_Code FROM Link WHERE Kabupaten_Code = 1\ngo\n")
+        self.assertEqual(df.columns.tolist(), ["Link_No"])
+        self.assertEqual(df["Link_No"].tolist(), ["001", "005"])
+
+    def test_read_table_falls_back_to_mdb_export(self):
+        self.fake_mdb_sql("Link_No\n001\textra\n")
+        self.fake_tool("mdb-export", self.EXPORT.format(rows=LINK_ROWS))
+        row_filter = {"Province_Code": "018", "Kabupaten_Code": "1"}
+        df = table_extraction.read_table("db.accdb", "Link", column_types=LINK_TYPES,
+                                         columns=["Link_No", "Remarks"], row_filter=row_filter)
+        self.assertEqual(df.columns.tolist(), ["Link_No", "Remarks"])
+        self.assertEqual(df["Link_No"].tolist(), ["001", "005"])
+
+
+class DmsCheckTests(SimpleTestCase):
+    FIELDS = ["GPSPoint_East_Deg", "GPSPoint_East_Min", "GPSPoint_East_Sec"]
+
+    def test_partly_blank_coordinates_are_invalid(self):
+        from all_table_validations.validate_alignment import dms_checks
+
+        df = pd.DataFrame({
+            "GPSPoint_East_Deg": [105, None, None, 0, 105],
+            "GPSPoint_East_Min": [20, 20, None, 0, None],
+            "GPSPoint_East_Sec": [15, 15, None, 0, 15],
+        }, dtype="Float64")
+        invalid, all_zero = dms_checks(df, self.FIELDS)
+        self.assertEqual(invalid.tolist(), [False, True, False, False, True])
+        self.assertEqual(all_zero.tolist(), [False, False, True, True, False])
+
+    def test_text_that_is_not_a_number_is_invalid(self):
+        from all_table_validations.validate_alignment import dms_checks
+
+        df = pd.DataFrame({"GPSPoint_East_Deg": ["105", "x"], "GPSPoint_East_Min": ["20", "20"],
+                           "GPSPoint_East_Sec": ["15", "15"]}, dtype=object)
+        invalid, _ = dms_checks(df, self.FIELDS)
+        self.assertEqual(invalid.tolist(), [False, True])
+
+
+class UniqueKeyTests(SimpleTestCase):
+    def test_integer_key_values_keep_their_form(self):
+        from all_table_validations.unique_keys import duplicate_key_messages
+
+        df = pd.DataFrame({"Link_No": ["A", "A", "B"], "Year": [2023, 2023, None]}).astype(
+            {"Link_No": "string", "Year": "Int64"})
+        messages = duplicate_key_messages(df, [("Link_No", "Year")])
+        self.assertEqual(messages[0], ["Duplicate record for Link_No 'A' and Year '2023' - "
+                                       "the combination of Link_No, Year must be unique"])
+        self.assertEqual(sorted(messages), [0, 1])
+
+    def test_link_duplicates_name_the_duplicated_value(self):
+        from all_table_validations.validate_link import validate_link
+
+        df = pd.DataFrame({
+            "Province_Code": ["18", "18"], "Kabupaten_Code": ["11", "11"],
+            "Link_No": ["181100000001", "181100000002"], "Link_Code": ["L001", "L001"],
+            "Link_Name": ["Road 1", "Road 2"], "Link_Length_Official": [1.5, 2.0],
+            "Link_Length_Actual": [1.5, 2.0],
+        })
+        result = validate_link(df)
+        self.assertEqual(result["Validation_Message"].tolist(),
+                         ["Duplicate Link_Code 'L001' - Link_Code must be unique"] * 2)
+        self.assertEqual(result.attrs["rule_counts"], {"unique_key": 2})
+
+
+class ChainageTests(SimpleTestCase):
+    LINKS = pd.DataFrame({"Link_No": ["L1", "L2"], "Link_Length_Official": [1.0, 0.5]})
+
+    def segments(self, rows, **extra):
+        return pd.DataFrame(rows, columns=["Link_No", "ChainageFrom", "ChainageTo"]).assign(**extra)
+
+    def sweep(self, rows, key_columns=(), **extra):
+        from all_table_validations.chainage import interval_sweep
+
+        findings, summary = interval_sweep(self.segments(rows, **extra), key_columns, self.LINKS)
+        return findings, summary.set_index("Link_No").to_dict("index")
+
+    def test_touching_segments_cover_the_link(self):
+        findings, summary = self.sweep([("L1", 0, 400), ("L1", 400, 1000)])
+        self.assertEqual(findings, [])
+        self.assertEqual(summary["L1"]["Covered_m"], 1000.0)
+        self.assertEqual(summary["L1"]["Coverage_Pct"], 100.0)
+        self.assertEqual((summary["L1"]["Gaps"], summary["L1"]["Overlaps"]), (0, 0))
+
+    def test_overlapping_and_duplicate_segments(self):
+        findings, summary = self.sweep([("L1", 0, 500), ("L1", 450, 1000), ("L1", 450, 1000)])
+        self.assertEqual(findings, [
+            (1, "Segment 450-1000 overlaps the previous segment ending at 500.0 for Link_No 'L1'"),
+            (2, "Duplicate segment 450-1000 for Link_No 'L1'"),
+        ])
+        self.assertEqual(summary["L1"]["Overlaps"], 2)
+        self.assertEqual(summary["L1"]["Overlap_m"], 50.0 + 550.0)
+        self.assertEqual(summary["L1"]["Covered_m"], 1000.0)
+
+    def test_reversed_segments_are_reported_and_not_swept(self):
+        findings, summary = self.sweep([("L1", 0, 1000), ("L1", 700, 650)])
+        self.assertEqual(findings, [(1, "ChainageFrom (700) is greater than ChainageTo (650)")])
+        self.assertEqual(summary["L1"]["Reversed"], 1)
+        self.assertEqual(summary["L1"]["Overlaps"], 0)
+
+    def test_gaps_before_between_and_after_the_segments(self):
+        findings, summary = self.sweep([("L1", 100, 300), ("L1", 350, 900)])
+        self.assertEqual(findings, [])
+        self.assertEqual(summary["L1"]["Gaps"], 3)
+        self.assertEqual(summary["L1"]["Gap_m"], 100.0 + 50.0 + 100.0)
+        self.assertEqual(summary["L1"]["Covered_m"], 750.0)
+        self.assertEqual(summary["L1"]["Coverage_Pct"], 75.0)
+
+    def test_running_past_the_official_length_in_km(self):
+        findings, summary = self.sweep([("L2", 0, 505), ("L2", 505, 520)])
+        self.assertEqual(findings, [
+            (1, "ChainageTo (520 m) runs past Link_Length_Official (0.5 km = 500 m) for Link_No 'L2'"),
+        ])
+        self.assertEqual(summary["L2"]["Past_Link_Length"], 1)
+        self.assertEqual(summary["L2"]["Link_Length_Official_m"], 500.0)
+        self.assertEqual(summary["L2"]["Coverage_Pct"], 100.0)
+
+    def test_a_link_missing_from_link_has_no_coverage(self):
+        findings, summary = self.sweep([("L9", 0, 200), ("L9", 300, 5000)])
+        self.assertEqual(findings, [])
+        self.assertTrue(pd.isna(summary["L9"]["Coverage_Pct"]))
+        self.assertEqual(summary["L9"]["Covered_m"], 4900.0)
+        self.assertEqual((summary["L9"]["Gaps"], summary["L9"]["Past_Link_Length"]), (1, 0))
+
+    def test_key_columns_sweep_each_year_apart(self):
+        from all_table_validations.chainage import interval_sweep
+
+        df = self.segments([("L2", 0, 500), ("L2", 0, 500)], Year=[2022, 2023])
+        findings, summary = interval_sweep(df, ["Year"], self.LINKS)
+        self.assertEqual(findings, [])
+        self.assertEqual(summary[["Link_No", "Year", "Coverage_Pct"]].values.tolist(),
+                         [["L2", 2022, 100.0], ["L2", 2023, 100.0]])
+
+    def test_continuity_is_checked_in_chainage_order(self):
+        from all_table_validations.chainage import continuity_errors
+
+        df = self.segments([("L1", 300, 500), ("L1", 0, 300), ("L1", 550, 900), ("L2", 10, 500)])
+        self.assertEqual(continuity_errors(df, ["Link_No"]), [
+            (2, "ChainageFrom (550) must equal previous ChainageTo (500) for continuous chainage within the same link"),
+            (3, "ChainageFrom must start at 0 for the group ('L2',)"),
+        ])
+
+
+def failures_frame(rows):
+    """A validator result whose attrs list rows of (Record_No, Link_No, Rule, Validation_Message)."""
+    from all_table_validations.error_report import FAILURE_COLUMNS
+
+    frame = pd.DataFrame()
+    frame.attrs["failures"] = pd.DataFrame(rows, columns=FAILURE_COLUMNS)
+    return frame
+
+
+RUN_FAILURES = {
+    "Link": [
+        (1, "L1", "field", "Link_Name: missing"),
+        (2, "L2", "unique_key", "Duplicate Link_Code 'A' - Link_Code must be unique"),
+        (3, "L2", "unique_key", "Duplicate Link_Code 'A' - Link_Code must be unique"),
+    ],
+    "Alignment": [
+        (4, " L1 ", "link", "Link_No not found in Link table"),
+        (7, "L1", "gps", "Invalid GPS East coordinates"),
+        (9, "L3", "field", "Chainage: invalid number"),
+        (12, None, "field", "Link_No: missing"),
+    ],
+}
+
+
+class ErrorRunMixin:
+    """Validation runs with RUN_FAILURES in their error store, under a temporary scratch root."""
+
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def make_run(self, finish=True):
+        """A run workspace with RUN_FAILURES in its error store; returns the run id."""
+        from error_store import ERRORS_FILE, ErrorStore
+        from run_workspace import new_run_id
+
+        run_id = new_run_id()
+        os.makedirs(os.path.join(self.root, run_id))
+        store = ErrorStore(os.path.join(self.root, run_id, ERRORS_FILE))
+        for table_name, rows in RUN_FAILURES.items():
+            store.add(table_name, failures_frame(rows))
+        if finish:
+            store.finish({"success": True, "total_errors": 7})
+        else:
+            store.close()
+        return run_id
+
+    def open_run(self, run_id):
+        from error_store import open_store
+
+        store = open_store(os.path.join(self.root, run_id))
+        self.addCleanup(store.close)
+        return store
+
+
+class ErrorStoreTests(ErrorRunMixin, SimpleTestCase):
+    def test_counts_per_table_and_rule(self):
+        store = self.open_run(self.make_run())
+        self.assertEqual(store.counts(), {
+            "Link": {"field": 1, "unique_key": 2},
+            "Alignment": {"link": 1, "gps": 1, "field": 2},
+        })
+        self.assertEqual(store.summary(), {"success": True, "total_errors": 7})
+
+    def test_link_numbers_are_trimmed_and_blank_ones_null(self):
+        errors = self.open_run(self.make_run()).page(table="Alignment")["errors"]
+        self.assertEqual([e["link_no"] for e in errors], ["L1", "L1", "L3", None])
+
+    def test_page_size_is_bounded(self):
+        from error_store import MAX_PAGE_SIZE
+
+        store = self.open_run(self.make_run())
+        self.assertEqual(len(store.page(limit=0)["errors"]), 1)
+        self.assertEqual(len(store.page(limit=MAX_PAGE_SIZE + 1)["errors"]), 7)
+
+    def test_an_unfinished_run_has_no_summary(self):
+        self.assertIsNone(self.open_run(self.make_run(finish=False)).summary())
+
+
+class ValidationErrorsViewTests(ErrorRunMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        settings_patch = self.settings(VALIDATION_SCRATCH_ROOT=self.root)
+        settings_patch.enable()
+        self.addCleanup(settings_patch.disable)
+
+    def get(self, run_id, **params):
+        import json
+
+        from django.test import RequestFactory
+        from ebu.views import validation_errors
+
+        request = RequestFactory().get(f"/validation-runs/{run_id}/errors/", params)
+        response = validation_errors(request, run_id)
+        return response.status_code, json.loads(response.content)
+
+    def walk(self, run_id, **params):
+        """Every page of a listing; returns the errors and the pages' sizes."""
+        errors, sizes, cursor = [], [], None
+        while True:
+            status, page = self.get(run_id, **params, **({"cursor": cursor} if cursor else {}))
+            self.assertEqual(status, 200)
+            errors += page["errors"]
+            sizes.append(len(page["errors"]))
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return errors, sizes
+
+    def test_pages_walk_every_error_once_in_run_order(self):
+        run_id = self.make_run()
+        errors, sizes = self.walk(run_id, limit=2)
+        self.assertEqual(sizes, [2, 2, 2, 1])
+        expected = [(table, str(row[0]), row[3]) for table, rows in RUN_FAILURES.items() for row in rows]
+        self.assertEqual([(e["table"], e["record_no"], e["message"]) for e in errors], expected)
+
+        status, page = self.get(run_id, limit=2)
+        self.assertTrue(page["complete"])
+        self.assertEqual(page["count"], 7)
+        self.assertEqual(page["counts"]["Link"], {"field": 1, "unique_key": 2})
+        self.assertEqual(page["summary"]["total_errors"], 7)
+
+    def test_filters(self):
+        run_id = self.make_run()
+        for params, record_nos in (
+            ({"table": "Alignment"}, ["4", "7", "9", "12"]),
+            ({"rule": "unique_key"}, ["2", "3"]),
+            ({"table": "Alignment", "rule": "field"}, ["9", "12"]),
+            ({"link_no": " L1 "}, ["1", "4", "7"]),
+            ({"table": "Link", "link_no": "L3"}, []),
+        ):
+            with self.subTest(params=params):
+                errors, _ = self.walk(run_id, limit=1, **params)
+                self.assertEqual([e["record_no"] for e in errors], record_nos)
+                self.assertEqual(self.get(run_id, **params)[1]["count"], len(record_nos))
+
+    def test_an_unfinished_run_is_not_complete(self):
+        status, page = self.get(self.make_run(finish=False))
+        self.assertEqual(status, 200)
+        self.assertFalse(page["complete"])
+        self.assertEqual(page["count"], 7)
+
+    def test_unknown_runs_are_not_found(self):
+        from run_workspace import new_run_id
+
+        self.assertEqual(self.get("../../etc")[0], 404)
+        self.assertEqual(self.get(new_run_id())[0], 404)
+
+    def test_bad_limit_or_cursor_is_rejected(self):
+        run_id = self.make_run()
+        for params in ({"limit": "0"}, {"limit": "ten"}, {"limit": "-1"}, {"cursor": "abc"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(run_id, **params)[0], 400)
+
+
+
+
+class FrameSource(TableSource):
+    """In-memory tables behind a real file (so it has a content hash); counts every read."""
+
+    def __init__(self, path, frames):
+        super().__init__(path)
+        self.frames = frames
+        self.catalog_reads = 0
+        self.table_reads = 0
+
+    def list_tables(self):
+        self.catalog_reads += 1
+        return list(self.frames)
+
+    def read_schema(self):
+        self.catalog_reads += 1
+        return {name: {col: None for col in df.columns} for name, df in self.frames.items()}
+
+    def read_table(self, table_name, chunksize=None, column_types=None, columns=None, row_filter=None):
+        self.table_reads += 1
+        return self.frames[table_name].copy()
+
+
+@skipUnless(parquet_available(), "snapshots need pyarrow")
+class SnapshotCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.db_path = os.path.join(self.tmp, "roads.accdb")
+        with open(self.db_path, "wb") as fh:
+            fh.write(b"first")
+
+    def make_cache(self, max_bytes=None):
+        from snapshot_cache import SnapshotCache
+
+        return SnapshotCache(os.path.join(self.tmp, "cache"), max_bytes=max_bytes)
+
+    def test_load_counts_misses_and_hits(self):
+        cache = self.make_cache()
+        key = cache.key_for(self.db_path)
+        df = pd.DataFrame({"Link_No": ["L1", "L2"], "Length": [1.5, 2.0]})
+        self.assertIsNone(cache.load(key, "Link"))
+        cache.store(key, "Link", df)
+        pd.testing.assert_frame_equal(cache.load(key, "Link"), df)
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1})
+
+    def test_a_changed_file_gets_a_new_key(self):
+        cache = self.make_cache()
+        key = cache.key_for(self.db_path)
+        cache.store(key, "Link", pd.DataFrame({"Link_No": ["L1"]}))
+        with open(self.db_path, "wb") as fh:
+            fh.write(b"second")
+        new_key = cache.key_for(self.db_path)
+        self.assertNotEqual(new_key, key)
+        self.assertIsNone(cache.load(new_key, "Link"))
+
+    def test_evicts_least_recently_used_snapshots(self):
+        cache = self.make_cache()
+        df = pd.DataFrame({"Link_No": [f"L{i}" for i in range(100)]})
+        for age, key in enumerate(["newest", "middle", "oldest"]):
+            cache.store(key, "Link", df)
+            stamp = 1_000_000 - age * 100
+            os.utime(os.path.join(cache.root, key), (stamp, stamp))
+        # Reading a snapshot makes it the most recently used
+        cache.load("oldest", "Link")
+        snapshot_size = os.path.getsize(os.path.join(cache.root, "newest", "Link.parquet"))
+        cache.max_bytes = 2 * snapshot_size
+        cache.evict()
+        self.assertEqual(sorted(os.listdir(cache.root)), ["newest", "oldest"])
+
+    def test_catalog_round_trip(self):
+        cache = self.make_cache()
+        key = cache.key_for(self.db_path)
+        self.assertIsNone(cache.load_catalog(key))
+        schema = {"Link": {"Link_No": "string", "Length": "Float64"}}
+        cache.store_catalog(key, ["Link"], schema)
+        self.assertEqual(cache.load_catalog(key), {"tables": ["Link"], "schema": schema})
+
+    def test_repeat_extraction_does_not_read_the_source(self):
+        cache = self.make_cache()
+        frames = {"Link": pd.DataFrame({"Link_No": ["L1", "L2"]})}
+        first = FrameSource(self.db_path, frames)
+        table_extraction.extract_tables(first, ["Link", "Alignment"], cache=cache)
+        self.assertEqual((first.catalog_reads, first.table_reads), (2, 1))
+
+        again = FrameSource(self.db_path, frames)
+        tables = table_extraction.extract_tables(again, ["Link", "Alignment"], cache=cache)
+        # The cached catalog says Alignment is absent, so nothing is asked of the file
+        self.assertEqual((again.catalog_reads, again.table_reads), (0, 0))
+        self.assertEqual(tables["Link"]["Link_No"].tolist(), ["L1", "L2"])
+        self.assertTrue(tables["Alignment"].empty)
+
+
+class RunWorkspaceTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def make_workspace(self, size=0, finished=True, age=0):
+        """A workspace holding one file of size bytes, last used age seconds ago."""
+        from run_workspace import RunWorkspace
+
+        workspace = RunWorkspace(self.root)
+        with open(workspace.file("report.xlsx"), "wb") as fh:
+            fh.write(b"x" * size)
+        if finished:
+            workspace.release(keep=["report.xlsx"])
+        stamp = time.time() - age
+        os.utime(workspace.path, (stamp, stamp))
+        return workspace
+
+    def remaining(self):
+        return set(os.listdir(self.root))
+
+    def test_release_keeps_only_the_named_files(self):
+        from run_workspace import ACTIVE_MARKER, RunWorkspace
+
+        workspace = RunWorkspace(self.root)
+        self.assertTrue(os.path.exists(workspace.file(ACTIVE_MARKER)))
+        for name in ("upload.accdb", "report.xlsx"):
+            with open(workspace.file(name), "w") as fh:
+                fh.write(name)
+        os.makedirs(workspace.file("tables"))
+        workspace.release(keep=["report.xlsx"])
+        self.assertEqual(os.listdir(workspace.path), ["report.xlsx"])
+
+    def test_rejects_run_ids_that_could_leave_the_root(self):
+        from run_workspace import RunWorkspace
+
+        with self.assertRaises(ValueError):
+            RunWorkspace(self.root, run_id="../outside")
+
+    def test_janitor_removes_workspaces_past_the_age_limit(self):
+        from run_workspace import WorkspaceJanitor
+
+        stale = self.make_workspace(finished=False, age=7200)
+        fresh = self.make_workspace(age=60)
+        result = WorkspaceJanitor(self.root, max_age_seconds=3600).sweep()
+        self.assertEqual(result["removed"], 1)
+        self.assertEqual(self.remaining(), {fresh.run_id})
+        self.assertNotIn(stale.run_id, self.remaining())
+
+    def test_janitor_evicts_oldest_finished_workspaces_by_size(self):
+        from run_workspace import WorkspaceJanitor
+
+        active = self.make_workspace(size=1000, finished=False, age=300)
+        oldest = self.make_workspace(size=1000, age=200)
+        older = self.make_workspace(size=1000, age=100)
+        newest = self.make_workspace(size=1000, age=0)
+        os.makedirs(os.path.join(self.root, "not-a-run"))
+        result = WorkspaceJanitor(self.root, max_age_seconds=3600, max_bytes=2500).sweep()
+        # The running workspace is never evicted for size, even though it is the oldest
+        self.assertEqual(result, {"removed": 2, "bytes": 2000})
+        self.assertEqual(self.remaining(), {active.run_id, newest.run_id, "not-a-run"})
+        self.assertFalse({oldest.run_id, older.run_id} & self.remaining())
+
+
+class StreamReportTests(SimpleTestCase):
+    SHEETS = {
+        "Link": pd.DataFrame({"Link_No": ["L1", "L2"], "Error": ["Length: missing", None]}),
+        "Alignment": pd.DataFrame({"Link_No": ["L3"], "Error": ["GPS: invalid"]}),
+    }
+
+    def stream(self, report_format, sheets=None, finished=None):
+        """The bytes of a streamed report whose run writes sheets; finished is set when the run ends."""
+        from report_writer import stream_report
+
+        def run(writer):
+            try:
+                for name, df in (sheets or self.SHEETS).items():
+                    writer.add_sheet(name, df)
+                return {"success": True, "total_errors": 3, "output_file": "ignored"}
+            finally:
+                if finished is not None:
+                    finished.set()
+
+        return stream_report(report_format, run)
+
+    def test_csv_zip_ends_with_the_summary(self):
+        import io
+        import json
+        import zipfile
+
+        from report_writer import SUMMARY_NAME
+
+        with zipfile.ZipFile(io.BytesIO(b"".join(self.stream("csv")))) as archive:
+            self.assertEqual(archive.namelist(), ["Link.csv", "Alignment.csv", f"{SUMMARY_NAME}.json"])
+            link = pd.read_csv(archive.open("Link.csv"))
+            summary = json.loads(archive.read(f"{SUMMARY_NAME}.json"))
+        self.assertEqual(link["Link_No"].tolist(), ["L1", "L2"])
+        self.assertEqual(summary, {"success": True, "total_errors": 3})
+
+    def test_jsonl_ends_with_the_summary(self):
+        import json
+
+        from report_writer import JSONL_TABLE_KEY, SUMMARY_NAME
+
+        records = [json.loads(line) for line in b"".join(self.stream("jsonl")).decode("utf-8").splitlines()]
+        self.assertEqual([r[JSONL_TABLE_KEY] for r in records], ["Link", "Link", "Alignment", SUMMARY_NAME])
+        self.assertEqual(records[-1], {JSONL_TABLE_KEY: SUMMARY_NAME, "success": True, "total_errors": 3})
+
+    def test_run_ends_when_the_stream_is_closed_unread(self):
+        import threading
+
+        from report_writer import STREAM_BLOCK_BYTES, STREAM_QUEUE_BLOCKS
+
+        # More than the queue holds, so the producer blocks until the stream is closed
+        rows = 2 * STREAM_BLOCK_BYTES * STREAM_QUEUE_BLOCKS // 50
+        big = {"Link": pd.DataFrame({"Link_No": ["L" * 40] * rows})}
+        finished = threading.Event()
+        self.stream("jsonl", sheets=big, finished=finished).close()
+        self.assertTrue(finished.wait(timeout=10))
@@ -11,6 +11,7 @@ urlpatterns = [
     path("download-template-excel/", views.download_template_excel, name="download_template_excel"),
     path('validate-map-txt/', views.validate_map_txt, name='validate_map_txt'),
     path('validate-db-file/', views.validate_db_file, name='validate_db_file'),
+    path('validation-runs/<str:run_id>/errors/', views.validation_errors, name='validation_errors'),
     path('done/',views.data_updated,name='done')
     # path('upload-db-file/',views.upload_db_file, name="upload_db_file")
 ]
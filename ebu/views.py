@@ -34,7 +34,10 @@ import base64
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from django.conf import settings
-from .Scripts.main import runValidationScript
+from .Scripts.main import prepare_validation, runValidationScript
+from .Scripts.report_writer import DEFAULT_REPORT_FORMAT, REPORT_FORMATS, format_from_accept, stream_report
+from .Scripts.run_workspace import RunWorkspace, WorkspaceJanitor, is_run_id
+from .Scripts.error_store import DEFAULT_PAGE_SIZE, ERRORS_FILE, open_store
 
 import json
 import base64
@@ -454,6 +457,35 @@ def download_template_excel(request):
 
 
 
+def _request_count(request, name, default):
+    """
+    Parameter name (POST, or the query string of a GET) as a whole number >= 0
+    (default when absent); None when it is not one.
+    """
+    params = request.POST if request.method == "POST" else request.GET
+    value = params.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        return None
+    return number if number >= 0 else None
+
+
+def _scratch_root():
+    """Directory of the per-run workspaces."""
+    return getattr(settings, "VALIDATION_SCRATCH_ROOT", "") or os.path.join(tempfile.gettempdir(), "ebu_validation_runs")
+
+
+def _release_workspace(workspace, keep):
+    """Release a run's workspace, keeping the named files; cleanup problems are only logged."""
+    try:
+        workspace.release(keep=keep)
+    except Exception as cleanup_error:
+        print(f"Warning: Could not clean up workspace {workspace.path}: {cleanup_error}")
+
+
 def validate_db_file(request):
     
     if request.method == "POST" and request.FILES.get("db_file"):
@@ -477,54 +509,162 @@ def validate_db_file(request):
         # Check if user wants to force download the Excel file
         force_download = request.POST.get("force_download", "false").lower() == "true"
 
+        # Error budgets (0 = unlimited) and fail-fast, per request or from the settings
+        error_budget = _request_count(request, "error_budget", getattr(settings, "VALIDATION_ERROR_BUDGET", 0))
+        table_error_budget = _request_count(request, "table_error_budget",
+                                            getattr(settings, "VALIDATION_TABLE_ERROR_BUDGET", 0))
+        if error_budget is None or table_error_budget is None:
+            return JsonResponse({
+                "valid": False,
+                "message": "error_budget and table_error_budget must be whole numbers (0 = no limit)"
+            })
+        default_fail_fast = "true" if getattr(settings, "VALIDATION_FAIL_FAST", False) else "false"
+        fail_fast = request.POST.get("fail_fast", default_fail_fast).lower() == "true"
+
+        # Report format: the report_format parameter, else the Accept header, else XLSX
+        report_format = (request.POST.get("report_format", "").strip().lower()
+                         or format_from_accept(request.META.get("HTTP_ACCEPT", ""))
+                         or DEFAULT_REPORT_FORMAT)
+        if report_format not in REPORT_FORMATS:
+            return JsonResponse({
+                "valid": False,
+                "message": f"report_format must be one of: {', '.join(REPORT_FORMATS)}"
+            })
+        report_spec = REPORT_FORMATS[report_format]
+
+        # Every run gets its own workspace (uploaded file, report) under the scratch
+        # root, so concurrent runs never touch each other's files; stale
+        # workspaces of earlier runs are evicted first
+        scratch_root = _scratch_root()
+        WorkspaceJanitor(scratch_root,
+                         max_age_seconds=getattr(settings, "VALIDATION_WORKSPACE_MAX_AGE", None),
+                         max_bytes=getattr(settings, "VALIDATION_WORKSPACE_MAX_BYTES", None)).sweep()
+
+        workspace = None
         temp_file_path = None
+        streaming = False
         try:
-            
+            workspace = RunWorkspace(scratch_root)
 
-            # Save uploaded file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.accdb') as temp_file:
+            # Save uploaded file in the run's workspace
+            temp_file_path = workspace.file("upload.accdb")
+            with open(temp_file_path, "wb") as temp_file:
                 for chunk in file.chunks():
                     temp_file.write(chunk)
-                temp_file_path = temp_file.name
-                print(f"Temporary file created: {temp_file_path}")
+            print(f"Run {workspace.run_id}: uploaded file saved to {temp_file_path}")
 
             if temp_file_path and os.path.exists(temp_file_path):
+                run_kwargs = dict(
+                    cache_dir=getattr(settings, "VALIDATION_CACHE_DIR", None),
+                    cache_max_bytes=getattr(settings, "VALIDATION_CACHE_MAX_BYTES", None),
+                    filter_by_admcode=getattr(settings, "VALIDATION_FILTER_BY_ADMCODE", False),
+                    sql_engine=getattr(settings, "VALIDATION_SQL_ENGINE", "") or None,
+                    validation_workers=getattr(settings, "VALIDATION_WORKERS", 0),
+                    kabupaten_extents=getattr(settings, "VALIDATION_KABUPATEN_EXTENTS", "") or None,
+                    error_budget=error_budget,
+                    table_error_budget=table_error_budget,
+                    fail_fast=fail_fast,
+                    output_dir=workspace.path,
+                    report_format=report_format,
+                    errors_path=workspace.file(ERRORS_FILE),
+                )
+                # Errors of the run, page by page (validation_errors)
+                errors_url = reverse("validation_errors", args=[workspace.run_id])
+
+                # CSV and JSON Lines reports are streamed sheet by sheet while the
+                # later tables are still being validated; the run summary (error
+                # counts, truncated and skipped tables) comes last, as
+                # _summary.json or the "_summary" record
+                if report_spec.streams:
+                    from django.http import StreamingHttpResponse
+
+                    # Failures found before the first sheet (adm_code mismatch,
+                    # unreadable file) are answered like a non-streamed run
+                    prepared = prepare_validation(temp_file_path, admCode, report_format=report_format,
+                                                  cache_dir=run_kwargs["cache_dir"],
+                                                  cache_max_bytes=run_kwargs["cache_max_bytes"],
+                                                  filter_by_admcode=run_kwargs["filter_by_admcode"])
+                    if not prepared["success"]:
+                        return JsonResponse({
+                            "valid": False,
+                            "message": prepared["message"],
+                            "validation_result": prepared,
+                        })
+
+                    def run(writer):
+                        # Runs in the stream's producer thread, which outlives a
+                        # closed stream: the workspace is released once the run ends
+                        try:
+                            return runValidationScript(temp_file_path, admCode, report_writer=writer,
+                                                       prepared=prepared, **run_kwargs)
+                        finally:
+                            _release_workspace(workspace, [ERRORS_FILE])
+
+                    response = StreamingHttpResponse(
+                        stream_report(report_format, run),
+                        content_type=report_spec.content_type,
+                    )
+                    suffix = report_spec.file_name[len("link_validation"):]
+                    response['Content-Disposition'] = f'attachment; filename="validation_report{suffix}"'
+                    response['X-Validation-Run'] = workspace.run_id
+                    response['X-Validation-Errors-Url'] = errors_url
+                    response['X-Validation-Format'] = report_format
+                    response['X-Validation-Streamed'] = 'true'
+                    streaming = True
+                    return response
+
                 # Run validation
-                validation_result = runValidationScript(temp_file_path , admCode)
+                validation_result = runValidationScript(temp_file_path, admCode, **run_kwargs)
 
                 if validation_result and validation_result.get("success"):
-                    # Collect validation summary
+                    # Collect validation summary (None for the tables of a stopped
+                    # run that were not validated, see "skipped")
                     summary = validation_result.get("summary", {})
-                    total_errors = sum(summary.values()) if summary else 0
-                    validation_passed = total_errors == 16  # adjust logic if needed
+                    rule_summary = validation_result.get("rule_summary", {})
+                    cache_stats = validation_result.get("cache")
+                    # Exact error rows per table (the "no errors" rows are not counted)
+                    total_errors = validation_result.get("total_errors", 0)
+                    validation_passed = total_errors == 0
 
                     excel_file_path = validation_result.get("output_file")
 
                     # Case 1: Errors exist OR force download
-                    if total_errors > 16 or force_download:
+                    if not validation_passed or force_download:
                         if excel_file_path and os.path.exists(excel_file_path):
                             from django.http import FileResponse
-                            import mimetypes
-
-                            mime_type, _ = mimetypes.guess_type(excel_file_path)
-                            if mime_type is None:
-                                mime_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 
                             file_handle = open(excel_file_path, 'rb')
-                            response = FileResponse(file_handle, content_type=mime_type)
+                            response = FileResponse(file_handle, content_type=report_spec.content_type)
 
-                            filename = "validation_errors.xlsx" if total_errors > 16 else "validation_report.xlsx"
+                            # validation_errors.xlsx, validation_errors_csv.zip, ...
+                            suffix = report_spec.file_name[len("link_validation"):]
+                            filename = ("validation_errors" if not validation_passed else "validation_report") + suffix
                             response['Content-Disposition'] = f'attachment; filename="{filename}"'
                             response['X-Validation-Errors'] = str(total_errors)
                             response['X-Validation-Summary'] = json.dumps(summary)
+                            response['X-Validation-Rules'] = json.dumps(rule_summary)
+                            response['X-Validation-Truncated'] = json.dumps(validation_result.get("truncated", []))
+                            response['X-Validation-Skipped'] = json.dumps(validation_result.get("skipped", []))
                             response['X-Validation-Passed'] = str(validation_passed).lower()
+                            response['X-Validation-Run'] = workspace.run_id
+                            response['X-Validation-Errors-Url'] = errors_url
+                            response['X-Validation-Format'] = report_format
+                            if cache_stats:
+                                response['X-Validation-Cache'] = json.dumps(cache_stats)
                             return response
 
                         return JsonResponse({
                             "valid": False,
                             "message": "Validation completed but Excel output not found.",
+                            "validation_message": validation_result.get("message"),
                             "total_errors": total_errors,
-                            "summary": summary
+                            "summary": summary,
+                            "rule_summary": rule_summary,
+                            "truncated": validation_result.get("truncated", []),
+                            "skipped": validation_result.get("skipped", []),
+                            "cache": cache_stats,
+                            "run_id": workspace.run_id,
+                            "errors_url": errors_url,
                         })
 
                     # Case 2: No validation errors →  normal response
@@ -532,8 +672,12 @@ def validate_db_file(request):
                         "valid": True,
                         "message": "Database validation completed successfully! No validation errors found.",
                         "summary": summary,
+                        "rule_summary": rule_summary,
                         "total_errors": total_errors,
-                        "validation_passed": validation_passed
+                        "validation_passed": validation_passed,
+                        "cache": cache_stats,
+                        "run_id": workspace.run_id,
+                        "errors_url": errors_url,
                     })
 
                 else:
@@ -555,17 +699,55 @@ def validate_db_file(request):
                 "message": f"Error processing Access database: {str(e)}"
             })
         finally:
-            # Cleanup temporary file
-            if 'temp_file_path' in locals() and temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.unlink(temp_file_path)
-                    print(f"Temporary file cleaned up: {temp_file_path}")
-                except Exception as cleanup_error:
-                    print('clean up error:', cleanup_error)
-                    print(f"Warning: Could not clean up temporary file {temp_file_path}: {cleanup_error}")
+            # The uploaded file goes now; the report (still being sent) and the
+            # error store stay until the janitor evicts the workspace. A
+            # streamed run releases its workspace once the run ends.
+            if workspace is not None and not streaming:
+                _release_workspace(workspace, [report_spec.file_name, ERRORS_FILE])
 
     return JsonResponse({"valid": False, "message": "No file uploaded"})
 
+def validation_errors(request, run_id):
+    """
+    Errors of a validation run as JSON, page by page: ?table=, ?rule= (rule
+    id, see error_report.RULES) and ?link_no= filter them, ?limit= sets the
+    page size (default 100, at most 1000) and ?cursor= continues after the
+    previous page's next_cursor. counts holds the failures per table and
+    rule of the whole run; count those matching the filters.
+    """
+    if not is_run_id(run_id):
+        return JsonResponse({"message": "Unknown validation run"}, status=404)
+    limit = _request_count(request, "limit", DEFAULT_PAGE_SIZE)
+    cursor = _request_count(request, "cursor", None)
+    if not limit or (request.GET.get("cursor") and cursor is None):
+        return JsonResponse({"message": "limit and cursor must be whole numbers (limit > 0)"}, status=400)
+
+    store = open_store(os.path.join(_scratch_root(), run_id))
+    if store is None:
+        return JsonResponse({"message": "Unknown or expired validation run"}, status=404)
+    try:
+        page = store.page(
+            table=request.GET.get("table") or None,
+            rule=request.GET.get("rule") or None,
+            link_no=request.GET.get("link_no") or None,
+            cursor=cursor,
+            limit=limit,
+        )
+        counts = store.counts()
+        summary = store.summary()
+    finally:
+        store.close()
+
+    return JsonResponse({
+        "run_id": run_id,
+        # A run has no summary until it ends (failed runs store one too)
+        "complete": summary is not None,
+        **page,
+        "counts": counts,
+        "summary": summary,
+    }, json_dumps_params={"ensure_ascii": False})
+
+
 def get_validation_summary(excel_file_path):
     """
     Helper function to get a summary of validation errors from the Excel file
@@ -124,6 +124,33 @@ AUTH_PASSWORD_VALIDATORS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Snapshot cache of extracted Access tables (keyed by the uploaded file's SHA-256)
+VALIDATION_CACHE_DIR = config('VALIDATION_CACHE_DIR', default=str(BASE_DIR / 'validation_cache'))
+VALIDATION_CACHE_MAX_BYTES = config('VALIDATION_CACHE_MAX_BYTES', default=2 * 1024 ** 3, cast=int)
+
+# Read only the submitted admCode's Province/Kabupaten rows from the uploaded database
+VALIDATION_FILTER_BY_ADMCODE = config('VALIDATION_FILTER_BY_ADMCODE', default=False, cast=bool)
+
+# Run Link_No existence and duplicate-key rules in an embedded SQL engine: 'auto', 'sqlite' or 'duckdb' (empty = pandas)
+VALIDATION_SQL_ENGINE = config('VALIDATION_SQL_ENGINE', default='')
+
+# Worker processes for the table validators (0 = run them one after another)
+VALIDATION_WORKERS = config('VALIDATION_WORKERS', default=0, cast=int)
+
+# CSV of kabupaten GPS extents (province_id, kCode, lat_min, lat_max, lon_min, lon_max) for the Alignment checks
+VALIDATION_KABUPATEN_EXTENTS = config('VALIDATION_KABUPATEN_EXTENTS', default='')
+
+# Default error budgets (0 = no limit; a request may pass error_budget / table_error_budget) and fail-fast mode
+VALIDATION_ERROR_BUDGET = config('VALIDATION_ERROR_BUDGET', default=0, cast=int)
+VALIDATION_TABLE_ERROR_BUDGET = config('VALIDATION_TABLE_ERROR_BUDGET', default=0, cast=int)
+VALIDATION_FAIL_FAST = config('VALIDATION_FAIL_FAST', default=False, cast=bool)
+
+# Scratch root for the per-run workspaces (uploaded file, reports; empty = the system temp dir).
+# Finished workspaces are evicted after VALIDATION_WORKSPACE_MAX_AGE seconds, oldest first past the size bound.
+VALIDATION_SCRATCH_ROOT = config('VALIDATION_SCRATCH_ROOT', default=str(BASE_DIR / 'validation_runs'))
+VALIDATION_WORKSPACE_MAX_AGE = config('VALIDATION_WORKSPACE_MAX_AGE', default=6 * 3600, cast=int)
+VALIDATION_WORKSPACE_MAX_BYTES = config('VALIDATION_WORKSPACE_MAX_BYTES', default=5 * 1024 ** 3, cast=int)
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 